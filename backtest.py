@@ -4,23 +4,28 @@ import os
 
 import argparse
 import asyncio
+import json
 import pprint
+from collections import OrderedDict
+from multiprocessing import Pool
 from time import time
 
 import numpy as np
 import pandas as pd
+from prettytable import PrettyTable
 
 from downloader import Downloader, load_hlc_cache
-from njit_funcs import round_
+from njit_funcs import round_, calc_ema_bands
 from njit_funcs_recursive_grid import backtest_recursive_grid
 from njit_funcs_neat_grid import backtest_neat_grid
 from njit_clock import backtest_clock
-from plotting import dump_plots
+from plotting import dump_plots, PLOT_NAMES
 from procedures import (
     prepare_backtest_config,
     load_live_config,
     load_hjson_config,
     add_argparse_args,
+    make_get_filepath,
 )
 from pure_funcs import (
     create_xk,
@@ -31,14 +36,81 @@ from pure_funcs import (
     determine_passivbot_mode,
     candidate_to_live_config,
     make_compatible,
+    round_dynamic,
 )
 
 
-def backtest(config: dict, data: np.ndarray, do_print=False) -> (list, bool):
+class EMABandCache:
+    """
+    LRU of precomputed ema bands, keyed by price data and ema spans, bounded to max_bytes.
+    Candidates sharing ema spans reuse the bands instead of computing emas in the kernel.
+    Exactly equal spans are rare in a continuous search space, so the cache is kept small;
+    it is one per worker process, so total memory use is n_cpus * max_bytes.
+    float32 halves memory use, at the cost of results no longer matching inline emas exactly.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024**2, dtype=np.float64):
+        self.max_bytes = max_bytes
+        self.dtype = dtype
+        self.bands = OrderedDict()
+        self.nbytes = 0
+        self.n_hits = 0
+        self.n_misses = 0
+
+    def get(self, data: np.ndarray, ema_span_0: float, ema_span_1: float, spans_multiplier: float):
+        # data is [[ts, qty, price]] or [[ts, high, low, close]]; price/close is last column
+        key = (
+            len(data),
+            float(data[0, 0]),
+            float(data[-1, 0]),
+            float(data[0, -1]),
+            float(data[-1, -1]),
+            float(ema_span_0),
+            float(ema_span_1),
+            float(spans_multiplier),
+        )
+        if key in self.bands:
+            self.bands.move_to_end(key)
+            self.n_hits += 1
+            return self.bands[key]
+        self.n_misses += 1
+        bands = calc_ema_bands(
+            np.ascontiguousarray(data[:, -1]),
+            float(ema_span_0),
+            float(ema_span_1),
+            float(spans_multiplier),
+        ).astype(self.dtype)
+        if bands.nbytes > self.max_bytes:
+            return bands  # not cached
+        self.bands[key] = bands
+        self.nbytes += bands.nbytes
+        while self.nbytes > self.max_bytes:
+            self.nbytes -= self.bands.popitem(last=False)[1].nbytes
+        return bands
+
+
+def get_ema_bands(
+    ema_band_cache: EMABandCache, xk: dict, data: np.ndarray, spans_multiplier: float
+) -> dict:
+    ema_bands = {}
+    for pside, idx in [("long", 0), ("short", 1)]:
+        if xk[f"do_{pside}"]:
+            ema_bands[f"ema_bands_{pside}"] = ema_band_cache.get(
+                data, xk["ema_span_0"][idx], xk["ema_span_1"][idx], spans_multiplier
+            )
+    return ema_bands
+
+
+def backtest(
+    config: dict, data: np.ndarray, do_print=False, ema_band_cache: EMABandCache = None
+) -> (list, bool):
     config.update(make_compatible(config))
     passivbot_mode = determine_passivbot_mode(config)
     xk = create_xk(config)
     if passivbot_mode == "recursive_grid":
+        if ema_band_cache is not None:
+            spans_multiplier = 60 / ((data[1][0] - data[0][0]) / 1000)
+            xk.update(get_ema_bands(ema_band_cache, xk, data, spans_multiplier))
         return backtest_recursive_grid(
             data,
             config["starting_balance"],
@@ -47,6 +119,9 @@ def backtest(config: dict, data: np.ndarray, do_print=False) -> (list, bool):
             **xk,
         )
     elif passivbot_mode == "neat_grid":
+        if ema_band_cache is not None:
+            spans_multiplier = 60 / ((data[1][0] - data[0][0]) / 1000)
+            xk.update(get_ema_bands(ema_band_cache, xk, data, spans_multiplier))
         return backtest_neat_grid(
             data,
             config["starting_balance"],
@@ -55,6 +130,8 @@ def backtest(config: dict, data: np.ndarray, do_print=False) -> (list, bool):
             **xk,
         )
     elif passivbot_mode == "clock":
+        if ema_band_cache is not None:
+            xk.update(get_ema_bands(ema_band_cache, xk, data, 1.0))
         return backtest_clock(
             data,
             config["starting_balance"],
@@ -72,7 +149,11 @@ def plot_wrap(config, data):
     sts = time()
     fills_long, fills_short, stats = backtest(config, data, do_print=True)
     print(f"{time() - sts:.2f} seconds elapsed")
-    if not fills_long and not fills_short:
+    dump_backtest_results(config, data, fills_long, fills_short, stats)
+
+
+def dump_backtest_results(config, data, fills_long, fills_short, stats):
+    if len(fills_long) == 0 and len(fills_short) == 0:
         print("no fills")
         return
     longs, shorts, sdf, result = analyze_fills(fills_long, fills_short, stats, config)
@@ -88,6 +169,8 @@ def plot_wrap(config, data):
         df,
         n_parts=config["n_parts"],
         disable_plotting=config["disable_plotting"],
+        plots=config.get("plots"),
+        export_csv=config.get("export_csv", False),
     )
     if (
         not config["disable_plotting"]
@@ -102,6 +185,94 @@ def plot_wrap(config, data):
         print(f"{time() - sts:.2f} seconds spent on dumping interactive plot")
 
 
+def plot_wrap_multi(configs: list, datas: list, n_cpus: int):
+    """
+    backtests all symbols in parallel, one process per cpu,
+    then dumps per symbol results and a combined summary
+    """
+    for config in configs:
+        config.update(make_compatible(config))
+    n_cpus = max(1, min(n_cpus, len(configs)))
+    print(f"backtesting {len(configs)} symbols using {n_cpus} cpus...")
+    sts = time()
+    with Pool(processes=n_cpus) as pool:
+        backtest_results = pool.starmap(backtest, zip(configs, datas))
+    print(f"{time() - sts:.2f} seconds elapsed")
+    for config, data, (fills_long, fills_short, stats) in zip(configs, datas, backtest_results):
+        print(f"\n{config['symbol']}")
+        dump_backtest_results(config, data, fills_long, fills_short, stats)
+    dump_multi_symbol_summary(configs)
+
+
+def dump_multi_symbol_summary(configs: list):
+    psides = [pside for pside in ["long", "short"] if configs[0][pside]["enabled"]]
+    columns = [
+        ("ADG/exp", "adg_per_exposure", 100),
+        ("DD max", "drawdown_max", 100),
+        ("Sharpe", "sharpe_ratio", 1),
+        ("Loss/profit", "loss_profit_ratio", 1),
+        ("Hrs stuck max", "hrs_stuck_max", 1),
+        ("Final balance", "final_balance", 1),
+        ("N fills", "n_fills", 1),
+    ]
+    table = PrettyTable(
+        ["Symbol"] + [f"{title} {pside}" for pside in psides for title, _, _ in columns]
+    )
+    table.align = "l"
+    table.title = f"Summary {len(configs)} symbols"
+    summary = {}
+    for config in configs:
+        if "result" not in config:
+            # no fills
+            continue
+        summary[config["symbol"]] = {
+            f"{key}_{pside}": config["result"][f"{key}_{pside}"]
+            for pside in psides
+            for _, key, _ in columns
+        }
+    rows = sorted(summary.items())
+    if summary:
+        means = {k: np.mean([v[k] for v in summary.values()]) for k in next(iter(summary.values()))}
+        rows.append(("mean", means))
+    for symbol, values in rows:
+        table.add_row(
+            [symbol]
+            + [
+                round_dynamic(values[f"{key}_{pside}"] * mul, 4)
+                if np.isfinite(values[f"{key}_{pside}"]) and values[f"{key}_{pside}"] != 0.0
+                else values[f"{key}_{pside}"]
+                for pside in psides
+                for _, key, mul in columns
+            ]
+        )
+    dirpath = make_get_filepath(
+        os.path.join(
+            configs[0]["base_dir"],
+            f"{configs[0]['exchange']}{'_spot' if 'spot' in configs[0]['market_type'] else ''}",
+            "multi_symbol",
+            ts_to_date(time())[:19].replace(":", ""),
+            "",
+        )
+    )
+    output = table.get_string(border=True, padding_width=1)
+    print(output)
+    with open(dirpath + "summary.txt", "w") as f:
+        f.write(output)
+    json.dump(
+        denumpyize(
+            {
+                "summary": summary,
+                "plots_dirpaths": {
+                    config["symbol"]: config["plots_dirpath"] for config in configs
+                },
+            }
+        ),
+        open(dirpath + "summary.json", "w"),
+        indent=4,
+    )
+    print(f"summary written to {dirpath}")
+
+
 async def main():
     parser = argparse.ArgumentParser(prog="Backtest", description="Backtest given passivbot config.")
     parser.add_argument(
@@ -167,10 +338,43 @@ async def main():
         action="store_true",
         help="disable plotting",
     )
+    parser.add_argument(
+        "-pl",
+        "--plots",
+        type=str,
+        required=False,
+        dest="plots",
+        default=None,
+        help=f"comma separated plots to render, default all: {','.join(PLOT_NAMES)}",
+    )
+    parser.add_argument(
+        "--csv",
+        action="store_true",
+        dest="export_csv",
+        help="also dump fills and stats as .csv, in addition to .npz",
+    )
+    parser.add_argument(
+        "-ms",
+        "--multi_symbol",
+        "--multi-symbol",
+        action="store_true",
+        help="load all symbols first and backtest them in parallel, with combined summary",
+    )
+    parser.add_argument(
+        "-c",
+        "--n_cpus",
+        "--n-cpus",
+        type=int,
+        required=False,
+        dest="n_cpus",
+        default=None,
+        help="n cpus to use with --multi_symbol, defaults to all",
+    )
     args = parser.parse_args()
     live_config_paths = args.live_config_path.split(",")
     config = prepare_backtest_config(args)
     for ix, live_config_path in enumerate(live_config_paths):
+        multi_symbol_configs, multi_symbol_datas = [], []
         for symbol in config["symbols"]:
             if "symbol" not in config or symbol != config["symbol"] or ix > 0:
                 args = parser.parse_args()
@@ -204,6 +408,8 @@ async def main():
             if passivbot_mode == "clock" or config["exchange"] == "okx":
                 config["ohlcv"] = True
             config["disable_plotting"] = args.disable_plotting
+            config["plots"] = None if args.plots is None else args.plots.split(",")
+            config["export_csv"] = args.export_csv
             if "spot" in config["market_type"]:
                 live_config = spotify_config(live_config)
             config["passivbot_mode"] = determine_passivbot_mode(config)
@@ -245,7 +451,17 @@ async def main():
                 data = await downloader.get_sampled_ticks()
             config["n_days"] = round_((data[-1][0] - data[0][0]) / (1000 * 60 * 60 * 24), 0.1)
             pprint.pprint(denumpyize(candidate_to_live_config(config)))
-            plot_wrap(config, data)
+            if args.multi_symbol:
+                multi_symbol_configs.append(config)
+                multi_symbol_datas.append(data)
+            else:
+                plot_wrap(config, data)
+        if multi_symbol_configs:
+            plot_wrap_multi(
+                multi_symbol_configs,
+                multi_symbol_datas,
+                args.n_cpus if args.n_cpus is not None else os.cpu_count(),
+            )
 
 
 if __name__ == "__main__":
@@ -15,6 +15,8 @@ from procedures import (
     load_user_info,
     make_get_filepath,
     fetch_market_specific_settings_multi,
+    load_market_settings_cached,
+    MARKET_SETTINGS_CACHE_TTL_HOURS,
 )
 from pure_funcs import (
     ts_to_date_utc,
@@ -56,6 +58,9 @@ def backtest_multi(hlcs, config):
         config["loss_allowance_pct"],
         config["stuck_threshold"],
         config["unstuck_close_pct"],
+        config.get("order_proximity", 0.0),
+        config.get("max_order_age_minutes", 60),
+        config.get("max_balance_drift", 0.002),
     )
     return res
 
@@ -177,7 +182,7 @@ async def prep_hlcs_mss_config(config):
             f"{config['base_dir']}",
             "multisymbol",
             config["exchange"],
-            f"{'_'.join(coins)}_{config['start_date']}_{config['end_date']}_hlc_cache.npy",
+            f"{'_'.join(coins)}_{config['start_date']}_{config['end_date']}_hlcs_minute_major.npy",
         )
     )
 
@@ -187,16 +192,15 @@ async def prep_hlcs_mss_config(config):
         config["exchange"],
         "market_specific_settings.json",
     )
+    exchange = config["exchange"]
     try:
-        mss = fetch_market_specific_settings_multi(exchange=config["exchange"])
-        json.dump(mss, open(make_get_filepath(mss_path), "w"))
+        mss = load_market_settings_cached(
+            mss_path,
+            lambda: fetch_market_specific_settings_multi(exchange=exchange),
+            config.get("market_settings_cache_ttl_hours", MARKET_SETTINGS_CACHE_TTL_HOURS),
+        )
     except Exception as e:
-        print("failed to fetch market specific settings", e)
-        try:
-            mss = json.load(open(mss_path))
-            print(f"loaded market specific settings from cache {mss_path}")
-        except:
-            raise Exception("failed to load market specific settings from cache")
+        raise Exception(f"failed to load market specific settings {e}")
 
     # prepare_multsymbol_data() is computationally expensive, so use a cache
     try:
@@ -211,6 +215,8 @@ async def prep_hlcs_mss_config(config):
             config["exchange"],
         )
         np.save(config["cache_fpath"], hlcs)
+    # minute-major (n_minutes, n_symbols, 3); float32 optional
+    hlcs = np.ascontiguousarray(hlcs, dtype=config.get("hlcs_dtype", "float64"))
     return hlcs, mss, config
 
 
@@ -33,6 +33,7 @@ from procedures import (
     get_first_ohlcv_timestamps,
 )
 from pure_funcs import ts_to_date, ts_to_date_utc, date_to_ts2, get_dummy_settings, get_day
+from market_data_recorder import RECORDED_OHLCVS_DIR, OHLCV_COLUMNS
 
 
 class Downloader:
@@ -1221,6 +1222,23 @@ async def download_ohlcvs_binance(
         return df[col_names].set_index("timestamp").reindex(nindex).ffill().reset_index()
 
 
+def load_recorded_ohlcvs(symbol, start_date, end_date, exchange, spot=False) -> pd.DataFrame:
+    # 1m ohlcvs recorded from live websocket streams by market_data_recorder.MarketDataRecorder
+    dirpath = os.path.join(
+        RECORDED_OHLCVS_DIR.format(exchange=exchange + ("_spot" if spot else "")), symbol
+    )
+    fpaths = [
+        fpath
+        for day in get_days_in_between(get_day(start_date), get_day(end_date))
+        if os.path.exists(fpath := os.path.join(dirpath, day + ".csv"))
+    ]
+    if not fpaths:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+    df = pd.concat([pd.read_csv(fpath) for fpath in fpaths])
+    df = df.drop_duplicates(subset=["timestamp"], keep="last").sort_values("timestamp")
+    return df[OHLCV_COLUMNS].reset_index(drop=True)
+
+
 def count_longest_identical_data(hlc, symbol):
     line = f"checking ohlcv integrity of {symbol}"
     diffs = (np.diff(hlc[:, 1:], axis=0) == [0.0, 0.0, 0.0]).all(axis=1)
@@ -1283,11 +1301,36 @@ async def load_hlc_cache(
     if os.path.exists(filepath):
         data = np.load(filepath)
     else:
-        if exchange == "bybit":
+        recorded = load_recorded_ohlcvs(symbol, start_date, end_date, exchange, spot)
+        df = None
+        if exchange not in ["binance", "bybit"] and len(recorded) > 0:
+            # no historical source for exchange; use ohlcvs recorded from live streams,
+            # but only if they cover the whole range, else binance ohlcvs as before
+            first_ts, last_ts = recorded.timestamp.iloc[0], recorded.timestamp.iloc[-1]
+            if first_ts > date_to_ts2(start_date) + 60000 or last_ts < date_to_ts2(end_date) - 60000:
+                print(
+                    f"recorded {symbol} ohlcvs cover only {ts_to_date_utc(first_ts)[:16]} to "
+                    + f"{ts_to_date_utc(last_ts)[:16]}, falling back to binance ohlcvs"
+                )
+            else:
+                try:
+                    df, recorded = attempt_gap_fix_hlcs(recorded), recorded.iloc[:0]
+                except Exception as e:
+                    print(f"recorded {symbol} ohlcvs unusable, falling back to binance ohlcvs", e)
+        if df is None and exchange == "bybit":
             df = await download_ohlcvs_bybit(symbol, start_date, end_date, spot, download_only=False)
             df = attempt_gap_fix_hlcs(df)
-        else:
+        elif df is None:
             df = await download_ohlcvs_binance(symbol, inverse, start_date, end_date, spot)
+        if len(recorded) > 0:
+            # recorded ohlcvs extend downloaded ones, e.g. with days not yet in the archives
+            try:
+                recorded = recorded[recorded.timestamp > (df.timestamp.iloc[-1] if len(df) else 0)]
+                df = attempt_gap_fix_hlcs(
+                    pd.concat([df[OHLCV_COLUMNS], recorded]).reset_index(drop=True)
+                )
+            except Exception as e:
+                print(f"not extending {symbol} ohlcvs with recorded ohlcvs", e)
         df = df[df.timestamp >= date_to_ts2(start_date)]
         df = df[df.timestamp <= date_to_ts2(end_date)]
         data = df[["timestamp", "high", "low", "close"]].values
@@ -1300,18 +1343,18 @@ async def load_hlc_cache(
 
 
 async def prepare_multsymbol_data(
-    symbols, start_date, end_date, base_dir, exchange
+    symbols, start_date, end_date, base_dir, exchange, dtype=np.float64
 ) -> (float, np.ndarray):
     """
-    returns first timestamp and hlc data in the form
+    returns first timestamp and minute-major hlc data of shape (n_minutes, n_symbols, 3)
     [
         [
             [sym0_high0, sym0_low0, sym0_close0],
-            [sym0_high1, sym0_low1, sym0_close1],
+            [sym1_high0, sym1_low0, sym1_close0],
             ...
         ],
         [
-            [sym1_high0, sym1_low0, sym1_close0],
+            [sym0_high1, sym0_low1, sym0_close1],
             [sym1_high1, sym1_low1, sym1_close1],
             ...
         ],
@@ -1339,7 +1382,9 @@ async def prepare_multsymbol_data(
     )
     df = pd.concat([x.set_index("timestamp").reindex(tss) for x in hlcs], axis=1, join="outer")
     df = df.fillna(0.0)
-    return df.index[0], np.array([df.values[:, i : i + 3] for i in range(0, len(symbols) * 3, 3)])
+    # columns are [sym0_high, sym0_low, sym0_close, sym1_high, ...]
+    hlcs = np.ascontiguousarray(df.values, dtype=dtype).reshape(len(df), len(symbols), 3)
+    return df.index[0], hlcs
 
 
 async def main():
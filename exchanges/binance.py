@@ -26,11 +26,13 @@ class BinanceBot(Bot):
 
     async def public_get(self, url: str, params: dict = {}, base_endpoint=None) -> dict:
         try:
+            await self.rate_limiter.acquire()
             async with self.session.get(
                 (self.base_endpoint if base_endpoint is None else base_endpoint) + url,
                 params=params,
             ) as response:
                 result = await response.text()
+                self.rate_limiter.check_status(response.status)
             return json.loads(result)
         except Exception as e:
             print(f"error with public get {url} {params}")
@@ -68,16 +70,20 @@ class BinanceBot(Bot):
                 hashlib.sha256,
             ).hexdigest()
             if data_:
+                await self.rate_limiter.acquire()
                 async with getattr(self.session, type_)(
                     base_endpoint + url, data=params, headers=self.headers
                 ) as response:
                     result = await response.text()
+                    self.rate_limiter.check_status(response.status)
             else:
                 params_encoded = urlencode(params)
+                await self.rate_limiter.acquire()
                 async with getattr(self.session, type_)(
                     base_endpoint + url, params=params_encoded, headers=self.headers
                 ) as response:
                     result = await response.text()
+                    self.rate_limiter.check_status(response.status)
 
             return json.loads(result)
         except Exception as e:
@@ -50,8 +50,10 @@ class BinanceBotSpot(Bot):
         self.max_n_cancellations_per_batch = 10
 
     async def public_get(self, url: str, params: dict = {}) -> dict:
+        await self.rate_limiter.acquire()
         async with self.session.get(self.base_endpoint + url, params=params) as response:
             result = await response.text()
+            self.rate_limiter.check_status(response.status)
         return json.loads(result)
 
     async def private_(self, type_: str, base_endpoint: str, url: str, params: dict = {}) -> dict:
@@ -68,19 +70,23 @@ class BinanceBotSpot(Bot):
             urlencode(params).encode("utf-8"),
             hashlib.sha256,
         ).hexdigest()
+        await self.rate_limiter.acquire()
         async with getattr(self.session, type_)(
             base_endpoint + url, params=params, headers=self.headers
         ) as response:
             result = await response.text()
+            self.rate_limiter.check_status(response.status)
         return json.loads(result)
 
     async def post_listen_key(self):
+        await self.rate_limiter.acquire()
         async with self.session.post(
             self.base_endpoint + self.endpoints["listen_key"],
             params={},
             headers=self.headers,
         ) as response:
             result = await response.text()
+            self.rate_limiter.check_status(response.status)
         return json.loads(result)
 
     async def private_get(self, url: str, params: dict = {}) -> dict:
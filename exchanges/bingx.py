@@ -7,6 +7,7 @@ import numpy as np
 from uuid import uuid4
 from njit_funcs import calc_diff, round_
 from passivbot import Bot, logging
+from rate_limiter import RateLimiter
 from procedures import print_async_exception, utc_ms, make_get_filepath
 from pure_funcs import determine_pos_side_ccxt, floatify, calc_hash, ts_to_date_utc, date_to_ts2
 
@@ -37,6 +38,7 @@ class BingXBot(Bot):
                 "headers": {"X-SOURCE-KEY": self.broker_code} if self.broker_code else {},
             }
         )
+        self.rate_limiter = RateLimiter.for_ccxt(self.cc).attach_to_ccxt(self.cc)
         self.custom_id_max_length = 40
 
     def init_market_type(self):
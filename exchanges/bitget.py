@@ -210,9 +210,11 @@ class BitgetBot(Bot):
         result = None
         response_ = None
         try:
+            await self.rate_limiter.acquire()
             async with self.session.get(self.base_endpoint + url, params=params) as response:
                 response_ = response
                 result = await response.text()
+                self.rate_limiter.check_status(response.status)
             return json.loads(result)
         except Exception as e:
             logging.error(f"error with json decoding {url} {params} {e}")
@@ -261,13 +263,17 @@ class BitgetBot(Bot):
             "ACCESS-PASSPHRASE": self.passphrase,
         }
         if type_ == "post":
+            await self.rate_limiter.acquire()
             async with getattr(self.session, type_)(
                 base_endpoint + url, headers=header, data=json.dumps(params)
             ) as response:
                 result = await response.text()
+                self.rate_limiter.check_status(response.status)
         elif type_ == "get":
+            await self.rate_limiter.acquire()
             async with getattr(self.session, type_)(base_endpoint + url, headers=header) as response:
                 result = await response.text()
+                self.rate_limiter.check_status(response.status)
         return json.loads(result)
 
     async def private_get(self, url: str, params: dict = {}, base_endpoint: str = None) -> dict:
@@ -6,6 +6,7 @@ import json
 from uuid import uuid4
 from njit_funcs import calc_diff
 from passivbot import Bot, logging
+from rate_limiter import RateLimiter
 from procedures import print_async_exception, utc_ms, make_get_filepath
 from pure_funcs import determine_pos_side_ccxt, floatify, calc_hash, ts_to_date_utc
 
@@ -36,6 +37,7 @@ class BybitBot(Bot):
                 "headers": {"referer": self.broker_code} if self.broker_code else {},
             }
         )
+        self.rate_limiter = RateLimiter.for_ccxt(self.cc).attach_to_ccxt(self.cc)
 
     def init_market_type(self):
         if not self.symbol.endswith("USDT"):
@@ -201,8 +201,10 @@ class BybitBot(Bot):
 
     async def public_get(self, url: str, params: dict = {}) -> dict:
         result = None
+        await self.rate_limiter.acquire()
         async with self.session.get(self.base_endpoint + url, params=params) as response:
             result = await response.text()
+            self.rate_limiter.check_status(response.status)
         try:
             return json.loads(result)
         except Exception as e:
@@ -227,11 +229,15 @@ class BybitBot(Bot):
         ).hexdigest()
         result = None
         if json_:
+            await self.rate_limiter.acquire()
             async with getattr(self.session, type_)(base_endpoint + url, json=params) as response:
                 result = await response.text()
+                self.rate_limiter.check_status(response.status)
         else:
+            await self.rate_limiter.acquire()
             async with getattr(self.session, type_)(base_endpoint + url, params=params) as response:
                 result = await response.text()
+                self.rate_limiter.check_status(response.status)
         try:
             return json.loads(result)
         except Exception as e:
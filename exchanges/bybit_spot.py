@@ -51,8 +51,10 @@ class BybitBotSpot(Bot):
     async def public_get(self, url: str, params=None) -> dict:
         if params is None:
             params = {}
+        await self.rate_limiter.acquire()
         async with self.session.get(self.base_endpoint + url, params=params) as response:
             result = await response.text()
+            self.rate_limiter.check_status(response.status)
         return json.loads(result)
 
     async def private_(
@@ -78,11 +80,15 @@ class BybitBotSpot(Bot):
             hashlib.sha256,
         ).hexdigest()
         if json_:
+            await self.rate_limiter.acquire()
             async with getattr(self.session, type_)(base_endpoint + url, json=params) as response:
                 result = await response.text()
+                self.rate_limiter.check_status(response.status)
         else:
+            await self.rate_limiter.acquire()
             async with getattr(self.session, type_)(base_endpoint + url, params=params) as response:
                 result = await response.text()
+                self.rate_limiter.check_status(response.status)
         result_dict = json.loads(result)
         return result_dict
 
@@ -159,8 +159,10 @@ class KuCoinBot(Bot):
     async def public_get(self, url: str, params=None) -> dict:
         if params is None:
             params = {}
+        await self.rate_limiter.acquire()
         async with self.session.get(self.base_endpoint + url, params=params) as response:
             result = await response.text()
+            self.rate_limiter.check_status(response.status)
         return json.loads(result)
 
     async def private_(
@@ -209,16 +211,20 @@ class KuCoinBot(Bot):
         }
 
         if "get" in type_ or "delete" in type_:
+            await self.rate_limiter.acquire()
             async with getattr(self.session, type_)(base_endpoint + url, headers=headers) as response:
                 result = await response.text()
+                self.rate_limiter.check_status(response.status)
                 return json.loads(result)
 
         elif "post" in type_ and data_json:
             headers["Content-Type"] = "application/json"
+            await self.rate_limiter.acquire()
             async with getattr(self.session, type_)(
                 base_endpoint + url, headers=headers, data=data_json
             ) as response:
                 result = await response.text()
+                self.rate_limiter.check_status(response.status)
                 return json.loads(result)
 
     async def private_get(self, url: str, params=None, base_endpoint: str = None) -> dict:
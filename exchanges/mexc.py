@@ -8,6 +8,7 @@ import ccxt.async_support as ccxt
 import uuid
 
 from passivbot import Bot, logging
+from rate_limiter import RateLimiter
 from procedures import print_, print_async_exception
 from pure_funcs import ts_to_date, sort_dict_keys, format_float, shorten_custom_id
 from njit_funcs import calc_diff
@@ -21,6 +22,7 @@ class MEXCBot(Bot):
         self.max_n_cancellations_per_batch = 20
         super().__init__(config)
         self.mexc = getattr(ccxt, "mexc3")({"apiKey": self.key, "secret": self.secret})
+        self.rate_limiter = RateLimiter.for_ccxt(self.mexc).attach_to_ccxt(self.mexc)
 
     async def init_market_type(self):
         self.markets = None
@@ -20,6 +20,7 @@ assert (
 import uuid
 
 from passivbot import Bot, logging
+from rate_limiter import RateLimiter
 from procedures import print_, print_async_exception
 from pure_funcs import ts_to_date, sort_dict_keys, format_float, shorten_custom_id
 
@@ -34,6 +35,7 @@ class OKXBot(Bot):
         self.okx = getattr(ccxt, "okx")(
             {"apiKey": self.key, "secret": self.secret, "password": self.passphrase}
         )
+        self.rate_limiter = RateLimiter.for_ccxt(self.okx).attach_to_ccxt(self.okx)
         self.custom_id_max_length = 32
 
     async def init_market_type(self):
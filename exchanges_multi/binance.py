@@ -30,6 +30,8 @@ class BinanceBot(Passivbot):
         )
         self.max_n_cancellations_per_batch = 10
         self.max_n_creations_per_batch = 5
+        self.batch_size_cancellations = 10
+        self.batch_size_creations = 5
 
     async def init_bot(self):
         await self.init_symbols()
@@ -309,13 +311,23 @@ class BinanceBot(Passivbot):
             return {}
 
     async def execute_cancellations(self, orders: [dict]) -> [dict]:
-        if len(orders) == 0:
-            return []
-        if len(orders) == 1:
-            return [await self.execute_cancellation(orders[0])]
-        return await self.execute_multiple(
-            orders, "execute_cancellation", self.max_n_cancellations_per_batch
+        return await self.execute_batched(
+            orders,
+            "execute_cancellation",
+            self.max_n_cancellations_per_batch,
+            self.batch_size_cancellations,
+        )
+
+    async def execute_cancellation_batch(self, orders: [dict]) -> [dict]:
+        # binance batch cancel requires all orders to be of the same symbol
+        executed = await self.cca.cancel_orders(
+            [order["id"] for order in orders], symbol=orders[0]["symbol"]
         )
+        for elm in executed:
+            if elm.get("id") and "positionSide" in elm["info"]:
+                elm["position_side"] = elm["info"]["positionSide"].lower()
+                elm["qty"] = elm["amount"]
+        return self.map_batch_results(orders, executed, "id", "id")
 
     async def execute_order(self, order: dict) -> dict:
         executed = None
@@ -350,12 +362,18 @@ class BinanceBot(Passivbot):
             return {}
 
     async def execute_orders(self, orders: [dict]) -> [dict]:
-        if len(orders) == 0:
-            return []
-        if len(orders) == 1:
-            return [await self.execute_order(orders[0])]
+        return await self.execute_batched(
+            orders,
+            "execute_order",
+            self.max_n_creations_per_batch,
+            self.batch_size_creations,
+            group_by_symbol=False,
+        )
+
+    async def execute_order_batch(self, orders: [dict]) -> [dict]:
+        # binance batch create accepts orders of different symbols
         to_execute = []
-        for order in orders[: self.max_n_creations_per_batch]:
+        for order in orders:
             to_execute.append(
                 {
                     "type": "limit",
@@ -370,27 +388,20 @@ class BinanceBot(Passivbot):
                     },
                 }
             )
-        executed = None
-        try:
-            executed = await self.cca.create_orders(to_execute)
-            for i in range(len(executed)):
-                if (
-                    "info" in executed[i]
-                    and "code" in executed[i]["info"]
-                    and executed[i]["info"]["code"] == "-5022"
-                ):
-                    logging.info(f"{executed[i]['info']['msg']}")
-                    executed[i] = {}
-                elif "status" in executed[i] and executed[i]["status"] == "open":
-                    executed[i]["position_side"] = executed[i]["info"]["positionSide"].lower()
-                    executed[i]["qty"] = executed[i]["amount"]
-                    executed[i]["reduce_only"] = executed[i]["reduceOnly"]
-            return executed
-        except Exception as e:
-            logging.error(f"error executing orders {orders} {e}")
-            print_async_exception(executed)
-            traceback.print_exc()
-            return {}
+        executed = await self.cca.create_orders(to_execute)
+        for i in range(len(executed)):
+            if (
+                "info" in executed[i]
+                and "code" in executed[i]["info"]
+                and executed[i]["info"]["code"] == "-5022"
+            ):
+                logging.info(f"{executed[i]['info']['msg']}")
+                executed[i] = {}
+            elif "status" in executed[i] and executed[i]["status"] == "open":
+                executed[i]["position_side"] = executed[i]["info"]["positionSide"].lower()
+                executed[i]["qty"] = executed[i]["amount"]
+                executed[i]["reduce_only"] = executed[i]["reduceOnly"]
+        return self.map_batch_results(orders, executed, "custom_id", "clientOrderId")
 
     async def update_exchange_config(self):
         try:
@@ -401,6 +412,7 @@ class BinanceBot(Passivbot):
                 logging.info(f"hedge mode: {e}")
             else:
                 logging.error(f"error setting hedge mode {e}")
+                self.on_exchange_config_error()
 
         coros_to_call_lev, coros_to_call_margin_mode = {}, {}
         for symbol in self.symbols:
@@ -410,12 +422,14 @@ class BinanceBot(Passivbot):
                 )
             except Exception as e:
                 logging.error(f"{symbol}: error setting cross mode {e}")
+                self.on_exchange_config_error(symbol)
             try:
                 coros_to_call_lev[symbol] = asyncio.create_task(
                     self.cca.set_leverage(int(self.live_configs[symbol]["leverage"]), symbol=symbol)
                 )
             except Exception as e:
                 logging.error(f"{symbol}: a error setting leverage {e}")
+                self.on_exchange_config_error(symbol)
         for symbol in self.symbols:
             res = None
             to_print = ""
@@ -424,10 +438,12 @@ class BinanceBot(Passivbot):
                 to_print += f"set leverage {res} "
             except Exception as e:
                 logging.error(f"{symbol}: b error setting leverage {e}")
+                self.on_exchange_config_error(symbol)
             try:
                 res = await coros_to_call_margin_mode[symbol]
                 to_print += f"set cross mode {res}"
             except:
                 logging.error(f"error setting cross mode {res}")
+                self.on_exchange_config_error(symbol)
             if to_print:
                 logging.info(f"{symbol}: {to_print}")
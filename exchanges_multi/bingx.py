@@ -342,6 +342,7 @@ class BingXBot(Passivbot):
                 )
             except Exception as e:
                 logging.error(f"{symbol}: error setting cross mode {e}")
+                self.on_exchange_config_error(symbol)
             try:
                 coros_to_call_lev[symbol] = asyncio.create_task(
                     self.cca.set_leverage(
@@ -352,6 +353,7 @@ class BingXBot(Passivbot):
                 )
             except Exception as e:
                 logging.error(f"{symbol}: a error setting leverage long {e}")
+                self.on_exchange_config_error(symbol)
             try:
                 coros_to_call_lev[symbol] = asyncio.create_task(
                     self.cca.set_leverage(
@@ -362,6 +364,7 @@ class BingXBot(Passivbot):
                 )
             except Exception as e:
                 logging.error(f"{symbol}: a error setting leverage short {e}")
+                self.on_exchange_config_error(symbol)
         for symbol in self.symbols:
             res = None
             to_print = ""
@@ -373,6 +376,7 @@ class BingXBot(Passivbot):
                     to_print += f" leverage: {e}"
                 else:
                     logging.error(f"{symbol} error setting leverage {e}")
+                    self.on_exchange_config_error(symbol)
             try:
                 res = await coros_to_call_margin_mode[symbol]
                 to_print += f"set cross mode {res}"
@@ -381,5 +385,6 @@ class BingXBot(Passivbot):
                     to_print += f" set cross mode: {res} {e}"
                 else:
                     logging.error(f"{symbol} error setting cross mode {res} {e}")
+                    self.on_exchange_config_error(symbol)
             if to_print:
                 logging.info(f"{symbol}: {to_print}")
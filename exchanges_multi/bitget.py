@@ -38,6 +38,8 @@ class BitgetBot(Passivbot):
         self.cca.options["defaultType"] = "swap"
         self.max_n_cancellations_per_batch = 10
         self.max_n_creations_per_batch = 5
+        self.batch_size_cancellations = 10
+        self.batch_size_creations = 5
         self.order_side_map = {
             "buy": {"long": "open_long", "short": "close_short"},
             "sell": {"long": "close_long", "short": "open_short"},
@@ -301,10 +303,28 @@ class BitgetBot(Passivbot):
                 orders = (reduce_only_orders + rest)[: self.max_n_cancellations_per_batch]
             except Exception as e:
                 logging.error(f"debug filter cancellations {e}")
-        return await self.execute_multiple(
-            orders, "execute_cancellation", self.max_n_cancellations_per_batch
+        return await self.execute_batched(
+            orders,
+            "execute_cancellation",
+            self.max_n_cancellations_per_batch,
+            self.batch_size_cancellations,
         )
 
+    async def execute_cancellation_batch(self, orders: [dict]) -> [dict]:
+        # bitget batch cancel requires all orders to be of the same symbol
+        executed = await self.cca.cancel_orders(
+            [order["id"] for order in orders], symbol=orders[0]["symbol"]
+        )
+        data = executed["data"] if "data" in executed else {}
+        cancelled_ids = set(data["order_ids"] if "order_ids" in data else [])
+        for elm in data["fail_infos"] if "fail_infos" in data else []:
+            cancelled_ids.discard(elm["order_id"])
+        cancelled = [
+            {"id": order["id"] if order["id"] in cancelled_ids else "", "info": data}
+            for order in orders
+        ]
+        return self.map_batch_results(orders, cancelled, "id", "id")
+
     async def execute_order(self, order: dict) -> dict:
         executed = None
         try:
@@ -333,7 +353,35 @@ class BitgetBot(Passivbot):
             return {}
 
     async def execute_orders(self, orders: [dict]) -> [dict]:
-        return await self.execute_multiple(orders, "execute_order", self.max_n_creations_per_batch)
+        return await self.execute_batched(
+            orders, "execute_order", self.max_n_creations_per_batch, self.batch_size_creations
+        )
+
+    async def execute_order_batch(self, orders: [dict]) -> [dict]:
+        # bitget batch create requires all orders to be of the same symbol
+        executed = await self.cca.create_orders(
+            [
+                {
+                    "type": "limit",
+                    "symbol": order["symbol"],
+                    "side": order["side"],
+                    "amount": abs(order["qty"]),
+                    "price": order["price"],
+                    "params": {
+                        "reduceOnly": order["reduce_only"],
+                        "timeInForceValue": "post_only",
+                        "side": self.order_side_map[order["side"]][order["position_side"]],
+                        "clientOid": order["custom_id"],
+                    },
+                }
+                for order in orders
+            ]
+        )
+        for elm in executed:
+            # failed orders are returned after the successful ones, with an error message
+            if "errorMsg" in elm["info"]:
+                elm["status"] = "rejected"
+        return self.map_batch_results(orders, executed, "custom_id", "clientOrderId")
 
     async def update_exchange_config(self):
         pass
@@ -30,6 +30,8 @@ class BybitBot(Passivbot):
         )
         self.max_n_cancellations_per_batch = 20
         self.max_n_creations_per_batch = 12
+        self.batch_size_cancellations = 10
+        self.batch_size_creations = 10
 
     async def init_bot(self):
         await self.init_symbols()
@@ -332,10 +334,34 @@ class BybitBot(Passivbot):
                 orders = (reduce_only_orders + rest)[: self.max_n_cancellations_per_batch]
             except Exception as e:
                 logging.error(f"debug filter cancellations {e}")
-        return await self.execute_multiple(
-            orders, "execute_cancellation", self.max_n_cancellations_per_batch
+        return await self.execute_batched(
+            orders,
+            "execute_cancellation",
+            self.max_n_cancellations_per_batch,
+            self.batch_size_cancellations,
+            group_by_symbol=False,
         )
 
+    async def execute_cancellation_batch(self, orders: [dict]) -> [dict]:
+        # bybit batch cancel accepts orders of different symbols
+        executed = await self.cca.private_post_v5_order_cancel_batch(
+            {
+                "category": "linear",
+                "request": [
+                    {"symbol": self.symbol_ids[order["symbol"]], "orderId": order["id"]}
+                    for order in orders
+                ],
+            }
+        )
+        codes = executed["retExtInfo"]["list"] if executed.get("retExtInfo") else []
+        cancelled = []
+        for i, elm in enumerate(executed["result"]["list"]):
+            failed = i < len(codes) and int(codes[i]["code"]) != 0
+            cancelled.append(
+                {"id": "" if failed else elm["orderId"], "info": codes[i] if failed else elm}
+            )
+        return self.map_batch_results(orders, cancelled, "id", "id")
+
     async def execute_order(self, order: dict) -> dict:
         executed = None
         try:
@@ -363,7 +389,34 @@ class BybitBot(Passivbot):
             return {}
 
     async def execute_orders(self, orders: [dict]) -> [dict]:
-        return await self.execute_multiple(orders, "execute_order", self.max_n_creations_per_batch)
+        return await self.execute_batched(
+            orders,
+            "execute_order",
+            self.max_n_creations_per_batch,
+            self.batch_size_creations,
+            group_by_symbol=False,
+        )
+
+    async def execute_order_batch(self, orders: [dict]) -> [dict]:
+        # bybit batch create accepts orders of different symbols
+        executed = await self.cca.create_orders(
+            [
+                {
+                    "type": "limit",
+                    "symbol": order["symbol"],
+                    "side": order["side"],
+                    "amount": abs(order["qty"]),
+                    "price": order["price"],
+                    "params": {
+                        "positionIdx": 1 if order["position_side"] == "long" else 2,
+                        "timeInForce": "postOnly",
+                        "orderLinkId": order["custom_id"],
+                    },
+                }
+                for order in orders
+            ]
+        )
+        return self.map_batch_results(orders, executed, "custom_id", "clientOrderId")
 
     async def update_exchange_config(self):
         try:
@@ -371,6 +424,7 @@ class BybitBot(Passivbot):
             logging.info(f"set hedge mode {res}")
         except Exception as e:
             logging.error(f"error setting hedge mode {e}")
+            self.on_exchange_config_error()
 
         coros_to_call_lev, coros_to_call_margin_mode = {}, {}
         for symbol in self.symbols:
@@ -384,12 +438,14 @@ class BybitBot(Passivbot):
                 )
             except Exception as e:
                 logging.error(f"{symbol}: error setting cross mode {e}")
+                self.on_exchange_config_error(symbol)
             try:
                 coros_to_call_lev[symbol] = asyncio.create_task(
                     self.cca.set_leverage(int(self.live_configs[symbol]["leverage"]), symbol=symbol)
                 )
             except Exception as e:
                 logging.error(f"{symbol}: a error setting leverage {e}")
+                self.on_exchange_config_error(symbol)
         for symbol in self.symbols:
             res = None
             to_print = ""
@@ -401,6 +457,7 @@ class BybitBot(Passivbot):
                     to_print += f" leverage: {e}"
                 else:
                     logging.error(f"{symbol} error setting leverage {e}")
+                    self.on_exchange_config_error(symbol)
             try:
                 res = await coros_to_call_margin_mode[symbol]
                 to_print += f"set cross mode {res}"
@@ -409,5 +466,6 @@ class BybitBot(Passivbot):
                     to_print += f" set cross mode: {res} {e}"
                 else:
                     logging.error(f"{symbol} error setting cross mode {res} {e}")
+                    self.on_exchange_config_error(symbol)
             if to_print:
                 logging.info(f"{symbol}: {to_print}")
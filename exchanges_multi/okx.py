@@ -39,6 +39,8 @@ class OKXBot(Passivbot):
         self.cca.options["defaultType"] = "swap"
         self.max_n_cancellations_per_batch = 20
         self.max_n_creations_per_batch = 10
+        self.batch_size_cancellations = 20
+        self.batch_size_creations = 20
         self.order_side_map = {
             "buy": {"long": "open_long", "short": "close_short"},
             "sell": {"long": "close_long", "short": "open_short"},
@@ -280,19 +282,44 @@ class OKXBot(Passivbot):
                 orders = (reduce_only_orders + rest)[: self.max_n_cancellations_per_batch]
             except Exception as e:
                 logging.error(f"debug filter cancellations {e}")
-        return await self.execute_multiple(
-            orders, "execute_cancellation", self.max_n_cancellations_per_batch
+        return await self.execute_batched(
+            orders,
+            "execute_cancellation",
+            self.max_n_cancellations_per_batch,
+            self.batch_size_cancellations,
         )
 
+    async def execute_cancellation_batch(self, orders: [dict]) -> [dict]:
+        # okx batch cancel via ccxt requires all orders to be of the same symbol
+        executed = await self.cca.cancel_orders(
+            [order["id"] for order in orders], symbol=orders[0]["symbol"]
+        )
+        return self.map_batch_results(orders, executed, "id", "id")
+
     async def execute_order(self, order: dict) -> dict:
-        return self.execute_orders([order])
+        executed = None
+        try:
+            executed = await self.execute_order_batch([order])
+            return executed[0] if executed else {}
+        except Exception as e:
+            logging.error(f"error executing order {order} {e}")
+            print_async_exception(executed)
+            traceback.print_exc()
+            return {}
 
     async def execute_orders(self, orders: [dict]) -> [dict]:
-        if len(orders) == 0:
-            return []
+        return await self.execute_batched(
+            orders,
+            "execute_order",
+            self.max_n_creations_per_batch,
+            self.batch_size_creations,
+            group_by_symbol=False,
+        )
+
+    async def execute_order_batch(self, orders: [dict]) -> [dict]:
+        # okx batch create accepts orders of different symbols
         to_execute = []
-        custom_ids_map = {}
-        for order in orders[: self.max_n_creations_per_batch]:
+        for order in orders:
             to_execute.append(
                 {
                     "type": "limit",
@@ -309,29 +336,8 @@ class OKXBot(Passivbot):
                     },
                 }
             )
-            custom_ids_map[to_execute[-1]["params"]["clOrdId"]] = {**to_execute[-1], **order}
-        executed = None
-        try:
-            executed = await self.cca.create_orders(to_execute)
-        except Exception as e:
-            logging.error(f"error executing orders {orders} {e}")
-            print_async_exception(executed)
-            traceback.print_exc()
-            return []
-
-        to_return = []
-        for res in executed:
-            try:
-                if "status" in res and res["status"] == "rejected":
-                    logging.info(f"order rejected: {res} {custom_ids_map[res['clientOrderId']]}")
-                elif "clientOrderId" in res and res["clientOrderId"] in custom_ids_map:
-                    for key in ["side", "position_side", "qty", "price", "symbol", "reduce_only"]:
-                        res[key] = custom_ids_map[res["clientOrderId"]][key]
-                    to_return.append(res)
-            except Exception as e:
-                logging.error(f"error executing order {res} {e}")
-                traceback.print_exc()
-        return to_return
+        executed = await self.cca.create_orders(to_execute)
+        return self.map_batch_results(orders, executed, "custom_id", "clientOrderId")
 
     async def update_exchange_config(self):
         try:
@@ -342,6 +348,7 @@ class OKXBot(Passivbot):
                 logging.info(f"margin mode: {e}")
             else:
                 logging.error(f"error setting hedge mode {e}")
+                self.on_exchange_config_error()
 
         coros_to_call_margin_mode = {}
         for symbol in self.symbols:
@@ -355,6 +362,7 @@ class OKXBot(Passivbot):
                 )
             except Exception as e:
                 logging.error(f"{symbol}: error setting cross mode and leverage {e}")
+                self.on_exchange_config_error(symbol)
         for symbol in self.symbols:
             res = None
             to_print = ""
@@ -366,6 +374,7 @@ class OKXBot(Passivbot):
                     to_print += f" cross mode and leverage: {res} {e}"
                 else:
                     logging.error(f"{symbol} error setting cross mode {res} {e}")
+                    self.on_exchange_config_error(symbol)
             if to_print:
                 logging.info(f"{symbol}: {to_print}")
 
@@ -24,6 +24,7 @@ from procedures import (
     utc_ms,
     make_get_filepath,
     get_first_ohlcv_timestamps,
+    load_markets_cached,
 )
 from njit_funcs import calc_emas
 from pure_funcs import determine_pos_side_ccxt, date_to_ts2
@@ -329,7 +330,7 @@ async def get_current_symbols(cc):
 
 async def get_min_costs_and_contract_multipliers(cc):
     exchange = cc.id
-    info = await cc.load_markets()
+    info = await load_markets_cached(cc)
 
     # tickers format is {"COIN/USDT:USDT": {"last": float, ...}, ...}
     if exchange == "kucoinfutures":
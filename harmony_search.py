@@ -4,6 +4,7 @@ os.environ["NOJIT"] = "false"
 
 import argparse
 import asyncio
+import heapq
 import json
 import numpy as np
 import traceback
@@ -32,6 +33,7 @@ from procedures import (
     prepare_backtest_config,
     dump_live_config,
     utc_ms,
+    join_cache_refreshes,
 )
 from time import sleep, time
 import logging
@@ -53,6 +55,7 @@ class HarmonySearch:
         self.pitch_adjusting_rate = config["pitch_adjusting_rate"]
         self.iters = config["iters"]
         self.n_cpus = config["n_cpus"]
+        join_cache_refreshes()  # no refresh thread running while forking
         self.pool = Pool(processes=config["n_cpus"])
         self.long_bounds = sort_dict_keys(config[f"bounds_{self.config['passivbot_mode']}"]["long"])
         self.short_bounds = sort_dict_keys(config[f"bounds_{self.config['passivbot_mode']}"]["short"])
@@ -93,6 +96,15 @@ class HarmonySearch:
 
         # hm = {hm_key: str: {'long': {'score': float, 'config': dict}, 'short': {...}}}
         self.hm = {}
+        # position of hm_key in hm, used as tie breaker
+        self.hm_positions = {}
+        # per side heaps of (score, position, hm_key) for best and of (-score, -position, hm_key)
+        # for worst harmony; entries whose score no longer matches hm are stale and skipped
+        self.hm_heaps = {side: {"best": [], "worst": []} for side in ["long", "short"]}
+        # hm snapshots are written at most once per interval
+        self.hm_dump_interval = config.get("hm_dump_interval_seconds", 10.0)
+        self.hm_dumped_at = 0.0
+        self.hm_dirty_config_no = None
 
         # {identifier: {'config': dict,
         #               'single_results': {symbol_finished: single_backtest_result},
@@ -122,79 +134,29 @@ class HarmonySearch:
             )
             # check whether initial eval or new harmony
             if "initial_eval_key" in cfg:
-                self.hm[cfg["initial_eval_key"]]["long"]["score"] = scores["long"]
-                self.hm[cfg["initial_eval_key"]]["short"]["score"] = scores["short"]
+                for side in ["long", "short"]:
+                    self.hm[cfg["initial_eval_key"]][side]["score"] = scores[side]
+                    self.push_score(cfg["initial_eval_key"], side)
             else:
                 # check if better than worst in harmony memory
-                worst_key_long = sorted(
-                    self.hm,
-                    key=lambda x: self.hm[x]["long"]["score"]
-                    if type(self.hm[x]["long"]["score"]) != str
-                    else -np.inf,
-                )[-1]
-                if (
-                    self.do_long
-                    and not isinstance(self.hm[worst_key_long]["long"]["score"], str)
-                    and scores["long"] < self.hm[worst_key_long]["long"]["score"]
-                ):
-                    self.hm[worst_key_long]["long"] = {
-                        "config": deepcopy(cfg["long"]),
-                        "score": scores["long"],
-                    }
-                    json.dump(
-                        self.hm,
-                        open(f"{self.results_fpath}hm_{cfg['config_no']:06}.json", "w"),
-                        indent=4,
-                        sort_keys=True,
-                    )
-                worst_key_short = sorted(
-                    self.hm,
-                    key=lambda x: self.hm[x]["short"]["score"]
-                    if type(self.hm[x]["short"]["score"]) != str
-                    else -np.inf,
-                )[-1]
-                if (
-                    self.do_short
-                    and not isinstance(self.hm[worst_key_short]["short"]["score"], str)
-                    and scores["short"] < self.hm[worst_key_short]["short"]["score"]
-                ):
-                    self.hm[worst_key_short]["short"] = {
-                        "config": deepcopy(cfg["short"]),
-                        "score": scores["short"],
-                    }
-                    json.dump(
-                        self.hm,
-                        open(f"{self.results_fpath}hm_{cfg['config_no']:06}.json", "w"),
-                        indent=4,
-                        sort_keys=True,
-                    )
-            best_key_long = sorted(
-                self.hm,
-                key=lambda x: self.hm[x]["long"]["score"]
-                if type(self.hm[x]["long"]["score"]) != str
-                else np.inf,
-            )[0]
-            best_key_short = sorted(
-                self.hm,
-                key=lambda x: self.hm[x]["short"]["score"]
-                if type(self.hm[x]["short"]["score"]) != str
-                else np.inf,
-            )[0]
-            best_config = {
-                "long": deepcopy(self.hm[best_key_long]["long"]["config"]),
-                "short": deepcopy(self.hm[best_key_short]["short"]["config"]),
-            }
-            best_config["result"] = {
-                "symbol": f"{len(self.symbols)}_symbols",
-                "exchange": self.config["exchange"],
-                "start_date": self.config["start_date"],
-                "end_date": self.config["end_date"],
-            }
+                for side in ["long", "short"]:
+                    worst_key = self.peek_hm_key(side, "worst")
+                    if (
+                        getattr(self, f"do_{side}")
+                        and worst_key is not None
+                        and scores[side] < self.hm[worst_key][side]["score"]
+                    ):
+                        self.hm[worst_key][side] = {"config": cfg[side], "score": scores[side]}
+                        self.push_score(worst_key, side)
+                        self.hm_dirty_config_no = cfg["config_no"]
+                self.dump_hm()
+            best_key_long = self.peek_hm_key("long", "best")
+            best_key_short = self.peek_hm_key("short", "best")
             tmp_fname = f"{self.results_fpath}{cfg['config_no']:06}_best_config"
             is_better = False
             if (
                 self.do_long
-                and not isinstance(self.hm[best_key_long]["long"]["score"], str)
+                and best_key_long is not None
                 and scores["long"] <= self.hm[best_key_long]["long"]["score"]
             ):
                 is_better = True
@@ -211,7 +173,7 @@ class HarmonySearch:
                 )
             if (
                 self.do_short
-                and not isinstance(self.hm[best_key_short]["short"]["score"], str)
+                and best_key_short is not None
                 and scores["short"] <= self.hm[best_key_short]["short"]["score"]
             ):
                 is_better = True
@@ -227,6 +189,16 @@ class HarmonySearch:
                     sort_keys=True,
                 )
             if is_better:
+                best_config = {
+                    "long": deepcopy(self.hm[best_key_long]["long"]["config"]),
+                    "short": deepcopy(self.hm[best_key_short]["short"]["config"]),
+                }
+                best_config["result"] = {
+                    "symbol": f"{len(self.symbols)}_symbols",
+                    "exchange": self.config["exchange"],
+                    "start_date": self.config["start_date"],
+                    "end_date": self.config["end_date"],
+                }
                 dump_live_config(best_config, tmp_fname + ".json")
             elif cfg["config_no"] % 25 == 0:
                 logging.info(f"i{cfg['config_no']}")
@@ -241,6 +213,39 @@ class HarmonySearch:
             del self.unfinished_evals[id_key]
         self.workers[wi] = None
 
+    def push_score(self, hm_key: str, side: str):
+        score, pos = self.hm[hm_key][side]["score"], self.hm_positions[hm_key]
+        heaps = self.hm_heaps[side]
+        heapq.heappush(heaps["best"], (score, pos, hm_key))
+        heapq.heappush(heaps["worst"], (-score, -pos, hm_key))
+        if len(heaps["best"]) > 4 * len(self.hm):
+            # drop stale entries
+            for which, sign in [("best", 1), ("worst", -1)]:
+                heaps[which] = [
+                    elm
+                    for elm in heaps[which]
+                    if elm[0] * sign == self.hm[elm[2]][side]["score"]
+                ]
+                heapq.heapify(heaps[which])
+
+    def peek_hm_key(self, side: str, which: str):
+        """hm_key of best or worst scored harmony of side; None if no harmony is scored yet."""
+        heap = self.hm_heaps[side][which]
+        sign = 1 if which == "best" else -1
+        while heap and heap[0][0] * sign != self.hm[heap[0][2]][side]["score"]:
+            heapq.heappop(heap)
+        return heap[0][2] if heap else None
+
+    def dump_hm(self, force: bool = False):
+        if self.hm_dirty_config_no is None:
+            return
+        if not force and time() - self.hm_dumped_at < self.hm_dump_interval:
+            return
+        with open(f"{self.results_fpath}hm_{self.hm_dirty_config_no:06}.json", "w") as f:
+            json.dump(self.hm, f, indent=4, sort_keys=True)
+        self.hm_dumped_at = time()
+        self.hm_dirty_config_no = None
+
     def start_new_harmony(self, wi: int):
         self.iter_counter += 1  # up iter counter on each new config started
         template = get_template_live_config(self.config["passivbot_mode"])
@@ -353,6 +358,8 @@ class HarmonySearch:
                 "short": {"score": "not_started", "config": cfg_short},
             }
 
+        self.hm_positions = {hm_key: i for i, hm_key in enumerate(self.hm)}
+
         # add starting configs
         for side in ["long", "short"]:
             hm_keys = list(self.hm)
@@ -373,6 +380,7 @@ class HarmonySearch:
             if self.iter_counter >= self.iters + self.n_harmonies:
                 if all(worker is None for worker in self.workers):
                     # break when all work is finished
+                    self.dump_hm(force=True)
                     break
             else:
                 # check for idle workers
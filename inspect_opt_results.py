@@ -17,8 +17,10 @@ from pure_funcs import (
     calc_scores,
     determine_passivbot_mode,
     make_compatible,
+    SCORE_KEYS,
 )
 from njit_funcs import round_dynamic
+from results_store import ResultsStore
 
 
 def shorten(key):
@@ -61,6 +63,15 @@ def main():
         action="store_true",
         help="dump config",
     )
+    parser.add_argument(
+        "-t",
+        "--top_n",
+        dest="top_n",
+        type=int,
+        required=False,
+        default=None,
+        help="list config numbers and scores of n best configs per side",
+    )
 
     args = parser.parse_args()
 
@@ -73,45 +84,46 @@ def main():
     for k, v in minsmaxs.items():
         print(f"{k: <{klen}} {v}")
 
-    if os.path.isdir(args.results_fpath):
-        args.results_fpath = os.path.join(args.results_fpath, "all_results.txt")
-    with open(args.results_fpath) as f:
-        results = [json.loads(x) for x in f.readlines()]
-    print(f"{'n results': <{klen}} {len(results)}")
-    passivbot_mode = determine_passivbot_mode(make_compatible(results[-1]["config"]))
-    all_scores = []
-    symbols = [s for s in results[0]["results"] if s != "config_no"]
-    starting_balance = results[-1]["results"][symbols[0]]["starting_balance"]
+    store = ResultsStore(args.results_fpath)
+    store.update_index()
+    args.results_fpath = store.fpath
+    print(f"{'n results': <{klen}} {len(store)}")
+    last_result = store.fetch(len(store) - 1)
+    passivbot_mode = determine_passivbot_mode(make_compatible(last_result["config"]))
+    symbols = store.symbols
+    starting_balance = last_result["results"][symbols[0]]["starting_balance"]
     print(f"{'starting_balance': <{klen}} {starting_balance}")
     sides = ["long", "short"]
-    for r in results:
-        cfg = r["config"].copy()
-        cfg.update(opt_config)
-        ress = r["results"]
-        all_scores.append({})
-        scores_res = calc_scores(cfg, {s: r["results"][s] for s in symbols})
-        scores, individual_scores, keys = (
-            scores_res["scores"],
-            scores_res["individual_scores"],
-            scores_res["keys"],
-        )
-        keys = keys[:1] + [("adg_per_exposure", True)] + keys[1:]
+    keys = SCORE_KEYS[:1] + [("adg_per_exposure", True)] + SCORE_KEYS[1:]
+    all_scores = store.calc_scores(opt_config)
+    if args.top_n is not None:
         for side in sides:
-            all_scores[-1][side] = {
-                "config": cfg[side],
-                "score": scores[side],
-                "individual_scores": individual_scores[side],
-                "symbols_to_include": scores_res["symbols_to_include"][side],
-                "stats": {sym: {k: v for k, v in ress[sym].items() if side in k} for sym in symbols},
-                "config_no": ress["config_no"],
-                "n_days": {sym: ress[sym]["n_days"] for sym in symbols},
-            }
+            passing = store.passes_thresholds(opt_config, side)
+            print(f"{side} top {args.top_n}")
+            for idx in np.argsort(all_scores[side], kind="stable")[: args.top_n]:
+                score = round_dynamic(all_scores[side][idx], 15)
+                line = f"config_no {store.config_nos[idx]: <8} score {score}"
+                print(line + ("" if passing[idx] else " (fails thresholds)"))
     best_candidate = {}
     for side in sides:
-        scoress = sorted([sc[side] for sc in all_scores], key=lambda x: x["score"])
-        best_candidate[side] = scoress[0]
         if args.index is not None:
-            best_candidate[side] = [elm for elm in scoress if elm["config_no"] == args.index][0]
+            idx = np.where(store.config_nos == args.index)[0][0]
+        else:
+            idx = np.argmin(all_scores[side])
+        r = store.fetch(idx)
+        cfg = r["config"].copy()
+        cfg.update(opt_config)
+        ress = r["results"]
+        scores_res = calc_scores(cfg, {s: ress[s] for s in symbols})
+        best_candidate[side] = {
+            "config": cfg[side],
+            "score": scores_res["scores"][side],
+            "individual_scores": scores_res["individual_scores"][side],
+            "symbols_to_include": scores_res["symbols_to_include"][side],
+            "stats": {sym: {k: v for k, v in ress[sym].items() if side in k} for sym in symbols},
+            "config_no": ress["config_no"],
+            "n_days": {sym: ress[sym]["n_days"] for sym in symbols},
+        }
     best_config = {side: best_candidate[side]["config"] for side in sides}
     best_config = {
         "long": best_candidate["long"]["config"],
@@ -69,7 +69,10 @@ def dump_interactive_plot(
     shorts: pd.DataFrame,
     candles_interval=None,
     theme="",
+    max_n_candles=None,
 ):
+    if max_n_candles is None:
+        max_n_candles = config.get("plot_max_n_candles", 20000)
     if candles_interval is None:
         candles_interval = config.get("plot_candles_interval", datetime.timedelta(minutes=1))
     if type(candles_interval) is str:
@@ -79,9 +82,17 @@ def dump_interactive_plot(
         theme = config.get("plot_theme", pyecharts_globals.ThemeType.INFOGRAPHIC)
 
     # Creating graph
-    candlesticks = create_graphs(data, candles_interval, config["ohlcv"])
-    long_entries, long_profits, long_losses = create_positions(longs, True)
-    short_entries, short_profits, short_losses = create_positions(shorts, False)
+    candlesticks, candles_interval = create_graphs(
+        data, candles_interval, config["ohlcv"], max_n_candles
+    )
+    # fills are placed on the candle containing them
+    first_minute = data[0][0] // 60000 * 60000
+    long_entries, long_profits, long_losses = create_positions(
+        longs, True, candles_interval, first_minute
+    )
+    short_entries, short_profits, short_losses = create_positions(
+        shorts, False, candles_interval, first_minute
+    )
     scatters = [long_entries, long_profits, long_losses, short_entries, short_profits, short_losses]
 
     grid_chart = pyecharts.charts.Grid(
@@ -105,65 +116,58 @@ def dump_interactive_plot(
     grid_chart.render(config["plots_dirpath"] + "interactive_plot.html")
 
 
-def create_graphs(data, candles_interval, is_ohlcv=True):
-    # allocating candles data
-    candles_date = np.empty((len(data),), dtype=datetime.datetime)
-    candles_data = np.empty((len(data),), dtype=object)
+# candle intervals to choose from when requested interval would exceed max_n_candles
+CANDLES_INTERVALS = [
+    datetime.timedelta(minutes=x) for x in [1, 5, 15, 30, 60, 60 * 4, 60 * 12, 60 * 24, 60 * 24 * 7]
+]
+
+
+def select_candles_interval(data, candles_interval, max_n_candles):
+    span = datetime.timedelta(milliseconds=float(data[-1][0] - data[0][0]))
+    if max_n_candles is None or span / candles_interval <= max_n_candles:
+        return candles_interval
+    for interval in CANDLES_INTERVALS:
+        if interval > candles_interval and span / interval <= max_n_candles:
+            return interval
+    return CANDLES_INTERVALS[-1]
 
-    # Setting first values
-    current_date = CustomDatetime.from_timestamp(data[0][0]).get_minute_rounded()
-    candles_date[0] = current_date
+
+def create_graphs(data, candles_interval, is_ohlcv=True, max_n_candles=None):
     if is_ohlcv:  # hlc format
         if len(data[0]) < 4:
             raise IOError("Backtest ohlcv data format seems to be invalid.")
-
-        first_open = data[0][3]  # We set the first open to the first close
-        # because the actual open is not given by the data
-        first_high = data[0][1]
-        first_low = data[0][2]
-        first_close = data[0][3]
+        highs, lows, closes = data[:, 1], data[:, 2], data[:, 3]
     elif len(data[0]) >= 3:  # ticks format
         # We only have 1 price per tick
-        first_open = first_high = first_low = first_close = data[0][2]
+        highs = lows = closes = data[:, 2]
     else:
         raise IOError("Backtest data format seems to be invalid.")
+    candles_interval = select_candles_interval(data, candles_interval, max_n_candles)
+    interval_ms = candles_interval.total_seconds() * 1000
+
+    # bucket timestamps into candles, starting from first minute
+    first_minute = data[0][0] // 60000 * 60000
+    buckets = ((data[:, 0] - first_minute) // interval_ms).astype(np.int64)
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+    ends = np.append(starts[1:], len(data)) - 1
+    candles_high = np.maximum.reduceat(highs, starts)
+    candles_low = np.minimum.reduceat(lows, starts)
+    candles_close = closes[ends]
+    # open is not given by the data; use previous candle's close, first close for first candle
+    candles_open = np.append(closes[0], candles_close[:-1])
     # The graph expects the data to be in open,close,low,high format
-    candles_data[0] = [first_open, first_close, first_low, first_high]
-
-    # Creating candles
-    next_date = current_date + candles_interval
-    candles_index = 0
-
-    for data_row in data:
-        current_date = CustomDatetime.from_timestamp(data_row[0])
-
-        if is_ohlcv:
-            high = data_row[1]
-            low = data_row[2]
-            close = data_row[3]
-        else:  # ticks format
-            high = low = close = data_row[2]
-
-        if current_date >= next_date:
-            # New candle
-            current_date = current_date.get_minute_rounded()
-            next_date = current_date + candles_interval
-
-            candles_index += 1
-            candles_date[candles_index] = current_date
-            candles_data[candles_index] = [candles_data[candles_index - 1][1], close, low, high]
-
-        # Update current candle
-        candles_data[candles_index][1] = close
-        candles_data[candles_index][2] = min(candles_data[candles_index][2], low)
-        candles_data[candles_index][3] = max(candles_data[candles_index][3], high)
+    candles_data = np.stack([candles_open, candles_close, candles_low, candles_high], axis=1)
+    # same local time conversion as fill labels, with each date's dst offset
+    candles_date = CustomDatetime.strings(
+        [CustomDatetime.from_timestamp(ts) for ts in first_minute + buckets[starts] * interval_ms]
+    )
 
     candlesticks = (
         pyecharts.charts.Candlestick()
-        .add_xaxis(xaxis_data=CustomDatetime.strings(candles_date[:candles_index]))
+        .add_xaxis(xaxis_data=list(candles_date))
         .add_yaxis(
             series_name="Candlesticks",
-            y_axis=list(candles_data[:candles_index]),
+            y_axis=candles_data.tolist(),
             itemstyle_opts=opts.ItemStyleOpts(
                 color0="#ef232a",
                 color="#14b143",
@@ -199,10 +203,20 @@ def create_graphs(data, candles_interval, is_ohlcv=True):
             ],
         )
     )
-    return candlesticks
+    return candlesticks, candles_interval
+
 
+def floor_to_candles(timestamps: np.ndarray, candles_interval, first_minute) -> np.ndarray:
+    # start of candle containing each timestamp; candles are counted from first minute of data
+    interval_ms = candles_interval.total_seconds() * 1000
+    return first_minute + (timestamps - first_minute) // interval_ms * interval_ms
 
-def create_positions(fills: pd.DataFrame, long: bool):
+
+def create_positions(fills: pd.DataFrame, long: bool, candles_interval=None, first_minute=0):
+    if candles_interval is not None and len(fills) > 0:
+        fills = fills.assign(
+            timestamp=floor_to_candles(fills["timestamp"].values, candles_interval, first_minute)
+        )
     entries_timestamps = []
     entries_prices = []
     entries_we = []
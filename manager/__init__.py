@@ -85,7 +85,7 @@ class Manager:
     def find_unsynced_instances(self) -> List[Instance]:
         """Get all passivbot instances running on this machine"""
         signature = f"^{' '.join(INSTANCE_SIGNATURE_BASE)}"
-        pids = ProcessManager.get_pid(signature, all_matches=True)
+        pids = ProcessManager.get_pid(signature, all_matches=True, refresh=True)
         if len(pids) == 0:
             return []
 
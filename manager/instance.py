@@ -1,5 +1,5 @@
 from constants import INSTANCE_SIGNATURE_BASE, PASSIVBOT_PATH
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Union
 from pm import ProcessManager
 import os
 
@@ -44,9 +44,38 @@ class Instance:
         signature.extend([self.user, self.symbol])
         return f"^{' '.join(signature)}"
 
+    def get_pid_file(self) -> str:
+        return os.path.join(
+            PASSIVBOT_PATH, f"logs/{self.get_user()}/{self.get_symbol()}.pid")
+
+    def read_pid_file(self) -> Union[int, None]:
+        try:
+            with open(self.get_pid_file()) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def write_pid_file(self, pid: int):
+        try:
+            with open(self.get_pid_file(), "w") as f:
+                f.write(str(pid))
+        except OSError:
+            pass
+
+    def remove_pid_file(self):
+        try:
+            os.remove(self.get_pid_file())
+        except OSError:
+            pass
+
     def get_pid(self) -> int:
         if self.pid_ is None:
-            self.pid_ = ProcessManager.get_pid(self.get_pid_signature())
+            signature = self.get_pid_signature()
+            pid = self.read_pid_file()
+            if pid is not None and ProcessManager.is_alive(pid, signature):
+                self.pid_ = pid
+            else:
+                self.pid_ = ProcessManager.get_pid(signature)
 
         return self.pid_
 
@@ -65,8 +94,7 @@ class Instance:
 
     def is_running(self) -> bool:
         if self.is_running_ is None:
-            self.is_running_ = ProcessManager.is_running(
-                self.get_pid_signature())
+            self.is_running_ = self.get_pid() is not None
 
         return self.is_running_
 
@@ -139,6 +167,7 @@ class Instance:
         if self.proc_id is None:
             return False
 
+        self.write_pid_file(self.proc_id)
         return True
 
     def stop(self, force=False) -> bool:
@@ -146,11 +175,12 @@ class Instance:
         if not self.is_running():
             return False
 
-        pid = ProcessManager.get_pid(self.get_pid_signature())
+        pid = self.get_pid()
         if pid is None:
             return False
 
         ProcessManager.kill(pid, force)
+        self.remove_pid_file()
         return True
 
     def restart(self, force=False, silent=False) -> bool:
@@ -1,11 +1,76 @@
-from typing import List, Union
+from typing import Dict, List, Union
 from constants import USER
 from time import sleep
 import subprocess
+import re
 import os
 
 
 class ProcessManager:
+    # pid -> command line of the processes owned by USER, shared by all lookups
+    # until refreshed, so that one command scans the process table only once
+    table_: Union[Dict[int, str], None] = None
+
+    @staticmethod
+    def scan() -> Dict[int, str]:
+        """
+        Build a map of pid -> command line for all processes owned by USER.
+        Reads /proc directly if available, otherwise falls back to a single ps call.
+        :return: The process table.
+        """
+        if os.path.isdir("/proc"):
+            uid = os.getuid()
+            table = {}
+            for entry in os.listdir("/proc"):
+                if not entry.isdigit():
+                    continue
+
+                try:
+                    if os.stat(f"/proc/{entry}").st_uid != uid:
+                        continue
+
+                    with open(f"/proc/{entry}/cmdline", "rb") as f:
+                        cmdline = f.read()
+                except OSError:
+                    continue
+
+                args = cmdline.rstrip(b"\0").replace(b"\0", b" ").decode("utf-8", "replace")
+                if args:
+                    table[int(entry)] = args
+
+            return table
+
+        cmd = ["ps", "-U", USER, "-o", "pid=,args="]
+        try:
+            output = subprocess.check_output(cmd).decode("utf-8")
+        except subprocess.CalledProcessError:
+            return {}
+
+        table = {}
+        for line in output.split("\n"):
+            parts = line.strip().split(" ", 1)
+            if len(parts) == 2 and parts[0].isdigit():
+                table[int(parts[0])] = parts[1].strip()
+
+        return table
+
+    @staticmethod
+    def get_table(refresh: bool = False) -> Dict[int, str]:
+        """
+        Get the cached process table, scanning it if needed.
+        :param refresh: If True, rescan the process table.
+        :return: The process table.
+        """
+        if refresh or ProcessManager.table_ is None:
+            ProcessManager.table_ = ProcessManager.scan()
+
+        return ProcessManager.table_
+
+    @staticmethod
+    def invalidate():
+        """Drop the cached process table, the next lookup will rescan it."""
+        ProcessManager.table_ = None
+
     @staticmethod
     def add(command: List[str]) -> int:
         """
@@ -34,24 +99,19 @@ class ProcessManager:
         return ProcessManager.add(nohup_command)
 
     @staticmethod
-    def get_pid(signature: str, all_matches: bool = False) -> Union[int, None, List[int]]:
+    def get_pid(
+        signature: str, all_matches: bool = False, refresh: bool = False
+    ) -> Union[int, None, List[int]]:
         """
-        Use pgrep to get the process id of the process with the given query string.
-        :param signature: The signature to search for.
+        Get the process id of the process with the given query string.
+        Matches the signature against the full command line, like pgrep -f.
+        :param signature: The signature (regular expression) to search for.
+        :param refresh: If True, rescan the process table before matching.
         :return: The process id of the process with the given query string.
-
-        man: https://man7.org/linux/man-pages/man1/pgrep.1.html
         """
-        try:
-            cmd = ["pgrep", "-U", USER, "-f", signature]
-            pids = subprocess.check_output(cmd).decode("utf-8").strip()
-        except subprocess.CalledProcessError:
-            if all_matches:
-                return []
-
-            return None
-
-        matches = pids.split("\n")
+        pattern = re.compile(signature)
+        table = ProcessManager.get_table(refresh)
+        matches = sorted(pid for pid, args in table.items() if pattern.search(args))
         if len(matches) == 0:
             if all_matches:
                 return []
@@ -61,12 +121,23 @@ class ProcessManager:
         if all_matches:
             return [int(pid) for pid in matches]
         else:
-            return int(matches[0])
+            return matches[0]
+
+    @staticmethod
+    def is_alive(pid: int, signature: str) -> bool:
+        """
+        Check if the process with the given pid is running and matches the signature.
+        :param pid: The process id to check.
+        :param signature: The signature (regular expression) the process should match.
+        :return: True if the process is running and matches the signature.
+        """
+        args = ProcessManager.get_table().get(pid)
+        return args is not None and re.search(signature, args) is not None
 
     @staticmethod
     def wait_pid_start(signature: str, retries: int = 5, cooldown: float = 0.5) -> Union[int, None]:
         for i in range(0, retries):
-            pid = ProcessManager.get_pid(signature)
+            pid = ProcessManager.get_pid(signature, refresh=True)
             if pid is not None:
                 return pid
 
@@ -90,6 +161,10 @@ class ProcessManager:
         :param pid: The process id of the process to get the info of.
         :return: The info of the process with the given pid.
         """
+        table = ProcessManager.table_
+        if table is not None and pid in table:
+            return table[pid]
+
         cmd = ["ps", "-p", str(pid), "-o", "args="]
         try:
             return subprocess.check_output(cmd).decode("utf-8").strip()
@@ -110,6 +185,7 @@ class ProcessManager:
 
         cmd.append(str(pid))
         os.system(" ".join(cmd))
+        ProcessManager.invalidate()
         while ProcessManager.info(pid) is not None:
             sleep(0.15)
             max_retries -= 1
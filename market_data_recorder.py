@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import os
+import traceback
+
+from procedures import make_get_filepath, utc_ms
+from pure_funcs import ts_to_date_utc
+
+
+# 1m ohlcvs recorded from live websocket streams, one csv per symbol and day:
+# {RECORDED_OHLCVS_DIR}/{symbol}/{YYYY-MM-DD}.csv, same columns as downloaded ohlcvs.
+# kept apart from downloader's dirs, which treat any existing day file as complete
+RECORDED_OHLCVS_DIR = "historical_data/ohlcvs_recorded_{exchange}"
+OHLCV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+
+class MarketDataRecorder:
+    """
+    Aggregates prices from live websocket streams into 1m ohlcvs for the backtester.
+    update() is a few comparisons per event; bars of past minutes are appended to disk by flush(),
+    in a worker thread so the event loop is not blocked by file io.
+    Bars built from tickers have last price as high/low/close and zero volume.
+    """
+
+    def __init__(self, exchange: str):
+        self.dirpath = RECORDED_OHLCVS_DIR.format(exchange=exchange)
+        self.bars = {}  # {symbol: [minute, open, high, low, close, volume]}
+        self.completed = []  # [(symbol, bar)] waiting to be written
+        self.flushed_minute = 0  # events older than this arrive too late and are dropped
+        self.writing = None
+
+    def update(self, symbol: str, price: float, timestamp: float, qty: float = 0.0) -> bool:
+        """Add price event. Returns True if a minute was completed for symbol."""
+        minute = int(timestamp // 60000 * 60000)
+        bar = self.bars.get(symbol)
+        if bar is not None and minute == bar[0]:
+            if price > bar[2]:
+                bar[2] = price
+            elif price < bar[3]:
+                bar[3] = price
+            bar[4] = price
+            bar[5] += qty
+            return False
+        if minute < self.flushed_minute or (bar is not None and minute < bar[0]):
+            return False
+        self.bars[symbol] = [minute, price, price, price, price, qty]
+        if bar is not None:
+            self.completed.append((symbol, bar))
+            return True
+        return False
+
+    def update_ticks(self, symbol: str, ticks: [dict]) -> bool:
+        completed = False
+        for tick in ticks:
+            completed |= self.update(symbol, tick["price"], tick["timestamp"], tick["qty"])
+        return completed
+
+    def flush(self, now: float = None):
+        """Complete bars of past minutes and append all completed bars to disk off the event loop."""
+        now_minute = int((utc_ms() if now is None else now) // 60000 * 60000)
+        for symbol in [s for s, bar in self.bars.items() if bar[0] < now_minute]:
+            self.completed.append((symbol, self.bars.pop(symbol)))
+        self.flushed_minute = now_minute
+        if not self.completed or (self.writing is not None and not self.writing.done()):
+            # previous write still in progress; bars are kept for next flush
+            return
+        completed, self.completed = self.completed, []
+        self.writing = asyncio.get_running_loop().run_in_executor(None, self.write, completed)
+
+    def write(self, completed: [tuple]):
+        by_fpath = {}
+        for symbol, bar in completed:
+            fpath = os.path.join(self.dirpath, symbol, ts_to_date_utc(bar[0])[:10] + ".csv")
+            by_fpath.setdefault(fpath, []).append(bar)
+        for fpath, bars in by_fpath.items():
+            try:
+                is_new = not os.path.exists(fpath)
+                with open(make_get_filepath(fpath), "a") as f:
+                    if is_new:
+                        f.write(",".join(OHLCV_COLUMNS) + "\n")
+                    f.writelines(",".join(str(x) for x in bar) + "\n" for bar in sorted(bars))
+            except Exception as e:
+                logging.error(f"error recording market data to {fpath} {e}")
+                traceback.print_exc()
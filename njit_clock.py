@@ -21,6 +21,10 @@ from njit_funcs import (
     calc_delay_between_fills_ms_bid,
     calc_delay_between_fills_ms_ask,
     calc_clock_qty,
+    FILL_DTYPE,
+    STATS_DTYPE,
+    append_fill,
+    append_stats,
 )
 
 if "NOJIT" in os.environ and os.environ["NOJIT"] == "true":
@@ -352,8 +356,11 @@ def backtest_clock(
     markup_range,
     n_close_orders,
     wallet_exposure_limit,
+    ema_bands_long=None,
+    ema_bands_short=None,
 ):
     # hlc [[ts, high, low, close]] 1m
+    # ema_bands_long/short: optional precomputed [[lower, upper]] per step, see calc_ema_bands
     timestamps = hlc[:, 0]
     highs = hlc[:, 1]
     lows = hlc[:, 2]
@@ -398,7 +405,10 @@ def backtest_clock(
 
     prev_clock_fill_ts_entry_long, prev_clock_fill_ts_close_long = 0, 0
     prev_clock_fill_ts_entry_short, prev_clock_fill_ts_close_short = 0, 0
-    fills_long, fills_short, stats = [], [], []
+    fills_long = np.empty(0, dtype=FILL_DTYPE)
+    fills_short = np.empty(0, dtype=FILL_DTYPE)
+    stats = np.empty(0, dtype=STATS_DTYPE)
+    n_fills_long, n_fills_short, n_stats = 0, 0, 0
     next_stats_update = 0
     closest_bkr_long, closest_bkr_short = 1.0, 1.0
     for k in range(1, len(hlc)):
@@ -429,31 +439,36 @@ def backtest_clock(
             equity_long = balance_long + upnl_long
             equity_short = balance_short + upnl_short
 
-            stats.append(
-                (
-                    timestamps[k],
-                    bkr_price_long,
-                    bkr_price_short,
-                    psize_long,
-                    pprice_long,
-                    -psize_short,
-                    pprice_short,
-                    closes[k],
-                    closest_bkr_long,
-                    closest_bkr_short,
-                    balance_long,
-                    balance_short,
-                    equity_long,
-                    equity_short,
-                )
+            stats = append_stats(
+                stats,
+                n_stats,
+                timestamps[k],
+                bkr_price_long,
+                bkr_price_short,
+                psize_long,
+                pprice_long,
+                -psize_short,
+                pprice_short,
+                closes[k],
+                closest_bkr_long,
+                closest_bkr_short,
+                balance_long,
+                balance_short,
+                equity_long,
+                equity_short,
             )
+            n_stats += 1
             if equity_long <= 0.05:
                 do_long = False
             if equity_short <= 0.05:
                 do_short = False
             next_stats_update = min(timestamps[-1], timestamps[k] + 1000 * 60 * 60)  # hourly
         if do_long:
-            emas_long = calc_ema(alphas_long, alphas__long, emas_long, closes[k - 1])
+            if ema_bands_long is None:
+                emas_long = calc_ema(alphas_long, alphas__long, emas_long, closes[k - 1])
+            else:
+                # order calcs only use min and max of the emas
+                emas_long = ema_bands_long[k].astype(np.float64)
             # simulate what orders were placed previous minute
             closes_long = [(0.0, np.inf, "")]
             if psize_long != 0.0:
@@ -581,21 +596,22 @@ def backtest_clock(
                         * maker_fee
                     )
                     balance_long += fee_paid
-                    fills_long.append(
-                        (
-                            k,
-                            timestamps[k],
-                            pnl,
-                            fee_paid,
-                            balance_long,
-                            equity_long,
-                            clock_entry_long[0],
-                            clock_entry_long[1],
-                            psize_long,
-                            pprice_long,
-                            "clock_entry_long",
-                        )
+                    fills_long = append_fill(
+                        fills_long,
+                        n_fills_long,
+                        k,
+                        timestamps[k],
+                        pnl,
+                        fee_paid,
+                        balance_long,
+                        equity_long,
+                        clock_entry_long[0],
+                        clock_entry_long[1],
+                        psize_long,
+                        pprice_long,
+                        "clock_entry_long",
                     )
+                    n_fills_long += 1
             while closes_long:
                 if closes_long[0][0] != 0.0 and highs[k] > closes_long[0][1]:
                     # close long pos
@@ -613,24 +629,29 @@ def backtest_clock(
                         prev_clock_fill_ts_entry_long = 0
                     upnl = calc_pnl_long(pprice_long, closes[k], psize_long, inverse, c_mult)
                     equity_long = balance_long + upnl
-                    fills_long.append(
-                        (
-                            k,
-                            timestamps[k],
-                            pnl,
-                            fee_paid,
-                            balance_long,
-                            equity_long,
-                            -close_qty,
-                            closes_long[0][1],
-                            psize_long,
-                            pprice_long,
-                            closes_long[0][2],
-                        )
+                    fills_long = append_fill(
+                        fills_long,
+                        n_fills_long,
+                        k,
+                        timestamps[k],
+                        pnl,
+                        fee_paid,
+                        balance_long,
+                        equity_long,
+                        -close_qty,
+                        closes_long[0][1],
+                        psize_long,
+                        pprice_long,
+                        closes_long[0][2],
                     )
+                    n_fills_long += 1
                 closes_long = closes_long[1:]
         if do_short:
-            emas_short = calc_ema(alphas_short, alphas__short, emas_short, closes[k - 1])
+            if ema_bands_short is None:
+                emas_short = calc_ema(alphas_short, alphas__short, emas_short, closes[k - 1])
+            else:
+                # order calcs only use min and max of the emas
+                emas_short = ema_bands_short[k].astype(np.float64)
             closes_short = [(0.0, 0.0, "")]
             if psize_short != 0.0:
                 bid_price_short = calc_clock_price_bid(
@@ -756,21 +777,22 @@ def backtest_clock(
                         * maker_fee
                     )
                     balance_short += fee_paid
-                    fills_short.append(
-                        (
-                            k,
-                            timestamps[k],
-                            pnl,
-                            fee_paid,
-                            balance_short,
-                            equity_short,
-                            -abs(clock_entry_short[0]),
-                            clock_entry_short[1],
-                            -psize_short,
-                            pprice_short,
-                            "clock_entry_short",
-                        )
+                    fills_short = append_fill(
+                        fills_short,
+                        n_fills_short,
+                        k,
+                        timestamps[k],
+                        pnl,
+                        fee_paid,
+                        balance_short,
+                        equity_short,
+                        -abs(clock_entry_short[0]),
+                        clock_entry_short[1],
+                        -psize_short,
+                        pprice_short,
+                        "clock_entry_short",
                     )
+                    n_fills_short += 1
             while closes_short:
                 if closes_short[0][0] != 0.0 and lows[k] < closes_short[0][1]:
                     # close short pos
@@ -790,20 +812,21 @@ def backtest_clock(
                         prev_clock_fill_ts_entry_short = 0
                     upnl = calc_pnl_short(pprice_short, closes[k], psize_short, inverse, c_mult)
                     equity_short = balance_short + upnl
-                    fills_short.append(
-                        (
-                            k,
-                            timestamps[k],
-                            pnl,
-                            fee_paid,
-                            balance_short,
-                            equity_short,
-                            close_qty,
-                            closes_short[0][1],
-                            -psize_short,
-                            pprice_short,
-                            closes_short[0][2],
-                        )
+                    fills_short = append_fill(
+                        fills_short,
+                        n_fills_short,
+                        k,
+                        timestamps[k],
+                        pnl,
+                        fee_paid,
+                        balance_short,
+                        equity_short,
+                        close_qty,
+                        closes_short[0][1],
+                        -psize_short,
+                        pprice_short,
+                        closes_short[0][2],
                     )
+                    n_fills_short += 1
                 closes_short = closes_short[1:]
-    return fills_long, fills_short, stats
+    return fills_long[:n_fills_long], fills_short[:n_fills_short], stats[:n_stats]
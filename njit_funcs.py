@@ -21,6 +21,92 @@ else:
     from numba import njit
 
 
+# backtests store fill types, and calc_ideal_orders_multi order types, as indices into this table;
+# pure_funcs decodes them for analysis
+FILL_TYPES = (
+    "long_ientry",
+    "long_ientry_normal",
+    "long_ientry_partial",
+    "long_primary_rentry",
+    "long_rentry",
+    "long_unstuck_entry",
+    "long_nclose",
+    "long_panic_close",
+    "long_bankruptcy",
+    "short_ientry",
+    "short_ientry_normal",
+    "short_ientry_partial",
+    "short_primary_rentry",
+    "short_rentry",
+    "short_unstuck_entry",
+    "short_nclose",
+    "short_panic_close",
+    "short_bankruptcy",
+    "unstuck_close",
+    "unstuck_close_long",
+    "unstuck_close_short",
+    "clock_entry_long",
+    "clock_entry_short",
+    "clock_close_long",
+    "clock_close_short",
+    "panic_close_long",
+    "panic_close_short",
+)
+
+# single symbol backtest fills and stats
+FILL_DTYPE = np.dtype(
+    [
+        ("trade_id", np.int64),
+        ("timestamp", np.float64),
+        ("pnl", np.float64),
+        ("fee_paid", np.float64),
+        ("balance", np.float64),
+        ("equity", np.float64),
+        ("qty", np.float64),
+        ("price", np.float64),
+        ("psize", np.float64),
+        ("pprice", np.float64),
+        ("type", np.int64),
+    ]
+)
+STATS_DTYPE = np.dtype(
+    [
+        ("timestamp", np.float64),
+        ("bkr_price_long", np.float64),
+        ("bkr_price_short", np.float64),
+        ("psize_long", np.float64),
+        ("pprice_long", np.float64),
+        ("psize_short", np.float64),
+        ("pprice_short", np.float64),
+        ("price", np.float64),
+        ("closest_bkr_long", np.float64),
+        ("closest_bkr_short", np.float64),
+        ("balance_long", np.float64),
+        ("balance_short", np.float64),
+        ("equity_long", np.float64),
+        ("equity_short", np.float64),
+    ]
+)
+
+# multi symbol backtest fills; symbol is index into config["symbols"]
+FILL_MULTI_DTYPE = np.dtype(
+    [
+        ("minute", np.int64),
+        ("symbol", np.int64),
+        ("pnl", np.float64),
+        ("fee_paid", np.float64),
+        ("balance", np.float64),
+        ("equity", np.float64),
+        ("qty", np.float64),
+        ("price", np.float64),
+        ("psize", np.float64),
+        ("pprice", np.float64),
+        ("type", np.int64),
+        ("stuckness", np.float64),
+    ]
+)
+
+
 @njit
 def round_dynamic(n: float, d: int):
     if n == 0.0:
@@ -702,7 +788,7 @@ def calc_close_grid_backwards_long(
             break
     if psize_ > 0.0 and closes:
         closes[-1] = (round_(closes[-1][0] - psize_, qty_step), closes[-1][1], closes[-1][2])
-    return sorted(closes, key=lambda x: x[1])
+    return sort_orders_by_price(closes)
 
 
 @njit
@@ -902,7 +988,7 @@ def calc_close_grid_backwards_short(
             break
     if psize_ > 0.0 and closes:
         closes[-1] = (round_(closes[-1][0] + psize_, qty_step), closes[-1][1], closes[-1][2])
-    return sorted(closes, key=lambda x: x[1], reverse=True)
+    return sort_orders_by_price(closes, descending=True)
 
 
 @njit
@@ -1017,6 +1103,74 @@ def calc_emas_last(xs, spans):
     return emas
 
 
+@njit
+def calc_ema_bands(closes, ema_span_0, ema_span_1, spans_multiplier=1.0):
+    # [[ema_band_lower, ema_band_upper]] as seen by backtest kernels at each step,
+    # i.e. min and max of the three emas after updating with closes[k - 1]
+    spans = [ema_span_0, (ema_span_0 * ema_span_1) ** 0.5, ema_span_1]
+    spans = np.array(sorted(spans)) * spans_multiplier
+    spans = np.where(spans < 1.0, 1.0, spans)
+    alphas = 2.0 / (spans + 1.0)
+    alphas_ = 1.0 - alphas
+    emas = np.repeat(closes[0], 3)
+    bands = np.empty((len(closes), 2))
+    bands[0] = closes[0]
+    for k in range(1, len(closes)):
+        emas = calc_ema(alphas, alphas_, emas, closes[k - 1])
+        bands[k, 0] = min(emas)
+        bands[k, 1] = max(emas)
+    return bands
+
+
+@njit
+def calc_block_extrema(xs, block_size):
+    # min and max of each consecutive block of xs; last block may be partial
+    n_blocks = (len(xs) + block_size - 1) // block_size
+    block_mins = np.empty(n_blocks)
+    block_maxs = np.empty(n_blocks)
+    for b in range(n_blocks):
+        block = xs[b * block_size : min((b + 1) * block_size, len(xs))]
+        block_mins[b] = block.min()
+        block_maxs[b] = block.max()
+    return block_mins, block_maxs
+
+
+@njit
+def find_next_below(xs, block_mins, block_size, start, end, threshold):
+    # first index i in [start, end) where xs[i] < threshold, else end
+    i = start
+    while i < end:
+        if (
+            i % block_size == 0
+            and i + block_size <= end
+            and block_mins[i // block_size] >= threshold
+        ):
+            i += block_size
+            continue
+        if xs[i] < threshold:
+            return i
+        i += 1
+    return end
+
+
+@njit
+def find_next_above(xs, block_maxs, block_size, start, end, threshold):
+    # first index i in [start, end) where xs[i] > threshold, else end
+    i = start
+    while i < end:
+        if (
+            i % block_size == 0
+            and i + block_size <= end
+            and block_maxs[i // block_size] <= threshold
+        ):
+            i += block_size
+            continue
+        if xs[i] > threshold:
+            return i
+        i += 1
+    return end
+
+
 @njit
 def calc_bankruptcy_price(
     balance, psize_long, pprice_long, psize_short, pprice_short, inverse, c_mult
@@ -1396,3 +1550,95 @@ def find_entry_qty_bringing_wallet_exposure_to_target(
         )
         print()
     return evals_guesses[0][1]
+
+
+@njit
+def sort_orders_by_price(orders, descending=False):
+    """
+    Stable sort of (qty, price, type) tuples by price.
+    Same as sorted() with a key lambda, which numba compiles to a dynamic global that prevents
+    caching the calling functions.
+    """
+    prices = np.array([order[1] for order in orders])
+    idxs = np.argsort(-prices if descending else prices, kind="mergesort")
+    return [orders[i] for i in idxs]
+
+
+@njit
+def fill_type_code(fill_type: str) -> int:
+    """Index of fill_type in FILL_TYPES, -1 if unknown."""
+    for i in range(len(FILL_TYPES)):
+        if FILL_TYPES[i] == fill_type:
+            return i
+    return -1
+
+
+@njit
+def grow_buffer(buf: np.ndarray, n: int) -> np.ndarray:
+    """Returns buf if it has room for element n, else a copy of double the size."""
+    if n < len(buf):
+        return buf
+    new_buf = np.empty(max(64, len(buf) * 2), dtype=buf.dtype)
+    new_buf[:n] = buf[:n]
+    return new_buf
+
+
+@njit
+def append_fill(
+    fills, n, trade_id, timestamp, pnl, fee_paid, balance, equity, qty, price, psize, pprice, type_
+):
+    """
+    Writes fill n into fills buffer of FILL_DTYPE, growing it if full.
+    Returns the buffer, which may be a new array.
+    """
+    fills = grow_buffer(fills, n)
+    fills[n]["trade_id"] = trade_id
+    fills[n]["timestamp"] = timestamp
+    fills[n]["pnl"] = pnl
+    fills[n]["fee_paid"] = fee_paid
+    fills[n]["balance"] = balance
+    fills[n]["equity"] = equity
+    fills[n]["qty"] = qty
+    fills[n]["price"] = price
+    fills[n]["psize"] = psize
+    fills[n]["pprice"] = pprice
+    fills[n]["type"] = fill_type_code(type_)
+    return fills
+
+
+@njit
+def append_stats(
+    stats,
+    n,
+    timestamp,
+    bkr_price_long,
+    bkr_price_short,
+    psize_long,
+    pprice_long,
+    psize_short,
+    pprice_short,
+    price,
+    closest_bkr_long,
+    closest_bkr_short,
+    balance_long,
+    balance_short,
+    equity_long,
+    equity_short,
+):
+    """Writes stats row n into stats buffer of STATS_DTYPE, growing it if full."""
+    stats = grow_buffer(stats, n)
+    stats[n]["timestamp"] = timestamp
+    stats[n]["bkr_price_long"] = bkr_price_long
+    stats[n]["bkr_price_short"] = bkr_price_short
+    stats[n]["psize_long"] = psize_long
+    stats[n]["pprice_long"] = pprice_long
+    stats[n]["psize_short"] = psize_short
+    stats[n]["pprice_short"] = pprice_short
+    stats[n]["price"] = price
+    stats[n]["closest_bkr_long"] = closest_bkr_long
+    stats[n]["closest_bkr_short"] = closest_bkr_short
+    stats[n]["balance_long"] = balance_long
+    stats[n]["balance_short"] = balance_short
+    stats[n]["equity_long"] = equity_long
+    stats[n]["equity_short"] = equity_short
+    return stats
@@ -22,6 +22,10 @@ from njit_funcs import (
     find_entry_qty_bringing_wallet_exposure_to_target,
     calc_auto_unstuck_entry_long,
     calc_auto_unstuck_entry_short,
+    FILL_DTYPE,
+    STATS_DTYPE,
+    append_fill,
+    append_stats,
 )
 
 
@@ -866,7 +870,10 @@ def backtest_neat_grid(
     auto_unstuck_wallet_exposure_threshold,
     auto_unstuck_delay_minutes,
     auto_unstuck_qty_pct,
+    ema_bands_long=None,
+    ema_bands_short=None,
 ):
+    # ema_bands_long/short: optional precomputed [[lower, upper]] per step, see calc_ema_bands
     if len(ticks[0]) == 3:
         timestamps = ticks[:, 0]
         closes = ticks[:, 2]
@@ -881,7 +888,10 @@ def backtest_neat_grid(
     balance_long = balance_short = equity_long = equity_short = starting_balance
     psize_long, pprice_long, psize_short, pprice_short = 0.0, 0.0, 0.0, 0.0
 
-    fills_long, fills_short, stats = [], [], []
+    fills_long = np.empty(0, dtype=FILL_DTYPE)
+    fills_short = np.empty(0, dtype=FILL_DTYPE)
+    stats = np.empty(0, dtype=STATS_DTYPE)
+    n_fills_long, n_fills_short, n_stats = 0, 0, 0
 
     entries_long = closes_long = [(0.0, 0.0, "")]
     entries_short = closes_short = [(0.0, 0.0, "")]
@@ -931,7 +941,12 @@ def backtest_neat_grid(
 
     for k in range(1, len(closes)):
         if do_long:
-            emas_long = calc_ema(alphas_long, alphas__long, emas_long, closes[k - 1])
+            if ema_bands_long is None:
+                emas_long = calc_ema(alphas_long, alphas__long, emas_long, closes[k - 1])
+                ema_band_lower_long, ema_band_upper_long = min(emas_long), max(emas_long)
+            else:
+                ema_band_lower_long = ema_bands_long[k, 0]
+                ema_band_upper_long = ema_bands_long[k, 1]
             if k >= max_span_long:
                 # check bankruptcy
                 bkr_diff_long = calc_diff(bkr_price_long, closes[k])
@@ -944,42 +959,46 @@ def backtest_neat_grid(
                         balance_long = starting_balance * 1e-6
                         equity_long = 0.0
                         psize_long, pprice_long = 0.0, 0.0
-                        fills_long.append(
-                            (
-                                k,
-                                timestamps[k],
-                                pnl,
-                                fee_paid,
-                                balance_long,
-                                equity_long,
-                                -psize_long,
-                                closes[k],
-                                0.0,
-                                0.0,
-                                "long_bankruptcy",
-                            )
+                        fills_long = append_fill(
+                            fills_long,
+                            n_fills_long,
+                            k,
+                            timestamps[k],
+                            pnl,
+                            fee_paid,
+                            balance_long,
+                            equity_long,
+                            -psize_long,
+                            closes[k],
+                            0.0,
+                            0.0,
+                            "long_bankruptcy",
                         )
+                        n_fills_long += 1
                     do_long = False
                     if not do_short:
-                        stats.append(
-                            (
-                                next_stats_update,
-                                bkr_price_long,
-                                bkr_price_short,
-                                psize_long,
-                                pprice_long,
-                                psize_short,
-                                pprice_short,
-                                closes[k],
-                                closest_bkr_long,
-                                closest_bkr_short,
-                                balance_long,
-                                balance_short,
-                                equity_long,
-                                equity_short,
-                            )
+                        stats = append_stats(
+                            stats,
+                            n_stats,
+                            next_stats_update,
+                            bkr_price_long,
+                            bkr_price_short,
+                            psize_long,
+                            pprice_long,
+                            psize_short,
+                            pprice_short,
+                            closes[k],
+                            closest_bkr_long,
+                            closest_bkr_short,
+                            balance_long,
+                            balance_short,
+                            equity_long,
+                            equity_short,
+                        )
+                        n_stats += 1
+                        return (
+                            fills_long[:n_fills_long], fills_short[:n_fills_short], stats[:n_stats]
                         )
-                        return fills_long, fills_short, stats
 
                 # check if long entry grid should be updated
                 if timestamps[k] >= next_entry_grid_update_ts_long:
@@ -988,7 +1007,7 @@ def backtest_neat_grid(
                         psize_long,
                         pprice_long,
                         closes[k - 1],
-                        min(emas_long),
+                        ema_band_lower_long,
                         inverse,
                         do_long,
                         qty_step,
@@ -1017,7 +1036,7 @@ def backtest_neat_grid(
                         psize_long,
                         pprice_long,
                         closes[k - 1],
-                        max(emas_long),
+                        ema_band_upper_long,
                         timestamps[k - 1],
                         prev_AU_fill_ts_close_long,
                         inverse,
@@ -1061,21 +1080,22 @@ def backtest_neat_grid(
                     equity_long = balance_long + calc_pnl_long(
                         pprice_long, closes[k], psize_long, inverse, c_mult
                     )
-                    fills_long.append(
-                        (
-                            k,
-                            timestamps[k],
-                            0.0,
-                            fee_paid,
-                            balance_long,
-                            equity_long,
-                            entries_long[0][0],
-                            entries_long[0][1],
-                            psize_long,
-                            pprice_long,
-                            entries_long[0][2],
-                        )
+                    fills_long = append_fill(
+                        fills_long,
+                        n_fills_long,
+                        k,
+                        timestamps[k],
+                        0.0,
+                        fee_paid,
+                        balance_long,
+                        equity_long,
+                        entries_long[0][0],
+                        entries_long[0][1],
+                        psize_long,
+                        pprice_long,
+                        entries_long[0][2],
                     )
+                    n_fills_long += 1
                     entries_long = entries_long[1:]
                     bkr_price_long = calc_bankruptcy_price(
                         balance_long,
@@ -1126,21 +1146,22 @@ def backtest_neat_grid(
                     )
                     if "unstuck_close" in closes_long[0][2]:
                         prev_AU_fill_ts_close_long = timestamps[k]
-                    fills_long.append(
-                        (
-                            k,
-                            timestamps[k],
-                            pnl,
-                            fee_paid,
-                            balance_long,
-                            equity_long,
-                            close_qty_long,
-                            closes_long[0][1],
-                            psize_long,
-                            pprice_long,
-                            closes_long[0][2],
-                        )
+                    fills_long = append_fill(
+                        fills_long,
+                        n_fills_long,
+                        k,
+                        timestamps[k],
+                        pnl,
+                        fee_paid,
+                        balance_long,
+                        equity_long,
+                        close_qty_long,
+                        closes_long[0][1],
+                        psize_long,
+                        pprice_long,
+                        closes_long[0][2],
                     )
+                    n_fills_long += 1
                     closes_long = closes_long[1:]
                     bkr_price_long = calc_bankruptcy_price(
                         balance_long,
@@ -1179,7 +1200,12 @@ def backtest_neat_grid(
                         )
 
         if do_short:
-            emas_short = calc_ema(alphas_short, alphas__short, emas_short, closes[k - 1])
+            if ema_bands_short is None:
+                emas_short = calc_ema(alphas_short, alphas__short, emas_short, closes[k - 1])
+                ema_band_lower_short, ema_band_upper_short = min(emas_short), max(emas_short)
+            else:
+                ema_band_lower_short = ema_bands_short[k, 0]
+                ema_band_upper_short = ema_bands_short[k, 1]
             if k >= max_span_short:
                 # check bankruptcy
                 bkr_diff_short = calc_diff(bkr_price_short, closes[k])
@@ -1195,42 +1221,46 @@ def backtest_neat_grid(
                         balance_short = starting_balance * 1e-6
                         equity_short = 0.0
                         psize_short, pprice_short = 0.0, 0.0
-                        fills_short.append(
-                            (
-                                k,
-                                timestamps[k],
-                                pnl,
-                                fee_paid,
-                                balance_short,
-                                equity_short,
-                                -psize_short,
-                                closes[k],
-                                0.0,
-                                0.0,
-                                "short_bankruptcy",
-                            )
+                        fills_short = append_fill(
+                            fills_short,
+                            n_fills_short,
+                            k,
+                            timestamps[k],
+                            pnl,
+                            fee_paid,
+                            balance_short,
+                            equity_short,
+                            -psize_short,
+                            closes[k],
+                            0.0,
+                            0.0,
+                            "short_bankruptcy",
                         )
+                        n_fills_short += 1
                     do_short = False
                     if not do_long:
-                        stats.append(
-                            (
-                                next_stats_update,
-                                bkr_price_long,
-                                bkr_price_short,
-                                psize_long,
-                                pprice_long,
-                                psize_short,
-                                pprice_short,
-                                closes[k],
-                                closest_bkr_long,
-                                closest_bkr_short,
-                                balance_long,
-                                balance_short,
-                                equity_long,
-                                equity_short,
-                            )
+                        stats = append_stats(
+                            stats,
+                            n_stats,
+                            next_stats_update,
+                            bkr_price_long,
+                            bkr_price_short,
+                            psize_long,
+                            pprice_long,
+                            psize_short,
+                            pprice_short,
+                            closes[k],
+                            closest_bkr_long,
+                            closest_bkr_short,
+                            balance_long,
+                            balance_short,
+                            equity_long,
+                            equity_short,
+                        )
+                        n_stats += 1
+                        return (
+                            fills_long[:n_fills_long], fills_short[:n_fills_short], stats[:n_stats]
                         )
-                        return fills_long, fills_short, stats
 
                 # check if short entry grid should be updated
                 if timestamps[k] >= next_entry_grid_update_ts_short:
@@ -1239,7 +1269,7 @@ def backtest_neat_grid(
                         psize_short,
                         pprice_short,
                         closes[k - 1],
-                        max(emas_short),
+                        ema_band_upper_short,
                         inverse,
                         do_short,
                         qty_step,
@@ -1268,7 +1298,7 @@ def backtest_neat_grid(
                         psize_short,
                         pprice_short,
                         closes[k - 1],
-                        min(emas_short),
+                        ema_band_lower_short,
                         timestamps[k - 1],
                         prev_AU_fill_ts_close_short,
                         inverse,
@@ -1310,21 +1340,22 @@ def backtest_neat_grid(
                     equity_short = balance_short + calc_pnl_short(
                         pprice_short, closes[k], psize_short, inverse, c_mult
                     )
-                    fills_short.append(
-                        (
-                            k,
-                            timestamps[k],
-                            0.0,
-                            fee_paid,
-                            balance_short,
-                            equity_short,
-                            entries_short[0][0],
-                            entries_short[0][1],
-                            psize_short,
-                            pprice_short,
-                            entries_short[0][2],
-                        )
+                    fills_short = append_fill(
+                        fills_short,
+                        n_fills_short,
+                        k,
+                        timestamps[k],
+                        0.0,
+                        fee_paid,
+                        balance_short,
+                        equity_short,
+                        entries_short[0][0],
+                        entries_short[0][1],
+                        psize_short,
+                        pprice_short,
+                        entries_short[0][2],
                     )
+                    n_fills_short += 1
                     entries_short = entries_short[1:]
                     bkr_price_short = calc_bankruptcy_price(
                         balance_short,
@@ -1374,21 +1405,22 @@ def backtest_neat_grid(
                     )
                     if "unstuck_close" in closes_short[0][2]:
                         prev_AU_fill_ts_close_short = timestamps[k]
-                    fills_short.append(
-                        (
-                            k,
-                            timestamps[k],
-                            pnl,
-                            fee_paid,
-                            balance_short,
-                            equity_short,
-                            close_qty_short,
-                            closes_short[0][1],
-                            psize_short,
-                            pprice_short,
-                            closes_short[0][2],
-                        )
+                    fills_short = append_fill(
+                        fills_short,
+                        n_fills_short,
+                        k,
+                        timestamps[k],
+                        pnl,
+                        fee_paid,
+                        balance_short,
+                        equity_short,
+                        close_qty_short,
+                        closes_short[0][1],
+                        psize_short,
+                        pprice_short,
+                        closes_short[0][2],
                     )
+                    n_fills_short += 1
                     closes_short = closes_short[1:]
                     bkr_price_short = calc_bankruptcy_price(
                         balance_short,
@@ -1430,42 +1462,44 @@ def backtest_neat_grid(
             equity_short = balance_short + calc_pnl_short(
                 pprice_short, closes[k], psize_short, inverse, c_mult
             )
-            stats.append(
-                (
-                    timestamps[k],
-                    bkr_price_long,
-                    bkr_price_short,
-                    psize_long,
-                    pprice_long,
-                    psize_short,
-                    pprice_short,
-                    closes[k],
-                    closest_bkr_long,
-                    closest_bkr_short,
-                    balance_long,
-                    balance_short,
-                    equity_long,
-                    equity_short,
-                )
+            stats = append_stats(
+                stats,
+                n_stats,
+                timestamps[k],
+                bkr_price_long,
+                bkr_price_short,
+                psize_long,
+                pprice_long,
+                psize_short,
+                pprice_short,
+                closes[k],
+                closest_bkr_long,
+                closest_bkr_short,
+                balance_long,
+                balance_short,
+                equity_long,
+                equity_short,
             )
+            n_stats += 1
             next_stats_update = round(timestamps[k] + 60 * 60 * 1000)
 
-    stats.append(
-        (
-            next_stats_update,
-            bkr_price_long,
-            bkr_price_short,
-            psize_long,
-            pprice_long,
-            psize_short,
-            pprice_short,
-            closes[k],
-            closest_bkr_long,
-            closest_bkr_short,
-            balance_long,
-            balance_short,
-            equity_long,
-            equity_short,
-        )
+    stats = append_stats(
+        stats,
+        n_stats,
+        next_stats_update,
+        bkr_price_long,
+        bkr_price_short,
+        psize_long,
+        pprice_long,
+        psize_short,
+        pprice_short,
+        closes[k],
+        closest_bkr_long,
+        closest_bkr_short,
+        balance_long,
+        balance_short,
+        equity_long,
+        equity_short,
     )
-    return fills_long, fills_short, stats
+    n_stats += 1
+    return fills_long[:n_fills_long], fills_short[:n_fills_short], stats[:n_stats]
@@ -17,12 +17,19 @@ from njit_funcs import (
     calc_upnl,
     calc_equity,
     calc_emas_last,
+    calc_block_extrema,
+    find_next_below,
+    find_next_above,
     calc_wallet_exposure_if_filled,
     find_entry_qty_bringing_wallet_exposure_to_target,
     calc_close_grid_long,
     calc_close_grid_short,
     calc_auto_unstuck_entry_long,
     calc_auto_unstuck_entry_short,
+    FILL_DTYPE,
+    STATS_DTYPE,
+    append_fill,
+    append_stats,
 )
 
 
@@ -569,7 +576,11 @@ def backtest_recursive_grid(
     auto_unstuck_ema_dist,
     auto_unstuck_delay_minutes,
     auto_unstuck_qty_pct,
+    event_skipping=True,
+    ema_bands_long=None,
+    ema_bands_short=None,
 ):
+    # ema_bands_long/short: optional precomputed [[lower, upper]] per step, see calc_ema_bands
     if len(ticks[0]) == 3:
         timestamps = ticks[:, 0]
         closes = ticks[:, 2]
@@ -584,7 +595,10 @@ def backtest_recursive_grid(
     balance_long = balance_short = equity_long = equity_short = starting_balance
     psize_long, pprice_long, psize_short, pprice_short = 0.0, 0.0, 0.0, 0.0
 
-    fills_long, fills_short, stats = [], [], []
+    fills_long = np.empty(0, dtype=FILL_DTYPE)
+    fills_short = np.empty(0, dtype=FILL_DTYPE)
+    stats = np.empty(0, dtype=STATS_DTYPE)
+    n_fills_long, n_fills_short, n_stats = 0, 0, 0
 
     entry_long, entry_short = (0.0, 0.0, ""), (0.0, 0.0, "")
     closes_long, closes_short = [(0.0, 0.0, "")], [(0.0, 0.0, "")]
@@ -630,9 +644,22 @@ def backtest_recursive_grid(
         if auto_unstuck_wallet_exposure_threshold[1] != 0.0
         else wallet_exposure_limit[1] * 10
     )
-    for k in range(1, len(ticks)):
+    block_size = 64
+    if event_skipping:
+        lows_block_mins, _ = calc_block_extrema(lows, block_size)
+        _, highs_block_maxs = calc_block_extrema(highs, block_size)
+        _, closes_block_maxs = calc_block_extrema(closes, block_size)
+    else:
+        lows_block_mins = highs_block_maxs = closes_block_maxs = np.empty(0)
+    k = 1
+    while k < len(ticks):
         if do_long:
-            emas_long = calc_ema(alphas_long, alphas__long, emas_long, closes[k - 1])
+            if ema_bands_long is None:
+                emas_long = calc_ema(alphas_long, alphas__long, emas_long, closes[k - 1])
+                ema_band_lower_long, ema_band_upper_long = min(emas_long), max(emas_long)
+            else:
+                ema_band_lower_long = ema_bands_long[k, 0]
+                ema_band_upper_long = ema_bands_long[k, 1]
             if k >= max_span_long:
                 # check bankruptcy
                 bkr_diff_long = calc_diff(bkr_price_long, closes[k])
@@ -645,24 +672,27 @@ def backtest_recursive_grid(
                         balance_long = starting_balance * 1e-6
                         equity_long = 0.0
                         psize_long, pprice_long = 0.0, 0.0
-                        fills_long.append(
-                            (
-                                k,
-                                timestamps[k],
-                                pnl,
-                                fee_paid,
-                                balance_long,
-                                equity_long,
-                                -psize_long,
-                                closes[k],
-                                0.0,
-                                0.0,
-                                "long_bankruptcy",
-                            )
+                        fills_long = append_fill(
+                            fills_long,
+                            n_fills_long,
+                            k,
+                            timestamps[k],
+                            pnl,
+                            fee_paid,
+                            balance_long,
+                            equity_long,
+                            -psize_long,
+                            closes[k],
+                            0.0,
+                            0.0,
+                            "long_bankruptcy",
                         )
+                        n_fills_long += 1
                     do_long = False
                     if not do_short:
-                        return fills_long, fills_short, stats
+                        return (
+                            fills_long[:n_fills_long], fills_short[:n_fills_short], stats[:n_stats]
+                        )
 
                 # check if long entry order should be updated
                 if timestamps[k] >= next_entry_update_ts_long:
@@ -671,7 +701,7 @@ def backtest_recursive_grid(
                         psize_long,
                         pprice_long,
                         closes[k - 1],
-                        min(emas_long),
+                        ema_band_lower_long,
                         inverse,
                         qty_step,
                         price_step,
@@ -698,7 +728,7 @@ def backtest_recursive_grid(
                         psize_long,
                         pprice_long,
                         closes[k - 1],
-                        max(emas_long),
+                        ema_band_upper_long,
                         timestamps[k - 1],
                         prev_AU_fill_ts_close_long,
                         inverse,
@@ -738,21 +768,22 @@ def backtest_recursive_grid(
                     equity_long = balance_long + calc_pnl_long(
                         pprice_long, closes[k], psize_long, inverse, c_mult
                     )
-                    fills_long.append(
-                        (
-                            k,
-                            timestamps[k],
-                            0.0,
-                            fee_paid,
-                            balance_long,
-                            equity_long,
-                            entry_long[0],
-                            entry_long[1],
-                            psize_long,
-                            pprice_long,
-                            entry_long[2],
-                        )
+                    fills_long = append_fill(
+                        fills_long,
+                        n_fills_long,
+                        k,
+                        timestamps[k],
+                        0.0,
+                        fee_paid,
+                        balance_long,
+                        equity_long,
+                        entry_long[0],
+                        entry_long[1],
+                        psize_long,
+                        pprice_long,
+                        entry_long[2],
                     )
+                    n_fills_long += 1
                     bkr_price_long = calc_bankruptcy_price(
                         balance_long,
                         psize_long,
@@ -770,7 +801,7 @@ def backtest_recursive_grid(
                         psize_long,
                         pprice_long,
                         closes[k - 1],
-                        min(emas_long),
+                        ema_band_lower_long,
                         inverse,
                         qty_step,
                         price_step,
@@ -825,21 +856,22 @@ def backtest_recursive_grid(
                     )
                     if "unstuck_close" in closes_long[0][2]:
                         prev_AU_fill_ts_close_long = timestamps[k]
-                    fills_long.append(
-                        (
-                            k,
-                            timestamps[k],
-                            pnl,
-                            fee_paid,
-                            balance_long,
-                            equity_long,
-                            close_qty_long,
-                            closes_long[0][1],
-                            psize_long,
-                            pprice_long,
-                            closes_long[0][2],
-                        )
+                    fills_long = append_fill(
+                        fills_long,
+                        n_fills_long,
+                        k,
+                        timestamps[k],
+                        pnl,
+                        fee_paid,
+                        balance_long,
+                        equity_long,
+                        close_qty_long,
+                        closes_long[0][1],
+                        psize_long,
+                        pprice_long,
+                        closes_long[0][2],
                     )
+                    n_fills_long += 1
                     closes_long = closes_long[1:]
                     bkr_price_long = calc_bankruptcy_price(
                         balance_long,
@@ -879,7 +911,12 @@ def backtest_recursive_grid(
                         )
 
         if do_short:
-            emas_short = calc_ema(alphas_short, alphas__short, emas_short, closes[k - 1])
+            if ema_bands_short is None:
+                emas_short = calc_ema(alphas_short, alphas__short, emas_short, closes[k - 1])
+                ema_band_lower_short, ema_band_upper_short = min(emas_short), max(emas_short)
+            else:
+                ema_band_lower_short = ema_bands_short[k, 0]
+                ema_band_upper_short = ema_bands_short[k, 1]
             if k >= max_span_short:
                 # check bankruptcy
                 bkr_diff_short = calc_diff(bkr_price_short, closes[k])
@@ -895,24 +932,27 @@ def backtest_recursive_grid(
                         balance_short = starting_balance * 1e-6
                         equity_short = 0.0
                         psize_short, pprice_short = 0.0, 0.0
-                        fills_short.append(
-                            (
-                                k,
-                                timestamps[k],
-                                pnl,
-                                fee_paid,
-                                balance_short,
-                                equity_short,
-                                -psize_short,
-                                closes[k],
-                                0.0,
-                                0.0,
-                                "short_bankruptcy",
-                            )
+                        fills_short = append_fill(
+                            fills_short,
+                            n_fills_short,
+                            k,
+                            timestamps[k],
+                            pnl,
+                            fee_paid,
+                            balance_short,
+                            equity_short,
+                            -psize_short,
+                            closes[k],
+                            0.0,
+                            0.0,
+                            "short_bankruptcy",
                         )
+                        n_fills_short += 1
                     do_short = False
                     if not do_long:
-                        return fills_long, fills_short, stats
+                        return (
+                            fills_long[:n_fills_long], fills_short[:n_fills_short], stats[:n_stats]
+                        )
 
                 # check if entry order should be updated
                 if timestamps[k] >= next_entry_update_ts_short:
@@ -921,7 +961,7 @@ def backtest_recursive_grid(
                         psize_short,
                         pprice_short,
                         closes[k - 1],
-                        max(emas_short),
+                        ema_band_upper_short,
                         inverse,
                         qty_step,
                         price_step,
@@ -947,7 +987,7 @@ def backtest_recursive_grid(
                         psize_short,
                         pprice_short,
                         closes[k - 1],
-                        min(emas_short),
+                        ema_band_lower_short,
                         timestamps[k - 1],
                         prev_AU_fill_ts_close_short,
                         inverse,
@@ -989,21 +1029,22 @@ def backtest_recursive_grid(
                     equity_short = balance_short + calc_pnl_short(
                         pprice_short, closes[k], psize_short, inverse, c_mult
                     )
-                    fills_short.append(
-                        (
-                            k,
-                            timestamps[k],
-                            0.0,
-                            fee_paid,
-                            balance_short,
-                            equity_short,
-                            entry_short[0],
-                            entry_short[1],
-                            psize_short,
-                            pprice_short,
-                            entry_short[2],
-                        )
+                    fills_short = append_fill(
+                        fills_short,
+                        n_fills_short,
+                        k,
+                        timestamps[k],
+                        0.0,
+                        fee_paid,
+                        balance_short,
+                        equity_short,
+                        entry_short[0],
+                        entry_short[1],
+                        psize_short,
+                        pprice_short,
+                        entry_short[2],
                     )
+                    n_fills_short += 1
                     bkr_price_short = calc_bankruptcy_price(
                         balance_short,
                         0.0,
@@ -1021,7 +1062,7 @@ def backtest_recursive_grid(
                         psize_short,
                         pprice_short,
                         closes[k - 1],
-                        max(emas_short),
+                        ema_band_upper_short,
                         inverse,
                         qty_step,
                         price_step,
@@ -1075,21 +1116,22 @@ def backtest_recursive_grid(
                     )
                     if "unstuck_close" in closes_short[0][2]:
                         prev_AU_fill_ts_close_short = timestamps[k]
-                    fills_short.append(
-                        (
-                            k,
-                            timestamps[k],
-                            pnl,
-                            fee_paid,
-                            balance_short,
-                            equity_short,
-                            close_qty_short,
-                            closes_short[0][1],
-                            psize_short,
-                            pprice_short,
-                            closes_short[0][2],
-                        )
+                    fills_short = append_fill(
+                        fills_short,
+                        n_fills_short,
+                        k,
+                        timestamps[k],
+                        pnl,
+                        fee_paid,
+                        balance_short,
+                        equity_short,
+                        close_qty_short,
+                        closes_short[0][1],
+                        psize_short,
+                        pprice_short,
+                        closes_short[0][2],
                     )
+                    n_fills_short += 1
                     closes_short = closes_short[1:]
                     bkr_price_short = calc_bankruptcy_price(
                         balance_short,
@@ -1136,24 +1178,117 @@ def backtest_recursive_grid(
             equity_short = balance_short + calc_pnl_short(
                 pprice_short, closes[k], psize_short, inverse, c_mult
             )
-            stats.append(
-                (
-                    timestamps[k],
-                    bkr_price_long,
-                    bkr_price_short,
-                    psize_long,
-                    pprice_long,
-                    psize_short,
-                    pprice_short,
-                    closes[k],
-                    closest_bkr_long,
-                    closest_bkr_short,
-                    balance_long,
-                    balance_short,
-                    equity_long,
-                    equity_short,
-                )
+            stats = append_stats(
+                stats,
+                n_stats,
+                timestamps[k],
+                bkr_price_long,
+                bkr_price_short,
+                psize_long,
+                pprice_long,
+                psize_short,
+                pprice_short,
+                closes[k],
+                closest_bkr_long,
+                closest_bkr_short,
+                balance_long,
+                balance_short,
+                equity_long,
+                equity_short,
             )
+            n_stats += 1
             next_stats_update = timestamps[k] + 60 * 60 * 1000
 
-    return fills_long, fills_short, stats
+        k_next = k + 1
+        if (
+            event_skipping
+            and (
+                not do_long
+                or (
+                    k >= max_span_long
+                    and (
+                        psize_long == 0.0
+                        or long_wallet_exposure < long_wallet_exposure_auto_unstuck_threshold
+                    )
+                )
+            )
+            and (
+                not do_short
+                or (
+                    k >= max_span_short
+                    and (
+                        psize_short == 0.0
+                        or short_wallet_exposure < short_wallet_exposure_auto_unstuck_threshold
+                    )
+                )
+            )
+        ):
+            # orders are fixed until next refresh; find first step where one may fill,
+            # a refresh is due or stats are recorded, and jump there
+            next_event_ts = next_stats_update
+            if do_long:
+                next_event_ts = min(
+                    next_event_ts, next_entry_update_ts_long, next_close_grid_update_ts_long
+                )
+            if do_short:
+                next_event_ts = min(
+                    next_event_ts, next_entry_update_ts_short, next_close_grid_update_ts_short
+                )
+            k_event = np.searchsorted(timestamps, next_event_ts)
+            if do_long and k_event > k_next:
+                if entry_long[0] != 0.0:
+                    k_event = find_next_below(
+                        lows, lows_block_mins, block_size, k_next, k_event, entry_long[1]
+                    )
+                if psize_long > 0.0 and closes_long and closes_long[0][0] < 0.0:
+                    k_event = find_next_above(
+                        highs, highs_block_maxs, block_size, k_next, k_event, closes_long[0][1]
+                    )
+                if psize_long != 0.0:
+                    k_event = find_next_above(
+                        closes, closes_block_maxs, block_size, k_next, k_event, pprice_long
+                    )
+            if do_short and k_event > k_next:
+                if entry_short[0] != 0.0:
+                    k_event = find_next_above(
+                        highs, highs_block_maxs, block_size, k_next, k_event, entry_short[1]
+                    )
+                if psize_short < 0.0 and closes_short and closes_short[0][0] > 0.0:
+                    k_event = find_next_below(
+                        lows, lows_block_mins, block_size, k_next, k_event, closes_short[0][1]
+                    )
+                if psize_short != 0.0:
+                    k_event = find_next_above(
+                        closes, closes_block_maxs, block_size, k_next, k_event, pprice_short
+                    )
+            # steps in between only advance emas and closest bankruptcy distance,
+            # with the same float operations as the full step
+            while k_next < k_event:
+                if do_long:
+                    bkr_diff_long = calc_diff(bkr_price_long, closes[k_next])
+                    if min(closest_bkr_long, bkr_diff_long) < 0.06:
+                        break
+                if do_short:
+                    bkr_diff_short = calc_diff(bkr_price_short, closes[k_next])
+                    if min(closest_bkr_short, bkr_diff_short) < 0.06:
+                        break
+                if do_long:
+                    if ema_bands_long is None:
+                        for i in range(3):
+                            emas_long[i] = (
+                                emas_long[i] * alphas__long[i]
+                                + closes[k_next - 1] * alphas_long[i]
+                            )
+                    closest_bkr_long = min(closest_bkr_long, bkr_diff_long)
+                if do_short:
+                    if ema_bands_short is None:
+                        for i in range(3):
+                            emas_short[i] = (
+                                emas_short[i] * alphas__short[i]
+                                + closes[k_next - 1] * alphas_short[i]
+                            )
+                    closest_bkr_short = min(closest_bkr_short, bkr_diff_short)
+                k_next += 1
+        k = k_next
+
+    return fills_long[:n_fills_long], fills_short[:n_fills_short], stats[:n_stats]
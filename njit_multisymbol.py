@@ -21,6 +21,7 @@ else:
     from numba import njit
 
 from njit_funcs import (
+    FILL_MULTI_DTYPE,
     calc_ema,
     calc_new_psize_pprice,
     qty_to_cost,
@@ -31,8 +32,21 @@ from njit_funcs import (
     calc_pnl_short,
     round_,
     calc_min_entry_qty,
+    calc_diff,
+    fill_type_code,
+    grow_buffer,
 )
-from njit_funcs_recursive_grid import calc_recursive_entry_long, calc_recursive_entry_short
+from njit_funcs_recursive_grid import (
+    calc_recursive_entry_long,
+    calc_recursive_entry_short,
+    calc_recursive_entries_long,
+    calc_recursive_entries_short,
+)
+
+# live config modes; index is mode code
+LIVE_MODES = ("normal", "manual", "graceful_stop", "panic", "tp_only")
+MODE_GRACEFUL_STOP = LIVE_MODES.index("graceful_stop")
+MODE_PANIC = LIVE_MODES.index("panic")
 
 
 @njit
@@ -49,6 +63,26 @@ def calc_pnl_sum(poss_long, poss_short, market_prices, c_mults):
     return pnl_sum
 
 
+@njit
+def calc_upnls(poss_long, poss_short, market_prices, c_mults, upnls_long, upnls_short):
+    """
+    fills upnls_long and upnls_short with each position's unrealized pnl
+    returns their sum, summed in same order as calc_pnl_sum
+    """
+    pnl_sum = 0.0
+    for i in range(len(poss_long)):
+        upnls_long[i] = calc_pnl_long(
+            poss_long[i][1], market_prices[i], poss_long[i][0], False, c_mults[i]
+        )
+        pnl_sum += upnls_long[i]
+    for i in range(len(poss_short)):
+        upnls_short[i] = calc_pnl_short(
+            poss_short[i][1], market_prices[i], poss_short[i][0], False, c_mults[i]
+        )
+        pnl_sum += upnls_short[i]
+    return pnl_sum
+
+
 @njit
 def get_open_orders_long(
     close_price,
@@ -185,10 +219,267 @@ def get_open_orders_short(
     return entries, closes
 
 
+@njit
+def calc_orders_distance(price, entry, closes):
+    """
+    distance between price and nearest open order, relative to price
+    returns inf if there are no open orders
+    """
+    dist = np.inf
+    if entry[0] != 0.0:
+        dist = abs(entry[1] - price) / price
+    if closes[0][0] != 0.0:
+        dist = min(dist, abs(closes[0][1] - price) / price)
+    return dist
+
+
+@njit(cache=True)
+def calc_ideal_orders_multi(
+    balance,
+    positions,
+    bids,
+    asks,
+    lasts,
+    emas_long,
+    emas_short,
+    live_configs,
+    modes,
+    hedge_mode,
+    inverse,
+    qty_steps,
+    price_steps,
+    min_qtys,
+    min_costs,
+    c_mults,
+    unstuck_close,
+):
+    """
+    ideal open orders of all symbols in one call, used by live bot
+
+    positions: (n_symbols, 2, 2) [symbol][long, short][psize, pprice]
+    bids, asks, lasts: (n_symbols,)
+    emas_long, emas_short: (n_symbols, 3)
+    live_configs: (n_symbols, 17, 2) [symbol][config key][long, short], keys as in
+        backtest_multisymbol_recursive_grid; key 8 is enabled
+    modes: (n_symbols, 2) [symbol][long, short], codes of LIVE_MODES
+    unstuck_close: (symbol idx, pside idx, qty, price); symbol idx is -1 if no unstucking
+
+    returns symbol_idxs, qtys, prices, order types as codes of FILL_TYPES
+    orders are grouped by symbol and sorted by distance to last price
+    cached on disk, so the live bot compiles it once, not on every start
+    """
+    symbol_idxs, qtys, prices, types = [0], [0.0], [0.0], [0]
+    for i in range(len(lasts)):
+        psize_long, pprice_long = positions[i, 0, 0], positions[i, 0, 1]
+        psize_short, pprice_short = positions[i, 1, 0], positions[i, 1, 1]
+        cfg_long, cfg_short = live_configs[i, :, 0], live_configs[i, :, 1]
+        if hedge_mode:
+            do_long = cfg_long[8] != 0.0 or psize_long != 0.0
+            do_short = cfg_short[8] != 0.0 or psize_short != 0.0
+        else:
+            no_pos = psize_long == 0.0 and psize_short == 0.0
+            do_long = (no_pos and cfg_long[8] != 0.0) or psize_long != 0.0
+            do_short = (no_pos and cfg_short[8] != 0.0) or psize_short != 0.0
+        orders = [(0.0, 0.0, "")]
+        if modes[i, 0] == MODE_PANIC:
+            if psize_long != 0.0:
+                # if in panic mode, only one close order at current market price
+                orders.append((-abs(psize_long), asks[i], "panic_close_long"))
+        elif modes[i, 0] == MODE_GRACEFUL_STOP and psize_long == 0.0:
+            # if graceful stop and no pos, don't open new pos
+            pass
+        elif do_long:
+            entries = calc_recursive_entries_long(
+                balance,
+                psize_long,
+                pprice_long,
+                bids[i],
+                emas_long[i].min(),
+                inverse,
+                qty_steps[i],
+                price_steps[i],
+                min_qtys[i],
+                min_costs[i],
+                c_mults[i],
+                cfg_long[10],
+                cfg_long[9],
+                cfg_long[5],
+                cfg_long[14],
+                cfg_long[15],
+                cfg_long[16],
+                cfg_long[1],
+                cfg_long[3],
+                cfg_long[0] or cfg_long[2],
+            )
+            psize_ = psize_long
+            if unstuck_close[0] == i and unstuck_close[1] == 0:
+                orders.append((unstuck_close[2], unstuck_close[3], "unstuck_close_long"))
+                psize_ = max(0.0, round_(abs(psize_long) - abs(unstuck_close[2]), qty_steps[i]))
+            closes = calc_close_grid_long(
+                cfg_long[4],
+                balance,
+                psize_,
+                pprice_long,
+                asks[i],
+                emas_long[i].max(),
+                0,
+                0,
+                inverse,
+                qty_steps[i],
+                price_steps[i],
+                min_qtys[i],
+                min_costs[i],
+                c_mults[i],
+                cfg_long[16],
+                cfg_long[12],
+                cfg_long[11],
+                cfg_long[13],
+                cfg_long[3],
+                cfg_long[1],
+                cfg_long[0],
+                cfg_long[2],
+            )
+            for entry in entries:
+                orders.append((entry[0], entry[1], entry[2]))
+            orders.extend(closes)
+        if modes[i, 1] == MODE_PANIC:
+            if psize_short != 0.0:
+                orders.append((abs(psize_short), bids[i], "panic_close_short"))
+        elif modes[i, 1] == MODE_GRACEFUL_STOP and psize_short == 0.0:
+            pass
+        elif do_short:
+            entries = calc_recursive_entries_short(
+                balance,
+                psize_short,
+                pprice_short,
+                asks[i],
+                emas_short[i].max(),
+                inverse,
+                qty_steps[i],
+                price_steps[i],
+                min_qtys[i],
+                min_costs[i],
+                c_mults[i],
+                cfg_short[10],
+                cfg_short[9],
+                cfg_short[5],
+                cfg_short[14],
+                cfg_short[15],
+                cfg_short[16],
+                cfg_short[1],
+                cfg_short[3],
+                cfg_short[0] or cfg_short[2],
+            )
+            psize_ = psize_short
+            if unstuck_close[0] == i and unstuck_close[1] == 1:
+                orders.append((unstuck_close[2], unstuck_close[3], "unstuck_close_short"))
+                psize_ = -max(0.0, round_(abs(psize_short) - abs(unstuck_close[2]), qty_steps[i]))
+            closes = calc_close_grid_short(
+                cfg_short[4],
+                balance,
+                psize_,
+                pprice_short,
+                bids[i],
+                emas_short[i].min(),
+                0,
+                0,
+                inverse,
+                qty_steps[i],
+                price_steps[i],
+                min_qtys[i],
+                min_costs[i],
+                c_mults[i],
+                cfg_short[16],
+                cfg_short[12],
+                cfg_short[11],
+                cfg_short[13],
+                cfg_short[3],
+                cfg_short[1],
+                cfg_short[0],
+                cfg_short[2],
+            )
+            for entry in entries:
+                orders.append((entry[0], entry[1], entry[2]))
+            orders.extend(closes)
+        diffs = np.empty(len(orders))
+        for j in range(len(orders)):
+            diffs[j] = calc_diff(orders[j][1], lasts[i])
+        for j in np.argsort(diffs, kind="mergesort"):
+            if orders[j][0] != 0.0:
+                symbol_idxs.append(i)
+                qtys.append(orders[j][0])
+                prices.append(orders[j][1])
+                types.append(fill_type_code(orders[j][2]))
+    return (
+        np.array(symbol_idxs[1:]),
+        np.array(qtys[1:]),
+        np.array(prices[1:]),
+        np.array(types[1:]),
+    )
+
+
+@njit
+def append_fill_multi(
+    fills,
+    n,
+    minute,
+    symbol_idx,
+    pnl,
+    fee_paid,
+    balance,
+    equity,
+    qty,
+    price,
+    psize,
+    pprice,
+    type_,
+    stuckness,
+):
+    """
+    Writes fill n into fills buffer of FILL_MULTI_DTYPE, growing it if full.
+    Returns the buffer, which may be a new array.
+    """
+    fills = grow_buffer(fills, n)
+    fills[n]["minute"] = minute
+    fills[n]["symbol"] = symbol_idx
+    fills[n]["pnl"] = pnl
+    fills[n]["fee_paid"] = fee_paid
+    fills[n]["balance"] = balance
+    fills[n]["equity"] = equity
+    fills[n]["qty"] = qty
+    fills[n]["price"] = price
+    fills[n]["psize"] = psize
+    fills[n]["pprice"] = pprice
+    fills[n]["type"] = fill_type_code(type_)
+    fills[n]["stuckness"] = stuckness
+    return fills
+
+
+@njit
+def write_stats_multi(stats, n, minute, poss_long, poss_short, prices, balance, equity):
+    """
+    Writes row n of the multi symbol stats array, shape (n_rows, 3 + 5 * n_symbols).
+    Columns: minute, balance, equity, then n_symbols columns each of
+    psize_long, pprice_long, psize_short, pprice_short, price.
+    """
+    n_symbols = len(poss_long)
+    stats[n, 0] = minute
+    stats[n, 1] = balance
+    stats[n, 2] = equity
+    for i in range(n_symbols):
+        stats[n, 3 + i] = poss_long[i][0]
+        stats[n, 3 + n_symbols + i] = poss_long[i][1]
+        stats[n, 3 + n_symbols * 2 + i] = poss_short[i][0]
+        stats[n, 3 + n_symbols * 3 + i] = poss_short[i][1]
+        stats[n, 3 + n_symbols * 4 + i] = prices[i]
+
+
 @njit
 def calc_fills(
     pside_idx,  # 0: long, 1: short
     k,
+    fills,
+    n_fills,
     poss_long,
     poss_short,
     idx,
@@ -205,11 +496,14 @@ def calc_fills(
     c_mults: np.ndarray,
     cfg: np.ndarray,
     maker_fee,
+    upnl_sum,
 ):
     """
-    returns fills: [tuple], new_pos: (float, float), new_balance: float
+    upnl_sum: sum of unrealized pnls of all positions at current prices, before these fills
+    fills are appended to fills buffer from n_fills onwards
+    returns fills: np.ndarray, n_fills: int, new_pos: (float, float), new_balance: float,
+        new_equity: float
     """
-    fills = []
     pos = poss_long[idx] if pside_idx == 0 else poss_short[idx]
     new_pos = (pos[0], pos[1])
     new_balance = balance
@@ -225,26 +519,25 @@ def calc_fills(
         )
         fee_paid = -qty_to_cost(entry[0], entry[1], inverse, c_mults[idx]) * maker_fee
         new_balance = max(new_balance * 1e-6, new_balance + fee_paid)
-        new_equity = new_balance + calc_pnl_sum(
-            poss_long, poss_short, hlc[:, 2], c_mults
-        )  # compute total equity
+        new_equity = new_balance + upnl_sum  # compute total equity
         wallet_exposure = qty_to_cost(new_pos[0], new_pos[1], inverse, c_mults[idx]) / new_balance
-        fills.append(
-            (
-                k,  # index
-                symbol,
-                0.0,  # realized pnl
-                fee_paid,
-                new_balance,
-                new_equity,  # equity
-                entry[0],  # fill qty
-                entry[1],  # fill price
-                new_pos[0],  # psize after fill
-                new_pos[1],  # pprice after fill
-                entry[2],  # fill type
-                wallet_exposure / cfg[16],  # stuckness
-            )
+        fills = append_fill_multi(
+            fills,
+            n_fills,
+            k,  # index
+            idx,  # symbol index
+            0.0,  # realized pnl
+            fee_paid,
+            new_balance,
+            new_equity,  # equity
+            entry[0],  # fill qty
+            entry[1],  # fill price
+            new_pos[0],  # psize after fill
+            new_pos[1],  # pprice after fill
+            entry[2],  # fill type
+            wallet_exposure / cfg[16],  # stuckness
         )
+        n_fills += 1
         if "ientry" in entry[2]:
             break
         prev_eprice = entry[1]
@@ -303,28 +596,27 @@ def calc_fills(
         )
         new_pos = new_pos_
         new_balance = max(new_balance * 1e-6, new_balance + fee_paid + pnl)
-        new_equity = new_balance + calc_pnl_sum(
-            poss_long, poss_short, hlc[:, 2], c_mults
-        )  # compute total equity
+        new_equity = new_balance + upnl_sum  # compute total equity
         wallet_exposure = qty_to_cost(new_pos[0], new_pos[1], inverse, c_mults[idx]) / new_balance
-        fills.append(
-            (
-                k,  # index
-                symbol,
-                pnl,  # realized pnl
-                fee_paid,
-                new_balance,  # post fill
-                new_equity,  # post fill
-                close[0],  # fill qty
-                close[1],  # fill price
-                new_pos[0],  # psize after fill
-                new_pos[1],  # pprice after fill
-                close[2],  # fill type
-                wallet_exposure / cfg[16],  # stuckness
-            )
+        fills = append_fill_multi(
+            fills,
+            n_fills,
+            k,  # index
+            idx,  # symbol index
+            pnl,  # realized pnl
+            fee_paid,
+            new_balance,  # post fill
+            new_equity,  # post fill
+            close[0],  # fill qty
+            close[1],  # fill price
+            new_pos[0],  # psize after fill
+            new_pos[1],  # pprice after fill
+            close[2],  # fill type
+            wallet_exposure / cfg[16],  # stuckness
         )
+        n_fills += 1
 
-    return fills, new_pos, new_balance, new_equity
+    return fills, n_fills, new_pos, new_balance, new_equity
 
 
 @njit
@@ -360,20 +652,25 @@ def backtest_multisymbol_recursive_grid(
     loss_allowance_pct,
     stuck_threshold,
     unstuck_close_pct,
+    order_proximity=0.0,
+    max_order_age=60,
+    max_balance_drift=0.002,
 ):
     """
     multi symbol backtest
     all symbols share same wallet
 
     interval is 1m
-    hlcs: [[[sym1_high_0, sym1_low_0, sym1_close_0],
-            [sym1_high_1, sym1_low_1, sym1_close_1],
+    hlcs are minute-major, shape (n_minutes, n_symbols, 3), float64 or float32:
+          [[[sym0_high_0, sym0_low_0, sym0_close_0],
+            [sym1_high_0, sym1_low_0, sym1_close_0],
             ...],
-           [[sym1_high_0, sym1_low_0, sym1_close_0],
+           [[sym0_high_1, sym0_low_1, sym0_close_1],
             [sym1_high_1, sym1_low_1, sym1_close_1],
             ...],
            ...
            ]
+    so that all symbols of one minute are adjacent in memory
     # static values
     do_longs: (True, True, ...)
     do_shorts: (True, True, ...)
@@ -411,6 +708,13 @@ def backtest_multisymbol_recursive_grid(
     [(long, short), (long, short), ...]
 
     stuck_threshold: if WE / WE_limit > stuck_threshold: consider position stuck
+
+    order_proximity: if > 0.0, a symbol's open orders are only recalculated when its own position
+        changed, it is selected for unstucking, price is within order_proximity of its nearest
+        order, balance moved more than max_balance_drift since last calc, or the orders are
+        max_order_age minutes old.
+        if 0.0, orders are recalculated for all symbols after any fill and every minute for
+        symbols without position.
     """
 
     inverse = False
@@ -426,17 +730,12 @@ def backtest_multisymbol_recursive_grid(
     balance = starting_balance
     poss_long = [(0.0, 0.0) for _ in range(len(symbols))]  # [psize: float, pprice: float]
     poss_short = [(0.0, 0.0) for _ in range(len(symbols))]  # [psize: float, pprice: float]
-    fills = []
-    stats = [
-        (
-            0,
-            poss_long.copy(),
-            poss_short.copy(),
-            hlcs[:, 0, 2],
-            balance,
-            balance,
-        )
-    ]
+    fills = np.empty(0, dtype=FILL_MULTI_DTYPE)
+    n_fills = 0
+    # one row per hour, plus first and last
+    stats = np.zeros((len(hlcs) // 60 + 2, 3 + 5 * len(symbols)))
+    write_stats_multi(stats, 0, 0, poss_long, poss_short, hlcs[0, :, 2], balance, balance)
+    n_stats = 1
     entries_long = [(0.0, 0.0, "") for _ in idxs]  # (qty: float, price: float, type: str)
     entries_short = [(0.0, 0.0, "") for _ in idxs]
     closes_long = [[(0.0, 0.0, "")] for _ in idxs]  # [(qty: float, price: float, type: str), (), ...]
@@ -452,12 +751,17 @@ def backtest_multisymbol_recursive_grid(
     # find first non zero hlcs
     first_non_zero_idxs = [0 for _ in idxs]
     for i in idxs:
-        for k in range(len(hlcs[i])):
-            if hlcs[i][k][2] != 0.0:
+        for k in range(len(hlcs)):
+            if hlcs[k, i, 2] != 0.0:
                 first_non_zero_idxs[i] = k
                 break
-    emas_long = [np.repeat(hlcs[i][k][2], 3) for i, k in enumerate(first_non_zero_idxs)]
-    emas_short = [np.repeat(hlcs[i][k][2], 3) for i, k in enumerate(first_non_zero_idxs)]
+    # hlcs may be float32; emas are always float64
+    emas_long = [
+        np.repeat(np.float64(hlcs[k, i, 2]), 3) for i, k in enumerate(first_non_zero_idxs)
+    ]
+    emas_short = [
+        np.repeat(np.float64(hlcs[k, i, 2]), 3) for i, k in enumerate(first_non_zero_idxs)
+    ]
 
     alphas_long = [2.0 / (x + 1.0) for x in ema_spans_long]
     alphas__long = [1.0 - x for x in alphas_long]
@@ -477,6 +781,21 @@ def backtest_multisymbol_recursive_grid(
     stuck_positions_long = np.zeros(len(symbols))  # 0 is unstuck; 1 is stuck
     stuck_positions_short = np.zeros(len(symbols))  # 0 is unstuck; 1 is stuck
 
+    # unrealized pnl per position and their sum, valid for minute upnl_k
+    upnls_long = np.zeros(len(symbols))
+    upnls_short = np.zeros(len(symbols))
+    upnl_sum = 0.0
+    upnl_k = -1
+
+    # lazy order recalc: fills this minute, minute and balance of last orders calc
+    lazy_orders = order_proximity > 0.0
+    filled_long = np.zeros(len(symbols), dtype=np.bool_)
+    filled_short = np.zeros(len(symbols), dtype=np.bool_)
+    orders_ks_long = np.full(len(symbols), -max_order_age, dtype=np.int64)
+    orders_ks_short = np.full(len(symbols), -max_order_age, dtype=np.int64)
+    orders_balances_long = np.full(len(symbols), starting_balance)
+    orders_balances_short = np.full(len(symbols), starting_balance)
+
     unstucking_close = (0.0, 0.0, "")
     s_i, s_pside = -1, -1
 
@@ -490,7 +809,7 @@ def backtest_multisymbol_recursive_grid(
         # TODO
         """
         return backtest_single_symbol_recursive_grid(
-            hlcs[0],
+            hlcs[:, 0],
             starting_balance,
             maker_fee,
             do_longs[0],
@@ -505,23 +824,34 @@ def backtest_multisymbol_recursive_grid(
         )
         """
 
-    for k in range(1, len(hlcs[0])):
+    for k in range(1, len(hlcs)):
         any_fill = False
+        filled_long[:] = False
+        filled_short[:] = False
 
         # check for fills long
         for i in idxs_long:
-            if hlcs[i][k][0] == 0.0:
+            if hlcs[k, i, 0] == 0.0:
                 continue
-            emas_long[i] = calc_ema(alphas_long[i], alphas__long[i], emas_long[i], hlcs[i][k][2])
-            if (entries_long[i][0] > 0.0 and hlcs[i][k][1] < entries_long[i][1]) or (
+            emas_long[i] = calc_ema(alphas_long[i], alphas__long[i], emas_long[i], hlcs[k, i, 2])
+            if (entries_long[i][0] > 0.0 and hlcs[k, i, 1] < entries_long[i][1]) or (
                 poss_long[i][0] > 0.0
                 and closes_long[i][0][0] != 0.0
-                and hlcs[i][k][0] > closes_long[i][0][1]
+                and hlcs[k, i, 0] > closes_long[i][0][1]
             ):
                 # there were fills
-                new_fills, new_pos_long, new_balance, new_equity = calc_fills(
+                if upnl_k != k:
+                    # first fill this minute; bring all upnls up to date
+                    upnl_sum = calc_upnls(
+                        poss_long, poss_short, hlcs[k, :, 2], c_mults, upnls_long, upnls_short
+                    )
+                    upnl_k = k
+                n_fills_prev = n_fills
+                fills, n_fills, new_pos_long, new_balance, new_equity = calc_fills(
                     0,
                     k,
+                    fills,
+                    n_fills,
                     poss_long,
                     poss_short,
                     i,
@@ -529,7 +859,7 @@ def backtest_multisymbol_recursive_grid(
                     balance,
                     entries_long[i],
                     closes_long[i],
-                    hlcs[:, k],
+                    hlcs[k],
                     inverse,
                     qty_steps[i],
                     price_steps[i],
@@ -538,22 +868,28 @@ def backtest_multisymbol_recursive_grid(
                     c_mults,
                     ll[i],
                     maker_fee,
+                    upnl_sum,
                 )
-                if len(new_fills) > 0:
+                if n_fills > n_fills_prev:
                     any_fill = True
+                    filled_long[i] = True
                 if new_equity / new_balance < 0.1:
                     bankrupt = True
-                for fill in new_fills:
-                    pnl_cumsum_running += fill[2]
+                for j in range(n_fills_prev, n_fills):
+                    pnl_cumsum_running += fills[j]["pnl"]
                     pnl_cumsum_max = max(pnl_cumsum_max, pnl_cumsum_running)
-                fills.extend(new_fills)
                 poss_long[i] = new_pos_long
                 balance = new_balance
+                upnl = calc_pnl_long(
+                    poss_long[i][1], hlcs[k, i, 2], poss_long[i][0], inverse, c_mults[i]
+                )
+                upnl_sum += upnl - upnls_long[i]
+                upnls_long[i] = upnl
 
                 wallet_exposure = (
                     qty_to_cost(poss_long[i][0], poss_long[i][1], inverse, c_mults[i]) / balance
                 )
-                if wallet_exposure / ll[i][16] > stuck_threshold and hlcs[i][k][2] < poss_long[i][1]:
+                if wallet_exposure / ll[i][16] > stuck_threshold and hlcs[k, i, 2] < poss_long[i][1]:
                     # is stuck and not in profit
                     any_stuck = True
                     stuck_positions_long[i] = 1.0
@@ -563,18 +899,27 @@ def backtest_multisymbol_recursive_grid(
 
         # check for fills short
         for i in idxs_short:
-            if hlcs[i][k][0] == 0.0:
+            if hlcs[k, i, 0] == 0.0:
                 continue
-            emas_short[i] = calc_ema(alphas_short[i], alphas__short[i], emas_short[i], hlcs[i][k][2])
-            if (entries_short[i][0] != 0.0 and hlcs[i][k][0] > entries_short[i][1]) or (
+            emas_short[i] = calc_ema(alphas_short[i], alphas__short[i], emas_short[i], hlcs[k, i, 2])
+            if (entries_short[i][0] != 0.0 and hlcs[k, i, 0] > entries_short[i][1]) or (
                 poss_short[i][0] != 0.0
                 and closes_short[i][0][0] != 0.0
-                and hlcs[i][k][1] < closes_short[i][0][1]
+                and hlcs[k, i, 1] < closes_short[i][0][1]
             ):
                 # there were fills
-                new_fills, new_pos_short, new_balance, new_equity = calc_fills(
+                if upnl_k != k:
+                    # first fill this minute; bring all upnls up to date
+                    upnl_sum = calc_upnls(
+                        poss_long, poss_short, hlcs[k, :, 2], c_mults, upnls_long, upnls_short
+                    )
+                    upnl_k = k
+                n_fills_prev = n_fills
+                fills, n_fills, new_pos_short, new_balance, new_equity = calc_fills(
                     1,
                     k,
+                    fills,
+                    n_fills,
                     poss_long,
                     poss_short,
                     i,
@@ -582,7 +927,7 @@ def backtest_multisymbol_recursive_grid(
                     balance,
                     entries_short[i],
                     closes_short[i],
-                    hlcs[:, k],
+                    hlcs[k],
                     inverse,
                     qty_steps[i],
                     price_steps[i],
@@ -591,22 +936,28 @@ def backtest_multisymbol_recursive_grid(
                     c_mults,
                     ls[i],
                     maker_fee,
+                    upnl_sum,
                 )
-                if len(new_fills) > 0:
+                if n_fills > n_fills_prev:
                     any_fill = True
+                    filled_short[i] = True
                 if new_equity / new_balance < 0.1:
                     bankrupt = True
-                for fill in new_fills:
-                    pnl_cumsum_running += fill[2]
+                for j in range(n_fills_prev, n_fills):
+                    pnl_cumsum_running += fills[j]["pnl"]
                     pnl_cumsum_max = max(pnl_cumsum_max, pnl_cumsum_running)
-                fills.extend(new_fills)
                 poss_short[i] = new_pos_short
                 balance = new_balance
+                upnl = calc_pnl_short(
+                    poss_short[i][1], hlcs[k, i, 2], poss_short[i][0], inverse, c_mults[i]
+                )
+                upnl_sum += upnl - upnls_short[i]
+                upnls_short[i] = upnl
 
                 wallet_exposure = (
                     qty_to_cost(poss_short[i][0], poss_short[i][1], inverse, c_mults[i]) / balance
                 )
-                if wallet_exposure / ls[i][16] > stuck_threshold and hlcs[i][k][2] > poss_short[i][1]:
+                if wallet_exposure / ls[i][16] > stuck_threshold and hlcs[k, i, 2] > poss_short[i][1]:
                     # is stuck and not in profit
                     any_stuck = True
                     stuck_positions_short[i] = 1.0
@@ -637,7 +988,7 @@ def backtest_multisymbol_recursive_grid(
                 for i in idxs_long:
                     if stuck_positions_long[i]:
                         # long is stuck
-                        pprice_diff = 1.0 - hlcs[i][k][2] / poss_long[i][1]
+                        pprice_diff = 1.0 - hlcs[k, i, 2] / poss_long[i][1]
                         if pprice_diff < lowest_pprice_diff:
                             lowest_pprice_diff = pprice_diff
                             s_i = i
@@ -645,7 +996,7 @@ def backtest_multisymbol_recursive_grid(
                 for i in idxs_short:
                     if stuck_positions_short[i]:
                         # short is stuck
-                        pprice_diff = hlcs[i][k][2] / poss_short[i][1] - 1.0
+                        pprice_diff = hlcs[k, i, 2] / poss_short[i][1] - 1.0
                         if pprice_diff < lowest_pprice_diff:
                             lowest_pprice_diff = pprice_diff
                             s_i = i
@@ -658,10 +1009,11 @@ def backtest_multisymbol_recursive_grid(
                 )
                 if AU_allowance > 0.0:
                     if s_pside:  # short
-                        close_price = min(hlcs[s_i][k][2], emas_short[s_i].min())  # lower ema band
+                        # lower ema band
+                        close_price = min(np.float64(hlcs[k, s_i, 2]), emas_short[s_i].min())
                         upnl = calc_pnl_short(
                             poss_short[s_i][1],
-                            hlcs[s_i][k][2],
+                            hlcs[k, s_i, 2],
                             poss_short[s_i][0],
                             inverse,
                             c_mults[s_i],
@@ -694,10 +1046,11 @@ def backtest_multisymbol_recursive_grid(
                         )
                         unstucking_close = (abs(close_qty), close_price, "unstuck_close_short")
                     else:  # long
-                        close_price = max(hlcs[s_i][k][2], emas_long[s_i].max())  # upper ema band
+                        # upper ema band
+                        close_price = max(np.float64(hlcs[k, s_i, 2]), emas_long[s_i].max())
                         upnl = calc_pnl_long(
                             poss_long[s_i][1],
-                            hlcs[s_i][k][2],
+                            hlcs[k, s_i, 2],
                             poss_long[s_i][0],
                             inverse,
                             c_mults[s_i],
@@ -732,16 +1085,29 @@ def backtest_multisymbol_recursive_grid(
 
         # check if open orders long need to be updated
         for i in idxs_long:
-            if hlcs[i][k][0] == 0.0:
+            if hlcs[k, i, 0] == 0.0:
                 continue
-            if (
-                any_fill
-                or poss_long[i][0] == 0.0
-                or (s_pside == 0 and s_i == i and unstucking_close[0])
-            ):
+            if lazy_orders:
+                recalc = (
+                    filled_long[i]
+                    or (s_pside == 0 and s_i == i and unstucking_close[0])
+                    or k - orders_ks_long[i] >= max_order_age
+                    or abs(balance / orders_balances_long[i] - 1.0) > max_balance_drift
+                    or calc_orders_distance(hlcs[k, i, 2], entries_long[i], closes_long[i])
+                    < order_proximity
+                )
+            else:
                 # calc orders if any fill or if psize is zero or if stuck
+                recalc = (
+                    any_fill
+                    or poss_long[i][0] == 0.0
+                    or (s_pside == 0 and s_i == i and unstucking_close[0])
+                )
+            if recalc:
+                orders_ks_long[i] = k
+                orders_balances_long[i] = balance
                 entries_long[i], closes_long[i] = get_open_orders_long(
-                    hlcs[i][k][2],
+                    np.float64(hlcs[k, i, 2]),
                     balance,
                     poss_long[i],
                     emas_long[i],
@@ -757,16 +1123,29 @@ def backtest_multisymbol_recursive_grid(
 
         # check if open orders short need to be updated
         for i in idxs_short:
-            if hlcs[i][k][0] == 0.0:
+            if hlcs[k, i, 0] == 0.0:
                 continue
-            if (
-                any_fill
-                or poss_short[i][0] == 0.0
-                or (unstucking_close[0] and s_pside == 1 and s_i == i)
-            ):
+            if lazy_orders:
+                recalc = (
+                    filled_short[i]
+                    or (unstucking_close[0] and s_pside == 1 and s_i == i)
+                    or k - orders_ks_short[i] >= max_order_age
+                    or abs(balance / orders_balances_short[i] - 1.0) > max_balance_drift
+                    or calc_orders_distance(hlcs[k, i, 2], entries_short[i], closes_short[i])
+                    < order_proximity
+                )
+            else:
                 # calc orders if any fill or if psize is zero or if stuck
+                recalc = (
+                    any_fill
+                    or poss_short[i][0] == 0.0
+                    or (unstucking_close[0] and s_pside == 1 and s_i == i)
+                )
+            if recalc:
+                orders_ks_short[i] = k
+                orders_balances_short[i] = balance
                 entries_short[i], closes_short[i] = get_open_orders_short(
-                    hlcs[i][k][2],
+                    np.float64(hlcs[k, i, 2]),
                     balance,
                     poss_short[i],
                     emas_short[i],
@@ -782,46 +1161,48 @@ def backtest_multisymbol_recursive_grid(
 
         if k % 60 == 0:
             # update stats hourly
-            equity = balance + calc_pnl_sum(poss_long, poss_short, hlcs[:, k, 2], c_mults)
-            stats.append(
-                (
-                    k,
-                    poss_long.copy(),
-                    poss_short.copy(),
-                    hlcs[:, k, 2],
-                    balance,
-                    equity,
+            if upnl_k != k:
+                upnl_sum = calc_upnls(
+                    poss_long, poss_short, hlcs[k, :, 2], c_mults, upnls_long, upnls_short
                 )
+                upnl_k = k
+            equity = balance + upnl_sum
+            write_stats_multi(
+                stats, n_stats, k, poss_long, poss_short, hlcs[k, :, 2], balance, equity
             )
+            n_stats += 1
             if equity / balance < 0.1 or bankrupt:
                 # bankrupt
                 bankrupt = True
                 break
-    equity = balance + calc_pnl_sum(poss_long, poss_short, hlcs[:, k, 2], c_mults)
+    equity = balance + calc_pnl_sum(poss_long, poss_short, hlcs[k, :, 2], c_mults)
     if bankrupt:
         # force equity to be close to zero if bankrupt
-        stats.append(
-            (
-                stats[-1][0] + 60,
-                poss_long.copy(),
-                poss_short.copy(),
-                hlcs[:, k, 2],
-                balance,
-                min(starting_balance * 1e-12, equity),
-            )
+        equity = min(starting_balance * 1e-12, equity)
+        write_stats_multi(
+            stats,
+            n_stats,
+            stats[n_stats - 1, 0] + 60,
+            poss_long,
+            poss_short,
+            hlcs[k, :, 2],
+            balance,
+            equity,
         )
-    elif stats[-1][0] != k:
-        stats.append(
-            (
-                stats[-1][0] + 60,
-                poss_long.copy(),
-                poss_short.copy(),
-                hlcs[:, k, 2],
-                balance,
-                equity,
-            )
+        n_stats += 1
+    elif stats[n_stats - 1, 0] != k:
+        write_stats_multi(
+            stats,
+            n_stats,
+            stats[n_stats - 1, 0] + 60,
+            poss_long,
+            poss_short,
+            hlcs[k, :, 2],
+            balance,
+            equity,
         )
-    return fills, stats
+        n_stats += 1
+    return fills[:n_fills], stats[:n_stats]
 
 
 @njit
@@ -872,7 +1253,8 @@ def backtest_single_symbol_recursive_grid(
     balance = starting_balance
     pos_long = (0.0, 0.0)  # (psize: float, pprice: float)
     pos_short = (0.0, 0.0)  # (psize: float, pprice: float)
-    fills = []
+    fills = np.empty(0, dtype=FILL_MULTI_DTYPE)
+    n_fills = 0
     stats = [
         (
             0,
@@ -912,9 +1294,12 @@ def backtest_single_symbol_recursive_grid(
             pos_long[0] > 0.0 and closes_long[0][0] != 0.0 and hlc[k][0] > closes_long[0][1]
         ):
             # there were fills
-            new_fills, new_pos_long, new_balance, new_equity = calc_fills(
+            n_fills_prev = n_fills
+            fills, n_fills, new_pos_long, new_balance, new_equity = calc_fills(
                 0,
                 k,
+                fills,
+                n_fills,
                 (pos_long,),
                 (pos_short,),
                 0,
@@ -931,12 +1316,12 @@ def backtest_single_symbol_recursive_grid(
                 (c_mult,),
                 ll,
                 maker_fee,
+                calc_pnl_sum((pos_long,), (pos_short,), (hlc[k][2],), (c_mult,)),
             )
-            if len(new_fills) > 0:
+            if n_fills > n_fills_prev:
                 any_fill = True
             if new_equity / new_balance < 0.06:
                 bankrupt = True
-            fills.extend(new_fills)
             pos_long = new_pos_long
             balance = new_balance
 
@@ -946,9 +1331,12 @@ def backtest_single_symbol_recursive_grid(
             pos_short[0] != 0.0 and closes_short[0][0] != 0.0 and hlc[k][1] < closes_short[0][1]
         ):
             # there were fills
-            new_fills, new_pos_short, new_balance, new_equity = calc_fills(
+            n_fills_prev = n_fills
+            fills, n_fills, new_pos_short, new_balance, new_equity = calc_fills(
                 1,
                 k,
+                fills,
+                n_fills,
                 (pos_long,),
                 (pos_short,),
                 0,
@@ -965,12 +1353,12 @@ def backtest_single_symbol_recursive_grid(
                 (c_mult,),
                 ls,
                 maker_fee,
+                calc_pnl_sum((pos_long,), (pos_short,), (hlc[k][2],), (c_mult,)),
             )
-            if len(new_fills) > 0:
+            if n_fills > n_fills_prev:
                 any_fill = True
             if new_equity / new_balance < 0.1:
                 bankrupt = True
-            fills.extend(new_fills)
             pos_short = new_pos_short
             balance = new_balance
 
@@ -1049,4 +1437,4 @@ def backtest_single_symbol_recursive_grid(
                 equity,
             )
         )
-    return fills, stats
+    return fills[:n_fills], stats
@@ -8,8 +8,9 @@ import asyncio
 import json
 import numpy as np
 import traceback
+from collections import OrderedDict
 from copy import deepcopy
-from backtest import backtest
+from backtest import backtest, EMABandCache
 from multiprocessing import Pool, shared_memory
 from njit_funcs import round_dynamic
 from pure_funcs import (
@@ -44,6 +45,14 @@ import logging.config
 
 logging.config.dictConfig({"version": 1, "disable_existing_loggers": True})
 
+# one per worker process; candidates with equal ema spans reuse precomputed ema bands
+ema_band_cache = EMABandCache()
+
+# one per worker process; long and short are simulated independently of each other,
+# so analysis of a side is reused while only the other side's config changes
+pside_analyses_cache = OrderedDict()
+PSIDE_ANALYSES_CACHE_MAXSIZE = 10000
+
 
 def calc_metrics_mean(analyses: dict):
     """
@@ -158,6 +167,51 @@ def backtest_wrap(config_: dict, ticks_caches: dict):
         },
         **{k: v for k, v in config_["market_specific_settings"].items()},
     }
+    psides = [pside for pside in ["long", "short"] if config[pside]["enabled"]]
+    cache_keys = {pside: calc_pside_cache_key(config_, config, pside) for pside in psides}
+    cached = {
+        pside: pside_analyses_cache[cache_keys[pside]]
+        for pside in psides
+        if cache_keys[pside] in pside_analyses_cache
+    }
+    for pside in cached:
+        pside_analyses_cache.move_to_end(cache_keys[pside])
+    if psides and len(cached) == len(psides):
+        analysis = cached[psides[0]].copy()
+    else:
+        # simulate only sides not in cache
+        for pside in cached:
+            config[pside]["enabled"] = False
+        analysis = backtest_slices(config_, config, ticks_caches)
+        if analysis is None:
+            return get_empty_analysis()
+        for pside in psides:
+            if pside not in cached:
+                pside_analyses_cache[cache_keys[pside]] = analysis.copy()
+        while len(pside_analyses_cache) > PSIDE_ANALYSES_CACHE_MAXSIZE:
+            pside_analyses_cache.popitem(last=False)
+    for pside in cached:
+        analysis.update({k: v for k, v in cached[pside].items() if k.endswith(f"_{pside}")})
+    return analysis
+
+
+def calc_pside_cache_key(config_: dict, config: dict, pside: str) -> str:
+    # pside config and everything else in config except the other side's config
+    return json.dumps(
+        denumpyize(
+            {
+                **{k: v for k, v in config.items() if k not in ["long", "short", "config_no"]},
+                **{pside: config[pside], "ticks_cache_fname": config_["ticks_cache_fname"]},
+            }
+        ),
+        sort_keys=True,
+    )
+
+
+def backtest_slices(config_: dict, config: dict, ticks_caches: dict):
+    """
+    runs backtest on each slice; returns mean analysis, or None on error
+    """
     if config["symbol"] in ticks_caches:
         ticks = ticks_caches[config["symbol"]]
     else:
@@ -177,21 +231,20 @@ def backtest_wrap(config_: dict, ticks_caches: dict):
             ]
         for ia, ib in slices:
             data = ticks[ia:ib]
-            fills_long, fills_short, stats = backtest(config, data)
+            fills_long, fills_short, stats = backtest(config, data, ema_band_cache=ema_band_cache)
             if config["slim_analysis"]:
                 analysis = analyze_fills_slim(fills_long, fills_short, stats, config)
             else:
                 longs, shorts, sdf, analysis = analyze_fills(fills_long, fills_short, stats, config)
             analyses.append(analysis.copy())
-        analysis = calc_metrics_mean(analyses)
+        return calc_metrics_mean(analyses)
     except Exception as e:
-        analysis = get_empty_analysis()
         logging.error(f'error with {config["symbol"]} {e}')
         logging.error("config")
         traceback.print_exc()
         with open(make_get_filepath("tmp/optimize_errors.txt"), "a") as f:
             f.write(json.dumps([time(), "error", str(e), denumpyize(config)]) + "\n")
-    return analysis
+        return None
 
 
 async def main(algorithm=None):
@@ -9,7 +9,7 @@ import logging
 import argparse
 from deap import base, creator, tools, algorithms
 from collections import OrderedDict
-from procedures import utc_ms, make_get_filepath
+from procedures import utc_ms, make_get_filepath, join_cache_refreshes
 from multiprocessing import shared_memory
 
 from pure_funcs import (
@@ -26,7 +26,8 @@ from njit_multisymbol import backtest_multisymbol_recursive_grid
 
 class Evaluator:
     def __init__(self, hlcs, config):
-        self.hlcs = hlcs
+        # hlcs are minute-major (n_minutes, n_symbols, 3); shared memory keeps layout and dtype
+        self.hlcs = np.ascontiguousarray(hlcs)
         self.shared_hlcs = shared_memory.SharedMemory(create=True, size=self.hlcs.nbytes)
         self.shared_hlcs_np = np.ndarray(
             self.hlcs.shape, dtype=self.hlcs.dtype, buffer=self.shared_hlcs.buf
@@ -52,6 +53,9 @@ class Evaluator:
                 "min_costs",
                 "min_qtys",
                 "worst_drawdown_lower_bound",
+                "order_proximity",
+                "max_order_age_minutes",
+                "max_balance_drift",
             ]
         }
 
@@ -74,16 +78,16 @@ class Evaluator:
         )
         res = backtest_multi(self.shared_hlcs_np, config_)
         fills, stats = res
-        stats_eqs = [(x[0], x[5]) for x in stats]
-        fills_eqs = [(x[0], x[5]) for x in fills]
-
-        all_eqs = pd.DataFrame(stats_eqs + fills_eqs).set_index(0).sort_index()[1]
+        all_eqs = pd.Series(
+            np.concatenate([stats[:, 2], fills["equity"]]),
+            index=np.concatenate([stats[:, 0].astype(np.int64), fills["minute"]]),
+        ).sort_index()
         drawdowns_all = calc_drawdowns(all_eqs)
         worst_drawdown = abs(drawdowns_all.min())
 
         eq_threshold = config_["starting_balance"] * 1e-4
-        stats_eqs_df = pd.DataFrame(stats_eqs).set_index(0)
-        eqs_daily = stats_eqs_df.groupby(stats_eqs_df.index // 1440).last()[1]
+        stats_eqs = pd.Series(stats[:, 2], index=stats[:, 0].astype(np.int64))
+        eqs_daily = stats_eqs.groupby(stats_eqs.index // 1440).last()
         drawdowns_daily = calc_drawdowns(eqs_daily)
         drawdowns_daily_mean = abs(drawdowns_daily.mean())
         eqs_daily_pct_change = eqs_daily.pct_change()
@@ -239,6 +243,9 @@ def backtest_multi(hlcs, config):
         config["loss_allowance_pct"],
         config["stuck_threshold"],
         config["unstuck_close_pct"],
+        config.get("order_proximity", 0.0),
+        config.get("max_order_age_minutes", 60),
+        config.get("max_balance_drift", 0.002),
     )
     return res
 
@@ -280,7 +287,12 @@ async def main():
     config["results_cache_fname"] = make_get_filepath(
         f"results_multi/{ts_to_date_utc(utc_ms())[:19].replace(':', '_')}_all_results.txt"
     )
-    for key, default_val in [("worst_drawdown_lower_bound", 0.5)]:
+    for key, default_val in [
+        ("worst_drawdown_lower_bound", 0.5),
+        ("order_proximity", 0.0),
+        ("max_order_age_minutes", 60),
+        ("max_balance_drift", 0.002),
+    ]:
         if key not in config:
             config[key] = default_val
 
@@ -342,6 +354,7 @@ async def main():
         toolbox.register("select", tools.selNSGA2)
 
         # Parallelization setup
+        join_cache_refreshes()  # no refresh thread running while forking
         pool = multiprocessing.Pool(processes=n_cpus)
         toolbox.register("map", pool.map)
 
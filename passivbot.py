@@ -22,6 +22,8 @@ from procedures import (
     utc_ms,
     load_broker_code,
 )
+from rate_limiter import RateLimiter, priority, PRIORITY_ORDERS
+from market_data_recorder import MarketDataRecorder
 from pure_funcs import (
     filter_orders,
     create_xk,
@@ -137,6 +139,12 @@ class Bot:
             self.user, self.api_keys
         )
         self.broker_code = load_broker_code(self.exchange)
+        # adapters using ccxt replace this with a limiter attached to their ccxt instance
+        self.rate_limiter = RateLimiter.for_exchange(self.exchange)
+        self.market_data_recorder = None
+        if config.get("record_market_data"):
+            spot_suffix = "_spot" if config.get("market_type") == "spot" else ""
+            self.market_data_recorder = MarketDataRecorder(self.exchange + spot_suffix)
 
         self.log_level = 0
 
@@ -511,7 +519,8 @@ class Bot:
             orders = None
             orders_to_create = [order for order in orders_to_create if self.order_is_valid(order)]
             orders_to_create = self.format_custom_ids(orders_to_create)
-            orders = await self.execute_orders(orders_to_create)
+            with priority(PRIORITY_ORDERS):
+                orders = await self.execute_orders(orders_to_create)
             orders_f = [x for x in orders if "price" in x]
             for order in sorted(orders_f, key=lambda x: calc_diff(x["price"], self.price)):
                 if "side" in order:
@@ -542,7 +551,8 @@ class Bot:
                     orders_to_cancel_dedup.append(o)
             cancellations = None
             try:
-                cancellations = await self.execute_cancellations(orders_to_cancel_dedup)
+                with priority(PRIORITY_ORDERS):
+                    cancellations = await self.execute_cancellations(orders_to_cancel_dedup)
                 for cancellation in cancellations:
                     if "order_id" in cancellation:
                         logging.info(
@@ -1349,6 +1359,9 @@ class Bot:
                     if self.stop_websocket:
                         break
                     ticks = self.standardize_market_stream_event(json.loads(msg))
+                    if self.market_data_recorder is not None:
+                        if self.market_data_recorder.update_ticks(self.symbol, ticks):
+                            self.market_data_recorder.flush()
                     if self.process_websocket_ticks:
                         asyncio.create_task(self.on_market_stream_event(ticks))
                     if k % 10 == 0:
@@ -1800,6 +1813,13 @@ async def main() -> None:
         default=random.randrange(60),
         help="when in ohlcv mode, offset execution cycle in seconds from whole minute",
     )
+    parser.add_argument(
+        "-rmd",
+        "--record_market_data",
+        "--record-market-data",
+        action="store_true",
+        help="if true, record 1m ohlcvs from websocket market stream for backtesting",
+    )
     parser.add_argument(
         "-oh",
         "--ohlcv",
@@ -1865,6 +1885,7 @@ async def main() -> None:
         "countdown_offset",
         "price_precision_multiplier",
         "price_step_custom",
+        "record_market_data",
     ]:
         config[k] = getattr(args, k)
     if config["test_mode"] and config["exchange"] not in TEST_MODE_SUPPORTED_EXCHANGES:
@@ -1,7 +1,9 @@
 import os
 
+# numba by default: calc_ideal_orders_multi takes ~0.5ms instead of ~70ms per cycle at 100 symbols.
+# it is cached on disk after the first compile; NOJIT=true runs it as plain python
 if "NOJIT" not in os.environ:
-    os.environ["NOJIT"] = "true"
+    os.environ["NOJIT"] = "false"
 
 
 import logging
@@ -12,6 +14,7 @@ import json
 import hjson
 import pprint
 import numpy as np
+from collections import deque
 from uuid import uuid4
 
 from procedures import load_broker_code, load_user_info, utc_ms, make_get_filepath, load_live_config
@@ -19,7 +22,6 @@ from njit_funcs_recursive_grid import calc_recursive_entries_long, calc_recursiv
 from njit_funcs import (
     calc_samples,
     calc_emas_last,
-    calc_ema,
     calc_close_grid_long,
     calc_close_grid_short,
     calc_diff,
@@ -31,25 +33,41 @@ from njit_funcs import (
     round_dn,
     calc_pnl_long,
     calc_pnl_short,
+    FILL_TYPES,
 )
-from njit_multisymbol import calc_AU_allowance
+from njit_multisymbol import calc_AU_allowance, calc_ideal_orders_multi, LIVE_MODES
+from rate_limiter import RateLimiter, priority, PRIORITY_ORDERS, PRIORITY_BACKGROUND
+from market_data_recorder import MarketDataRecorder
 from pure_funcs import (
     numpyize,
     filter_orders,
     multi_replace,
     shorten_custom_id,
     determine_side_from_order_tuple,
+    live_config_dict_to_list_recursive_grid,
+    denumpyize,
 )
 
+# on warm start, EMAs missing fewer minutes than this are caught up with last known price
+# instead of fetching the gap from 1m ohlcvs
+WARM_START_MAX_GAP_NO_FETCH_MINUTES = 15
+
 
 class Passivbot:
     def __init__(self, config: dict):
         self.config = config
-        for key, default_val in [("auto_gs", True), ("long_enabled", True), ("short_enabled", True)]:
+        for key, default_val in [
+            ("auto_gs", True),
+            ("long_enabled", True),
+            ("short_enabled", True),
+            ("warm_start_max_age_minutes", 720),
+            ("record_market_data", False),
+        ]:
             if key not in self.config:
                 self.config[key] = default_val
         self.user = config["user"]
-        self.user_info = load_user_info(config["user"])
+        # user_info may be given in config, e.g. by tools/exchange_simulator.py
+        self.user_info = config["user_info"] if "user_info" in config else load_user_info(self.user)
         self.exchange = self.user_info["exchange"]
         self.broker_code = load_broker_code(self.user_info["exchange"])
         self.custom_id_max_length = 36
@@ -67,6 +85,7 @@ class Passivbot:
         self.positions = {}
         self.open_orders = {}
         self.pnls = []
+        self.init_pnls_cumsum()
         self.tickers = {}
         self.emas_long = {}
         self.emas_short = {}
@@ -79,10 +98,28 @@ class Passivbot:
         self.c_mults = {}
         self.coins = {}
         self.live_configs = {}
+        self.live_configs_arr = None  # dense live configs, see init_order_arrays
         self.stop_bot = False
         self.pnls_cache_filepath = make_get_filepath(f"caches/{self.exchange}/{self.user}_pnls.json")
+        self.pnls_covered_since = None  # pnls are complete from this timestamp onwards
+        self.state_snapshot_filepath = make_get_filepath(
+            f"caches/{self.exchange}/{self.user}_state.json"
+        )
+        self.state_snapshot = {}  # loaded on init_bot, used for warm start
+        # {symbol: leverage} confirmed set by update_exchange_config; saved in state snapshot
+        self.exchange_config_applied = {}
+        # symbols, or None for account wide settings, which update_exchange_config failed to set
+        self.exchange_config_errors = set()
+        self.market_data_recorder = (
+            MarketDataRecorder(self.exchange) if self.config["record_market_data"] else None
+        )
         self.previous_execution_ts = 0
         self.recent_fill = False
+        # set by websocket handlers and minute rollover; execution_loop waits on it
+        self.execution_scheduled = asyncio.Event()
+        # {symbol: [price]} of ideal orders from last calc; tickers crossing them trigger execution
+        # for symbols without open orders
+        self.ideal_orders_prices = {}
         self.execution_delay_millis = max(3000.0, self.config["execution_delay_seconds"] * 1000)
         self.force_update_age_millis = 60 * 1000  # force update once a minute
         logging.basicConfig(
@@ -201,10 +238,34 @@ class Passivbot:
                     ]:
                         self.live_configs[symbol][pside][key] = 0.0
 
-        for f in ["exchange_config", "emas", "positions", "open_orders", "pnls"]:
+        self.state_snapshot = self.load_state_snapshot()
+        self.restore_positions_and_orders()
+        if self.exchange_config_unchanged():
+            logging.info("exchange config unchanged since last run, skipping")
+            self.exchange_config_applied = self.state_snapshot["exchange_config"]
+        else:
+            self.exchange_config_errors = set()
+            res = await self.update_exchange_config()
+            logging.info(f"initiating exchange_config {res}")
+            self.exchange_config_applied = (
+                {}
+                if None in self.exchange_config_errors
+                else {
+                    sym: self.live_configs[sym]["leverage"]
+                    for sym in self.live_configs
+                    if sym not in self.exchange_config_errors
+                }
+            )
+        for f in ["emas", "positions", "open_orders", "pnls"]:
             res = await getattr(self, f"update_{f}")()
             logging.info(f"initiating {f} {res}")
+            if f in ["positions", "open_orders"] and not res and self.state_snapshot:
+                # don't trade on positions and orders restored from a snapshot up to hours old
+                raise Exception(f"failed to update {f} restored from state snapshot")
         self.set_wallet_exposure_limits()
+        # compile numba functions of the execution path now, not while websockets are running
+        self.calc_orders_to_cancel_and_create()
+        self.dump_state_snapshot()
 
     async def get_active_symbols(self):
         # get symbols with open orders and/or positions
@@ -298,6 +359,10 @@ class Passivbot:
                 self.live_configs[symbol][pside]["wallet_exposure_limit"] = max(
                     self.live_configs[symbol][pside]["wallet_exposure_limit"], 0.01
                 )
+            if self.live_configs_arr is not None:
+                self.live_configs_arr[:, 16, 0 if pside == "long" else 1] = [
+                    self.live_configs[s][pside]["wallet_exposure_limit"] for s in self.order_symbols
+                ]
 
     def add_new_order(self, order, source="WS"):
         try:
@@ -342,13 +407,16 @@ class Passivbot:
                         f"   filled {upd['symbol']: <{self.sym_padding}} {upd['side']} {upd['qty']} {upd['position_side']} @ {upd['price']} source: WS"
                     )
                     self.recent_fill = True
+                    self.execution_scheduled.set()
                 elif upd["status"] in ["canceled", "expired"]:
                     # remove order from open_orders
-                    self.remove_cancelled_order(upd)
+                    if self.remove_cancelled_order(upd):
+                        self.execution_scheduled.set()
                     self.upd_timestamps["open_orders"][upd["symbol"]] = utc_ms()
                 elif upd["status"] == "open":
                     # add order to open_orders
-                    self.add_new_order(upd)
+                    if self.add_new_order(upd):
+                        self.execution_scheduled.set()
                     self.upd_timestamps["open_orders"][upd["symbol"]] = utc_ms()
                 else:
                     print("debug open orders unknown type", upd)
@@ -369,14 +437,39 @@ class Passivbot:
 
     def handle_ticker_update(self, upd):
         self.upd_timestamps["tickers"][upd["symbol"]] = utc_ms()  # update timestamp
+        if self.market_data_recorder is not None and upd["last"]:
+            # recorded under backtester's symbol format, e.g. BTCUSDT
+            self.market_data_recorder.update(
+                upd["symbol"].replace(f"/{self.quote}:{self.quote}", self.quote),
+                upd["last"],
+                upd.get("timestamp") or utc_ms(),
+            )
         if (
             upd["bid"] != self.tickers[upd["symbol"]]["bid"]
             or upd["ask"] != self.tickers[upd["symbol"]]["ask"]
         ):
             ticker_new = {k: upd[k] for k in ["bid", "ask", "last"]}
             # print(f"ticker changed {upd['symbol']: <16} {self.tickers[upd['symbol']]} -> {ticker_new}")
+            if self.ticker_crossed_orders(upd["symbol"], self.tickers[upd["symbol"]], ticker_new):
+                self.execution_scheduled.set()
             self.tickers[upd["symbol"]] = ticker_new
 
+    def ticker_crossed_orders(self, symbol: str, ticker_old: dict, ticker_new: dict) -> bool:
+        # true if the price moved across one of the symbol's open orders. For symbols without open
+        # orders, true if it moved across one of the ideal orders of last calc, e.g. the initial
+        # entry; ideal orders moving with EMAs are recalculated on each minute rollover
+        if self.open_orders.get(symbol):
+            order_prices = [order["price"] for order in self.open_orders[symbol]]
+        elif symbol in self.ideal_orders_prices:
+            order_prices = self.ideal_orders_prices[symbol]
+        else:
+            return True  # ideal orders not yet calculated
+        prices = [x for x in ticker_old.values() if x] + [x for x in ticker_new.values() if x]
+        if not prices:
+            return False
+        low, high = min(prices), max(prices)
+        return any(low <= price <= high for price in order_prices)
+
     def calc_upnl_sum(self):
         try:
             self.upnls = {}
@@ -402,10 +495,72 @@ class Passivbot:
             traceback.print_exc()
             return 0.0
 
+    def init_pnls_cumsum(self):
+        """
+        Running cumsum of self.pnls and a monotonic queue of its peaks within the lookback window,
+        so the drop since pnl peak used for the auto unstuck allowance is O(1) per cycle.
+        """
+        self.pnls_cumsum_running = 0.0
+        self.pnls_cumsum_peaks = deque()  # [(pnl seq no, cumsum)], cumsums decreasing
+        self.pnls_cumsum_seq_start = 0  # seq no of oldest pnl in window
+        self.pnls_cumsum_seq_end = 0  # seq no of next pnl
+        self.append_pnls_cumsum(self.pnls)
+
+    def append_pnls_cumsum(self, pnls: [dict]):
+        for elm in pnls:
+            self.pnls_cumsum_running += elm["pnl"]
+            while (
+                self.pnls_cumsum_peaks
+                and self.pnls_cumsum_peaks[-1][1] <= self.pnls_cumsum_running
+            ):
+                self.pnls_cumsum_peaks.pop()
+            self.pnls_cumsum_peaks.append((self.pnls_cumsum_seq_end, self.pnls_cumsum_running))
+            self.pnls_cumsum_seq_end += 1
+
+    def evict_pnls_cumsum(self, n: int):
+        # drop n oldest pnls from window
+        self.pnls_cumsum_seq_start += n
+        while self.pnls_cumsum_peaks and self.pnls_cumsum_peaks[0][0] < self.pnls_cumsum_seq_start:
+            self.pnls_cumsum_peaks.popleft()
+
+    def sync_pnls_cumsum(self, prev_pnls: [dict], age_limit: float):
+        """
+        Bring pnls cumsum up to date after self.pnls was replaced.
+        Fast path when old pnls were only evicted from the front and new pnls appended,
+        else rebuild from scratch.
+        """
+        n_evicted = 0
+        while n_evicted < len(prev_pnls) and prev_pnls[n_evicted]["timestamp"] <= age_limit:
+            n_evicted += 1
+        n_kept = len(prev_pnls) - n_evicted
+        if (
+            # window out of step with prev_pnls, e.g. self.pnls replaced without sync
+            self.pnls_cumsum_seq_end - self.pnls_cumsum_seq_start != len(prev_pnls)
+            or n_kept > len(self.pnls)
+            or (
+                n_kept > 0
+                and (
+                    self.pnls[0] is not prev_pnls[n_evicted]
+                    or self.pnls[n_kept - 1] is not prev_pnls[-1]
+                )
+            )
+        ):
+            self.init_pnls_cumsum()
+            return
+        self.evict_pnls_cumsum(n_evicted)
+        self.append_pnls_cumsum(self.pnls[n_kept:])
+
+    def calc_pnls_drop_since_peak(self) -> float:
+        # same as pnls cumsum max - pnls cumsum last, over pnls in window
+        if not self.pnls_cumsum_peaks:
+            return 0.0
+        return self.pnls_cumsum_peaks[0][1] - self.pnls_cumsum_running
+
     async def update_pnls(self):
         # fetch latest pnls
         # dump new pnls to cache
         age_limit = utc_ms() - 1000 * 60 * 60 * 24 * self.config["pnls_max_lookback_days"]
+        prev_pnls = self.pnls
         missing_pnls = []
         if len(self.pnls) == 0:
             # load pnls from cache
@@ -417,14 +572,21 @@ class Passivbot:
                 logging.error(f"error loading {self.pnls_cache_filepath} {e}")
             # fetch pnls since latest timestamp
             if len(pnls_cache) > 0:
-                if pnls_cache[0]["timestamp"] > age_limit + 1000 * 60 * 60 * 4:
+                # a previous backfill may have found no pnls between age limit and first pnl
+                self.pnls_covered_since = min(
+                    pnls_cache[0]["timestamp"],
+                    self.state_snapshot.get("pnls_covered_since", pnls_cache[0]["timestamp"]),
+                )
+                if self.pnls_covered_since > age_limit + 1000 * 60 * 60 * 4:
                     # fetch missing pnls
-                    res = await self.fetch_pnls(
-                        start_time=age_limit - 1000, end_time=pnls_cache[0]["timestamp"]
-                    )
+                    with priority(PRIORITY_BACKGROUND):
+                        res = await self.fetch_pnls(
+                            start_time=age_limit - 1000, end_time=pnls_cache[0]["timestamp"]
+                        )
                     if res in [None, False]:
                         return False
                     missing_pnls = res
+                    self.pnls_covered_since = age_limit
                     pnls_cache = sorted(
                         {
                             elm["id"]: elm
@@ -434,15 +596,22 @@ class Passivbot:
                         key=lambda x: x["timestamp"],
                     )
             self.pnls = pnls_cache
+            # cached pnls enter the cumsum window here, whether or not the fetch below succeeds
+            self.init_pnls_cumsum()
+            prev_pnls = self.pnls
         start_time = self.pnls[-1]["timestamp"] if self.pnls else age_limit
-        res = await self.fetch_pnls(start_time=start_time)
+        with priority(PRIORITY_BACKGROUND):
+            res = await self.fetch_pnls(start_time=start_time)
         if res in [None, False]:
             return False
+        if start_time == age_limit:
+            self.pnls_covered_since = age_limit
         new_pnls = [x for x in res if x["id"] not in {elm["id"] for elm in self.pnls}]
         self.pnls = sorted(
             {elm["id"]: elm for elm in self.pnls + new_pnls if elm["timestamp"] > age_limit}.values(),
             key=lambda x: x["timestamp"],
         )
+        self.sync_pnls_cumsum(prev_pnls, age_limit)
         if new_pnls:
             new_income = sum([x["pnl"] for x in new_pnls])
             if new_income != 0.0:
@@ -603,94 +772,61 @@ class Passivbot:
         now_minute = int(utc_ms() // (1000 * 60) * (1000 * 60))
         if now_minute <= self.ema_minute:
             return True
-        while self.ema_minute < int(round(now_minute - 1000 * 60)):
-            for symbol in self.symbols:
-                self.emas_long[symbol] = calc_ema(
-                    self.alphas_long[symbol],
-                    self.alphas__long[symbol],
-                    self.emas_long[symbol],
-                    self.prev_prices[symbol],
-                )
-                self.emas_short[symbol] = calc_ema(
-                    self.alphas_short[symbol],
-                    self.alphas__short[symbol],
-                    self.emas_short[symbol],
-                    self.prev_prices[symbol],
-                )
-            self.ema_minute += 1000 * 60
-        for symbol in self.symbols:
-            self.emas_long[symbol] = calc_ema(
-                self.alphas_long[symbol],
-                self.alphas__long[symbol],
-                self.emas_long[symbol],
-                self.tickers[symbol]["last"],
-            )
-            self.emas_short[symbol] = calc_ema(
-                self.alphas_short[symbol],
-                self.alphas__short[symbol],
-                self.emas_short[symbol],
-                self.tickers[symbol]["last"],
-            )
-            self.prev_prices[symbol] = self.tickers[symbol]["last"]
-
+        # EMA state is dense: self.emas[i, 0] is long, self.emas[i, 1] is short, 3 spans each.
+        # Missed minutes are caught up in one step, using previous price as close for each:
+        # n updates with constant price p gives p + (ema - p) * alpha_ ** n
+        n_missed = int(round((now_minute - 1000 * 60 - self.ema_minute) / (1000 * 60)))
+        if n_missed > 0:
+            prev_prices = self.ema_prev_prices[:, None, None]
+            self.emas[:] = prev_prices + (self.emas - prev_prices) * self.ema_alphas_**n_missed
+        last_prices = np.array([self.tickers[symbol]["last"] for symbol in self.ema_symbols])
+        self.emas[:] = self.ema_alphas * last_prices[:, None, None] + self.ema_alphas_ * self.emas
+        self.ema_prev_prices[:] = last_prices
         self.ema_minute = now_minute
         return True
 
     async def init_emas(self):
-        self.ema_spans_long, self.alphas_long, self.alphas__long, self.emas_long = {}, {}, {}, {}
-        self.ema_spans_short, self.alphas_short, self.alphas__short, self.emas_short = {}, {}, {}, {}
+        # dense EMA state of shape (n_symbols, 2 (long, short), 3 spans)
+        # self.emas_long[sym] and self.emas_short[sym] are views into self.emas
+        self.ema_symbols = list(self.symbols)
+        n_symbols = len(self.ema_symbols)
+        self.ema_spans = np.zeros((n_symbols, 2, 3))
+        for i, sym in enumerate(self.ema_symbols):
+            for j, pside in enumerate(["long", "short"]):
+                spans = [
+                    self.live_configs[sym][pside]["ema_span_0"],
+                    self.live_configs[sym][pside]["ema_span_1"],
+                ]
+                self.ema_spans[i, j] = sorted(spans + [(spans[0] * spans[1]) ** 0.5])
+        self.ema_alphas = 2 / (self.ema_spans + 1)
+        self.ema_alphas_ = 1 - self.ema_alphas
         self.ema_minute = int(utc_ms() // (1000 * 60) * (1000 * 60))
-        self.prev_prices = {}
-        for sym in self.symbols:
-            self.ema_spans_long[sym] = [
-                self.live_configs[sym]["long"]["ema_span_0"],
-                self.live_configs[sym]["long"]["ema_span_1"],
-            ]
-            self.ema_spans_long[sym] = numpyize(
-                sorted(
-                    self.ema_spans_long[sym]
-                    + [(self.ema_spans_long[sym][0] * self.ema_spans_long[sym][1]) ** 0.5]
-                )
-            )
-            self.ema_spans_short[sym] = [
-                self.live_configs[sym]["short"]["ema_span_0"],
-                self.live_configs[sym]["short"]["ema_span_1"],
-            ]
-            self.ema_spans_short[sym] = numpyize(
-                sorted(
-                    self.ema_spans_short[sym]
-                    + [(self.ema_spans_short[sym][0] * self.ema_spans_short[sym][1]) ** 0.5]
-                )
-            )
-
-            self.alphas_long[sym] = 2 / (self.ema_spans_long[sym] + 1)
-            self.alphas__long[sym] = 1 - self.alphas_long[sym]
-            self.alphas_short[sym] = 2 / (self.ema_spans_short[sym] + 1)
-            self.alphas__short[sym] = 1 - self.alphas_short[sym]
         if self.tickers[next(iter(self.symbols))]["last"] == 0.0:
             logging.info(f"updating tickers...")
             await self.update_tickers()
-        for sym in self.symbols:
-            self.emas_long[sym] = np.repeat(self.tickers[sym]["last"], 3)
-            self.emas_short[sym] = np.repeat(self.tickers[sym]["last"], 3)
-            self.prev_prices[sym] = self.tickers[sym]["last"]
+        self.ema_prev_prices = np.array([self.tickers[sym]["last"] for sym in self.ema_symbols])
+        self.emas = np.repeat(self.ema_prev_prices, 6).reshape(n_symbols, 2, 3)
+        self.emas_long = {sym: self.emas[i, 0] for i, sym in enumerate(self.ema_symbols)}
+        self.emas_short = {sym: self.emas[i, 1] for i, sym in enumerate(self.ema_symbols)}
+        idxs_to_fetch = await self.restore_emas()
+        if not idxs_to_fetch:
+            return True
         ohs = None
         try:
-            logging.info(f"fetching 15 min ohlcv for all symbols, initiating EMAs.")
-            sym_list = list(self.symbols)
-            ohs = await asyncio.gather(
-                *[self.fetch_ohlcv(symbol, timeframe="15m") for symbol in sym_list]
+            logging.info(
+                f"fetching 15 min ohlcv for {len(idxs_to_fetch)} symbols, initiating EMAs."
             )
-            samples_1m = [
-                calc_samples(numpyize(oh)[:, [0, 5, 4]], sample_size_ms=60000) for oh in ohs
-            ]
-            for i in range(len(sym_list)):
-                self.emas_long[sym_list[i]] = calc_emas_last(
-                    samples_1m[i][:, 2], self.ema_spans_long[sym_list[i]]
-                )
-                self.emas_short[sym_list[i]] = calc_emas_last(
-                    samples_1m[i][:, 2], self.ema_spans_short[sym_list[i]]
+            with priority(PRIORITY_BACKGROUND):
+                ohs = await asyncio.gather(
+                    *[
+                        self.fetch_ohlcv(self.ema_symbols[i], timeframe="15m")
+                        for i in idxs_to_fetch
+                    ]
                 )
+            for i, oh in zip(idxs_to_fetch, ohs):
+                samples_1m = calc_samples(numpyize(oh)[:, [0, 5, 4]], sample_size_ms=60000)
+                for j in range(2):
+                    self.emas[i, j] = calc_emas_last(samples_1m[:, 2], self.ema_spans[i, j])
             return True
         except Exception as e:
             logging.error(
@@ -698,6 +834,126 @@ class Passivbot:
             )
             traceback.print_exc()
 
+    async def restore_emas(self) -> [int]:
+        """
+        Restore EMAs from state snapshot and bring them up to the current minute.
+        Short gaps are caught up with last known price, longer gaps with 1m ohlcv closes.
+        Returns indices of symbols whose EMAs could not be restored.
+        """
+        snapshot_emas = self.state_snapshot.get("emas", {})
+        restored = [
+            i
+            for i, sym in enumerate(self.ema_symbols)
+            if sym in snapshot_emas and np.allclose(snapshot_emas[sym]["spans"], self.ema_spans[i])
+        ]
+        if not restored:
+            return list(range(len(self.ema_symbols)))
+        snapshot_minute = self.state_snapshot["ema_minute"]
+        n_missed = int(round((self.ema_minute - snapshot_minute) / (1000 * 60)))
+        for i in restored:
+            self.emas[i] = snapshot_emas[self.ema_symbols[i]]["emas"]
+            self.ema_prev_prices[i] = snapshot_emas[self.ema_symbols[i]]["prev_price"]
+        if n_missed > WARM_START_MAX_GAP_NO_FETCH_MINUTES:
+            logging.info(
+                f"fetching {n_missed} missed minutes of 1m ohlcv for {len(restored)} symbols"
+            )
+            try:
+                with priority(PRIORITY_BACKGROUND):
+                    ohs = await asyncio.gather(
+                        *[self.fetch_ohlcv(self.ema_symbols[i], timeframe="1m") for i in restored]
+                    )
+            except Exception as e:
+                logging.error(f"error fetching 1m ohlcvs for EMA gap {e}")
+                ohs = [None] * len(restored)
+            for i, oh in zip(restored[:], ohs):
+                if not oh or oh[0][0] > snapshot_minute + 1000 * 60:
+                    # gap not covered by fetched ohlcvs; initiate from scratch
+                    restored.remove(i)
+                    self.ema_prev_prices[i] = self.tickers[self.ema_symbols[i]]["last"]
+                    continue
+                for x in oh:
+                    if snapshot_minute < x[0] < self.ema_minute:
+                        self.emas[i] = (
+                            self.ema_alphas[i] * x[4] + self.ema_alphas_[i] * self.emas[i]
+                        )
+                        self.ema_prev_prices[i] = x[4]
+        elif n_missed > 0:
+            # same catch up as update_emas
+            prev_prices = self.ema_prev_prices[restored, None, None]
+            alphas_ = self.ema_alphas_[restored]
+            self.emas[restored] = (
+                prev_prices + (self.emas[restored] - prev_prices) * alphas_**n_missed
+            )
+        logging.info(f"restored EMAs of {len(restored)} symbols from state snapshot")
+        return [i for i in range(len(self.ema_symbols)) if i not in restored]
+
+    def load_state_snapshot(self) -> dict:
+        """State snapshot of previous run, or empty dict if missing or too old."""
+        try:
+            if not os.path.exists(self.state_snapshot_filepath):
+                return {}
+            snapshot = json.load(open(self.state_snapshot_filepath))
+            age_minutes = (utc_ms() - snapshot["timestamp"]) / (1000 * 60)
+            if age_minutes > self.config["warm_start_max_age_minutes"]:
+                logging.info(f"state snapshot is {age_minutes:.1f} minutes old, ignoring")
+                return {}
+            logging.info(f"loaded state snapshot from {age_minutes:.1f} minutes ago")
+            return snapshot
+        except Exception as e:
+            logging.error(f"error loading state snapshot {self.state_snapshot_filepath} {e}")
+            return {}
+
+    def dump_state_snapshot(self):
+        # compact state for warm start: EMAs, exchange config, pnls cursor, positions and orders
+        try:
+            snapshot = {
+                "timestamp": utc_ms(),
+                "ema_minute": self.ema_minute,
+                "emas": {
+                    sym: {
+                        "spans": self.ema_spans[i].tolist(),
+                        "emas": self.emas[i].tolist(),
+                        "prev_price": float(self.ema_prev_prices[i]),
+                    }
+                    for i, sym in enumerate(self.ema_symbols)
+                },
+                "exchange_config": self.exchange_config_applied,
+                "pnls_covered_since": self.pnls_covered_since,
+                "balance": self.balance,
+                "positions": self.positions,
+                "open_orders": self.open_orders,
+            }
+            if snapshot["pnls_covered_since"] is None:
+                del snapshot["pnls_covered_since"]
+            tmp_filepath = self.state_snapshot_filepath + ".tmp"
+            json.dump(denumpyize(snapshot), open(tmp_filepath, "w"))
+            os.replace(tmp_filepath, self.state_snapshot_filepath)
+        except Exception as e:
+            logging.error(f"error dumping state snapshot {self.state_snapshot_filepath} {e}")
+
+    def restore_positions_and_orders(self):
+        # last known positions and open orders; update_positions and update_open_orders
+        # then log any differences to the exchange's state
+        for sym in self.positions:
+            if sym in self.state_snapshot.get("positions", {}):
+                self.positions[sym] = self.state_snapshot["positions"][sym]
+            if sym in self.state_snapshot.get("open_orders", {}):
+                self.open_orders[sym] = self.state_snapshot["open_orders"][sym]
+        if "balance" in self.state_snapshot:
+            self.balance = self.state_snapshot["balance"]
+
+    def on_exchange_config_error(self, symbol: str = None):
+        # called by update_exchange_config; failed settings are set again on next start
+        self.exchange_config_errors.add(symbol)
+
+    def exchange_config_unchanged(self) -> bool:
+        # leverage and margin mode persist on exchange; no need to set them again
+        prev = self.state_snapshot.get("exchange_config", {})
+        return len(prev) > 0 and all(
+            sym in prev and prev[sym] == self.live_configs[sym]["leverage"]
+            for sym in self.live_configs
+        )
+
     def calc_ideal_orders(self):
         unstuck_close_order = None
         stuck_positions = []
@@ -739,9 +995,10 @@ class Passivbot:
             sym, pside, pprice_diff = sorted(stuck_positions, key=lambda x: x[2])[0]
             AU_allowance = (
                 calc_AU_allowance(
-                    np.array([x["pnl"] for x in self.pnls]),
+                    np.array([0.0]),
                     self.balance,
                     loss_allowance_pct=self.config["loss_allowance_pct"],
+                    drop_since_peak_abs=self.calc_pnls_drop_since_peak(),
                 )
                 if len(self.pnls) > 0
                 else 0.0
@@ -820,222 +1077,112 @@ class Passivbot:
                 except:
                     self.prev_AU_print_ms = 0.0
 
+        if self.live_configs_arr is None or len(self.order_symbols) != len(self.symbols):
+            self.init_order_arrays()
+        self.update_order_arrays()
+        if unstuck_close_order is None:
+            unstuck_close = (-1, -1, 0.0, 0.0)
+        else:
+            logging.debug(
+                f"creating unstucking order for {unstuck_close_order['symbol']} "
+                + f"{unstuck_close_order['position_side']}: {unstuck_close_order['order']}"
+            )
+            unstuck_close = (
+                self.order_symbols.index(unstuck_close_order["symbol"]),
+                0 if unstuck_close_order["position_side"] == "long" else 1,
+                unstuck_close_order["order"][0],
+                unstuck_close_order["order"][1],
+            )
+        symbol_idxs, qtys, prices, types = calc_ideal_orders_multi(
+            self.balance,
+            self.positions_arr,
+            self.tickers_arr[:, 0],
+            self.tickers_arr[:, 1],
+            self.tickers_arr[:, 2],
+            self.emas_arr[:, 0],
+            self.emas_arr[:, 1],
+            self.live_configs_arr,
+            self.modes_arr,
+            self.hedge_mode,
+            self.inverse,
+            self.market_specifics_arr[:, 0],
+            self.market_specifics_arr[:, 1],
+            self.market_specifics_arr[:, 2],
+            self.market_specifics_arr[:, 3],
+            self.market_specifics_arr[:, 4],
+            unstuck_close,
+        )
         ideal_orders = {symbol: [] for symbol in self.symbols}
-        for symbol in self.symbols:
-            if self.hedge_mode:
-                do_long = (
-                    self.live_configs[symbol]["long"]["enabled"]
-                    or self.positions[symbol]["long"]["size"] != 0.0
-                )
-                do_short = (
-                    self.live_configs[symbol]["short"]["enabled"]
-                    or self.positions[symbol]["short"]["size"] != 0.0
-                )
-            else:
-                no_pos = (
-                    self.positions[symbol]["long"]["size"] == 0.0
-                    and self.positions[symbol]["short"]["size"] == 0.0
-                )
-                do_long = (no_pos and self.live_configs[symbol]["long"]["enabled"]) or self.positions[
-                    symbol
-                ]["long"]["size"] != 0.0
-                do_short = (
-                    no_pos and self.live_configs[symbol]["short"]["enabled"]
-                ) or self.positions[symbol]["short"]["size"] != 0.0
-            if self.live_configs[symbol]["long"]["mode"] == "panic":
-                if self.positions[symbol]["long"]["size"] != 0.0:
-                    # if in panic mode, only one close order at current market price
-                    ideal_orders[symbol].append(
-                        (
-                            -abs(self.positions[symbol]["long"]["size"]),
-                            self.tickers[symbol]["ask"],
-                            "panic_close_long",
-                        )
-                    )
-                # otherwise, no orders
-            elif (
-                self.live_configs[symbol]["long"]["mode"] == "graceful_stop"
-                and self.positions[symbol]["long"]["size"] == 0.0
-            ):
-                # if graceful stop and no pos, don't open new pos
-                pass
-            elif do_long:
-                entries_long = calc_recursive_entries_long(
-                    self.balance,
-                    self.positions[symbol]["long"]["size"],
-                    self.positions[symbol]["long"]["price"],
-                    self.tickers[symbol]["bid"],
-                    self.emas_long[symbol].min(),
-                    self.inverse,
-                    self.qty_steps[symbol],
-                    self.price_steps[symbol],
-                    self.min_qtys[symbol],
-                    self.min_costs[symbol],
-                    self.c_mults[symbol],
-                    self.live_configs[symbol]["long"]["initial_qty_pct"],
-                    self.live_configs[symbol]["long"]["initial_eprice_ema_dist"],
-                    self.live_configs[symbol]["long"]["ddown_factor"],
-                    self.live_configs[symbol]["long"]["rentry_pprice_dist"],
-                    self.live_configs[symbol]["long"]["rentry_pprice_dist_wallet_exposure_weighting"],
-                    self.live_configs[symbol]["long"]["wallet_exposure_limit"],
-                    self.live_configs[symbol]["long"]["auto_unstuck_ema_dist"],
-                    self.live_configs[symbol]["long"]["auto_unstuck_wallet_exposure_threshold"],
-                    self.live_configs[symbol]["long"]["auto_unstuck_delay_minutes"]
-                    or self.live_configs[symbol]["long"]["auto_unstuck_qty_pct"],
-                )
-                if (
-                    unstuck_close_order is not None
-                    and unstuck_close_order["symbol"] == symbol
-                    and unstuck_close_order["position_side"] == "long"
-                ):
-                    ideal_orders[symbol].append(unstuck_close_order["order"])
-                    psize_ = max(
-                        0.0,
-                        round_(
-                            abs(self.positions[symbol]["long"]["size"])
-                            - abs(unstuck_close_order["order"][0]),
-                            self.qty_steps[symbol],
-                        ),
-                    )
-                    logging.debug(
-                        f"creating unstucking order for {symbol} long: {unstuck_close_order['order']}"
-                    )
-                else:
-                    psize_ = self.positions[symbol]["long"]["size"]
-                closes_long = calc_close_grid_long(
-                    self.live_configs[symbol]["long"]["backwards_tp"],
-                    self.balance,
-                    psize_,
-                    self.positions[symbol]["long"]["price"],
-                    self.tickers[symbol]["ask"],
-                    self.emas_long[symbol].max(),
-                    0,
-                    0,
-                    self.inverse,
-                    self.qty_steps[symbol],
-                    self.price_steps[symbol],
-                    self.min_qtys[symbol],
-                    self.min_costs[symbol],
-                    self.c_mults[symbol],
-                    self.live_configs[symbol]["long"]["wallet_exposure_limit"],
-                    self.live_configs[symbol]["long"]["min_markup"],
-                    self.live_configs[symbol]["long"]["markup_range"],
-                    self.live_configs[symbol]["long"]["n_close_orders"],
-                    self.live_configs[symbol]["long"]["auto_unstuck_wallet_exposure_threshold"],
-                    self.live_configs[symbol]["long"]["auto_unstuck_ema_dist"],
-                    self.live_configs[symbol]["long"]["auto_unstuck_delay_minutes"],
-                    self.live_configs[symbol]["long"]["auto_unstuck_qty_pct"],
-                )
-                ideal_orders[symbol] += entries_long + closes_long
-            if self.live_configs[symbol]["short"]["mode"] == "panic":
-                if self.positions[symbol]["short"]["size"] != 0.0:
-                    # if in panic mode, only one close order at current market price
-                    ideal_orders[symbol].append(
-                        (
-                            abs(self.positions[symbol]["short"]["size"]),
-                            self.tickers[symbol]["bid"],
-                            "panic_close_short",
-                        )
-                    )
-            elif (
-                self.live_configs[symbol]["short"]["mode"] == "graceful_stop"
-                and self.positions[symbol]["short"]["size"] == 0.0
-            ):
-                # if graceful stop and no pos, don't open new pos
-                pass
-            elif do_short:
-                entries_short = calc_recursive_entries_short(
-                    self.balance,
-                    self.positions[symbol]["short"]["size"],
-                    self.positions[symbol]["short"]["price"],
-                    self.tickers[symbol]["ask"],
-                    self.emas_short[symbol].max(),
-                    self.inverse,
-                    self.qty_steps[symbol],
-                    self.price_steps[symbol],
-                    self.min_qtys[symbol],
-                    self.min_costs[symbol],
-                    self.c_mults[symbol],
-                    self.live_configs[symbol]["short"]["initial_qty_pct"],
-                    self.live_configs[symbol]["short"]["initial_eprice_ema_dist"],
-                    self.live_configs[symbol]["short"]["ddown_factor"],
-                    self.live_configs[symbol]["short"]["rentry_pprice_dist"],
-                    self.live_configs[symbol]["short"][
-                        "rentry_pprice_dist_wallet_exposure_weighting"
-                    ],
-                    self.live_configs[symbol]["short"]["wallet_exposure_limit"],
-                    self.live_configs[symbol]["short"]["auto_unstuck_ema_dist"],
-                    self.live_configs[symbol]["short"]["auto_unstuck_wallet_exposure_threshold"],
-                    self.live_configs[symbol]["short"]["auto_unstuck_delay_minutes"]
-                    or self.live_configs[symbol]["short"]["auto_unstuck_qty_pct"],
-                )
-                if (
-                    unstuck_close_order is not None
-                    and unstuck_close_order["symbol"] == symbol
-                    and unstuck_close_order["position_side"] == "short"
-                ):
-                    ideal_orders[symbol].append(unstuck_close_order["order"])
-                    psize_ = -max(
-                        0.0,
-                        round_(
-                            abs(self.positions[symbol]["short"]["size"])
-                            - abs(unstuck_close_order["order"][0]),
-                            self.qty_steps[symbol],
-                        ),
-                    )
-                    logging.debug(
-                        f"creating unstucking order for {symbol} short: {unstuck_close_order['order']}"
-                    )
-                else:
-                    psize_ = self.positions[symbol]["short"]["size"]
-                closes_short = calc_close_grid_short(
-                    self.live_configs[symbol]["short"]["backwards_tp"],
-                    self.balance,
-                    psize_,
-                    self.positions[symbol]["short"]["price"],
-                    self.tickers[symbol]["bid"],
-                    self.emas_short[symbol].min(),
-                    0,
-                    0,
-                    self.inverse,
-                    self.qty_steps[symbol],
-                    self.price_steps[symbol],
-                    self.min_qtys[symbol],
-                    self.min_costs[symbol],
-                    self.c_mults[symbol],
-                    self.live_configs[symbol]["short"]["wallet_exposure_limit"],
-                    self.live_configs[symbol]["short"]["min_markup"],
-                    self.live_configs[symbol]["short"]["markup_range"],
-                    self.live_configs[symbol]["short"]["n_close_orders"],
-                    self.live_configs[symbol]["short"]["auto_unstuck_wallet_exposure_threshold"],
-                    self.live_configs[symbol]["short"]["auto_unstuck_ema_dist"],
-                    self.live_configs[symbol]["short"]["auto_unstuck_delay_minutes"],
-                    self.live_configs[symbol]["short"]["auto_unstuck_qty_pct"],
+        for i, qty, price, type_ in zip(
+            symbol_idxs.tolist(), qtys.tolist(), prices.tolist(), types.tolist()
+        ):
+            if type_ < 0:
+                # fill_type_code of a type missing from FILL_TYPES; FILL_TYPES[-1] would be wrong
+                logging.error(
+                    f"skipping order of unknown type {self.order_symbols[i]} {qty} {price}"
                 )
-                ideal_orders[symbol] += entries_short + closes_short
-
-        ideal_orders = {
-            symbol: sorted(
-                [x for x in ideal_orders[symbol] if x[0] != 0.0],
-                key=lambda x: calc_diff(x[1], self.tickers[symbol]["last"]),
-            )
-            for symbol in ideal_orders
-        }
-        return {
-            symbol: [
+                continue
+            order_type = FILL_TYPES[type_]
+            ideal_orders[self.order_symbols[i]].append(
                 {
-                    "symbol": symbol,
-                    "side": determine_side_from_order_tuple(x),
-                    "position_side": "long" if "long" in x[2] else "short",
-                    "qty": abs(x[0]),
-                    "price": x[1],
-                    "reduce_only": "close" in x[2],
-                    "custom_id": x[2],
+                    "symbol": self.order_symbols[i],
+                    "side": determine_side_from_order_tuple((qty, price, order_type)),
+                    "position_side": "long" if "long" in order_type else "short",
+                    "qty": abs(qty),
+                    "price": price,
+                    "reduce_only": "close" in order_type,
+                    "custom_id": order_type,
                 }
-                for x in ideal_orders[symbol]
-            ]
-            for symbol in ideal_orders
+            )
+        self.ideal_orders_prices = {
+            symbol: [order["price"] for order in orders] for symbol, orders in ideal_orders.items()
         }
+        return ideal_orders
+
+    def init_order_arrays(self):
+        """
+        Dense per symbol live configs, modes and market specifics for calc_ideal_orders_multi.
+        To be called again if symbols, modes or market specifics change.
+        """
+        self.order_symbols = list(self.symbols)
+        self.live_configs_arr = np.array(
+            [
+                live_config_dict_to_list_recursive_grid(self.live_configs[s])
+                for s in self.order_symbols
+            ]
+        )
+        self.modes_arr = np.array(
+            [
+                [LIVE_MODES.index(self.live_configs[s][p]["mode"]) for p in ["long", "short"]]
+                for s in self.order_symbols
+            ]
+        )
+        self.market_specifics_arr = np.array(
+            [
+                [
+                    self.qty_steps[s],
+                    self.price_steps[s],
+                    self.min_qtys[s],
+                    self.min_costs[s],
+                    self.c_mults[s],
+                ]
+                for s in self.order_symbols
+            ]
+        )
+        self.positions_arr = np.zeros((len(self.order_symbols), 2, 2))
+        self.tickers_arr = np.zeros((len(self.order_symbols), 3))  # bid, ask, last
+        self.emas_arr = np.zeros((len(self.order_symbols), 2, 3))  # emas long, emas short
+
+    def update_order_arrays(self):
+        # copy positions, tickers and emas into dense arrays
+        for i, symbol in enumerate(self.order_symbols):
+            pos = self.positions[symbol]
+            self.positions_arr[i, 0] = pos["long"]["size"], pos["long"]["price"]
+            self.positions_arr[i, 1] = pos["short"]["size"], pos["short"]["price"]
+            ticker = self.tickers[symbol]
+            self.tickers_arr[i] = ticker["bid"], ticker["ask"], ticker["last"]
+            self.emas_arr[i, 0] = self.emas_long[symbol]
+            self.emas_arr[i, 1] = self.emas_short[symbol]
 
     def calc_orders_to_cancel_and_create(self):
         ideal_orders = self.calc_ideal_orders()
@@ -1142,10 +1289,12 @@ class Passivbot:
             # format custom_id
             to_create = self.format_custom_ids(to_create)
 
-            res = await self.execute_cancellations(to_cancel)
+            with priority(PRIORITY_ORDERS):
+                res = await self.execute_cancellations(to_cancel)
             for elm in res:
                 self.remove_cancelled_order(elm, source="POST")
-            res = await self.execute_orders(to_create)
+            with priority(PRIORITY_ORDERS):
+                res = await self.execute_orders(to_create)
             for elm in res:
                 self.add_new_order(elm, source="POST")
             if to_cancel or to_create:
@@ -1156,6 +1305,66 @@ class Passivbot:
         finally:
             self.previous_execution_ts = utc_ms()
 
+    async def execute_batched(
+        self,
+        orders: [dict],
+        type_: str,
+        max_n_executions: int,
+        batch_size: int,
+        group_by_symbol: bool = True,
+    ) -> [dict]:
+        # groups orders into batches executed with getattr(self, type_ + "_batch"), concurrently.
+        # lone orders use the single request method getattr(self, type_),
+        # and a batch which fails as a whole falls back to one single request per order
+        if not orders:
+            return []
+        groups = {}
+        for order in orders[:max_n_executions]:  # sorted by PA dist
+            groups.setdefault(order["symbol"] if group_by_symbol else "", []).append(order)
+        batches = [
+            group[i : i + batch_size]
+            for group in groups.values()
+            for i in range(0, len(group), batch_size)
+        ]
+        executions = []
+        for batch in batches:
+            if len(batch) == 1:
+                executions.append(asyncio.create_task(getattr(self, type_)(batch[0])))
+            else:
+                executions.append(asyncio.create_task(getattr(self, f"{type_}_batch")(batch)))
+        results = []
+        for batch, execution in zip(batches, executions):
+            try:
+                result = await execution
+                results.extend([result] if len(batch) == 1 else result)
+            except Exception as e:
+                logging.error(f"error executing {type_}_batch {e}, falling back to single requests")
+                traceback.print_exc()
+                results.extend(await self.execute_multiple(batch, type_, len(batch)))
+        return results
+
+    def map_batch_results(
+        self, orders: [dict], executed: [dict], order_key: str, executed_key: str
+    ) -> [dict]:
+        # map batch results back to the requested orders by id, falling back to position in batch.
+        # failed orders are returned as empty dicts
+        orders_by_key = {order[order_key]: order for order in orders if order.get(order_key)}
+        results = []
+        for i, elm in enumerate(executed):
+            order = orders_by_key.get(elm.get(executed_key)) or (
+                orders[i] if i < len(orders) else None
+            )
+            if order is None or not elm.get("id") or elm.get("status") == "rejected":
+                if elm:
+                    logging.info(f"batch {executed_key} {elm.get(executed_key)} failed: {elm.get('info')}")
+                results.append({})
+                continue
+            for key in ["symbol", "side", "position_side", "qty", "price", "reduce_only"]:
+                if key in order and (key not in elm or elm[key] is None):
+                    elm[key] = order[key]
+            results.append(elm)
+        return results
+
     def format_custom_ids(self, orders: [dict]) -> [dict]:
         new_orders = []
         for order in orders:
@@ -1166,15 +1375,50 @@ class Passivbot:
         return new_orders
 
     async def execution_loop(self):
+        # executes when a fill, an open order change, a ticker crossing an open order
+        # or a minute rollover is reported, at most once per execution_delay_millis
         while True:
             if self.stop_websocket:
                 break
+            now = utc_ms()
+            millis_to_next_minute = 1000 * 60 - now % (1000 * 60)
+            try:
+                await asyncio.wait_for(
+                    self.execution_scheduled.wait(), timeout=millis_to_next_minute / 1000
+                )
+            except asyncio.TimeoutError:
+                pass
+            prev_ema_minute = self.ema_minute
             await self.update_emas()
-            if utc_ms() - self.execution_delay_millis > self.previous_execution_ts:
-                await self.execute_to_exchange()
-            await asyncio.sleep(1.0)
+            if self.ema_minute != prev_ema_minute:
+                self.execution_scheduled.set()
+                self.log_rate_limiter_metrics()
+                self.dump_state_snapshot()
+                if self.market_data_recorder is not None:
+                    self.market_data_recorder.flush()
+            if not self.execution_scheduled.is_set():
+                continue
+            while True:
+                millis_to_wait = self.previous_execution_ts + self.execution_delay_millis - utc_ms()
+                if millis_to_wait <= 0.0:
+                    break
+                await asyncio.sleep(millis_to_wait / 1000)
+            self.execution_scheduled.clear()
+            await self.execute_to_exchange()
+
+    def log_rate_limiter_metrics(self):
+        # log REST budget usage of the past minute if requests had to wait
+        metrics = self.rate_limiter.metrics(reset=True)
+        if metrics["n_delayed"] > 0 or metrics["n_rate_limit_errors"] > 0:
+            logging.info(
+                f"rate limiter: utilization {metrics['utilization']:.2f} n requests {metrics['n_requests']} "
+                + f"n delayed {metrics['n_delayed']} max wait {metrics['wait_time_max']:.2f}s "
+                + f"n rate limit errors {metrics['n_rate_limit_errors']}"
+            )
 
     async def start_bot(self):
+        # all REST calls share one budget; order executions are served before polling
+        self.rate_limiter = RateLimiter.for_ccxt(self.cca).attach_to_ccxt(self.cca)
         await self.init_bot()
         logging.info("done initiating bot")
         logging.info("starting websockets")
@@ -7,11 +7,14 @@ import pandas as pd
 import numpy as np
 import time
 from colorama import init, Fore
+from multiprocessing import Pool
 from prettytable import PrettyTable
 
 from njit_funcs import round_up, calc_pnl_long, calc_pnl_short
-from procedures import dump_live_config, make_get_filepath
-from pure_funcs import round_dynamic, denumpyize, ts_to_date
+from procedures import dump_live_config, make_get_filepath, join_cache_refreshes
+from pure_funcs import round_dynamic, denumpyize, ts_to_date, dump_df_npz
+
+PLOT_NAMES = ["whole_backtest", "balance_and_equity", "backtest_parts", "wallet_exposures"]
 
 
 def make_table(result_):
@@ -158,7 +161,16 @@ def dump_plots(
     df: pd.DataFrame,
     n_parts: int = None,
     disable_plotting: bool = False,
+    plots: list = None,
+    n_cpus: int = None,
+    export_csv: bool = False,
 ):
+    """
+    fills and stats are dumped as .npz (see pure_funcs.load_backtest_artifacts),
+    and also as .csv if export_csv.
+    plots: subset of PLOT_NAMES to render, defaults to all.
+    plots are rendered in parallel using n_cpus processes, defaults to all cpus.
+    """
     init(autoreset=True)
     plt.rcParams["figure.figsize"] = [29, 18]
     try:
@@ -172,9 +184,10 @@ def dump_plots(
     # sdf = sdf.set_index(pd.to_datetime(pd.to_datetime(sdf.timestamp * 1000 * 1000)))
     # longs = longs.set_index(pd.to_datetime(pd.to_datetime(sdf.timestamp * 1000 * 1000)))
     # shorts = shorts.set_index(pd.to_datetime(pd.to_datetime(sdf.timestamp * 1000 * 1000)))
-    longs.to_csv(result["plots_dirpath"] + "fills_long.csv")
-    shorts.to_csv(result["plots_dirpath"] + "fills_short.csv")
-    sdf.to_csv(result["plots_dirpath"] + "stats.csv")
+    for name, df_ in [("fills_long", longs), ("fills_short", shorts), ("stats", sdf)]:
+        dump_df_npz(df_, f"{result['plots_dirpath']}{name}.npz")
+        if export_csv:
+            df_.to_csv(f"{result['plots_dirpath']}{name}.csv")
     table = make_table(result)
 
     dump_live_config(result, result["plots_dirpath"] + "live_config.json")
@@ -191,81 +204,154 @@ def dump_plots(
     n_parts = (
         n_parts if n_parts is not None else min(12, max(3, int(round_up(result["n_days"] / 14, 1.0))))
     )
+    plots = PLOT_NAMES if plots is None else plots
+    n_points = 2 * int(plt.rcParams["figure.figsize"][0] * plt.rcParams["figure.dpi"])
+    if df.index.name != "timestamp":
+        df = df.set_index("timestamp")
+    jobs = []
     for side, fdf in [("long", longs), ("short", shorts)]:
-        if result[side]["enabled"]:
-            plt.clf()
-            fig = plot_fills(df, fdf, plot_whole_df=True, title=f"Overview Fills {side.capitalize()}")
-            if not fig:
+        if not result[side]["enabled"]:
+            continue
+        if "whole_backtest" in plots:
+            jobs.append(
+                {
+                    "kind": "fills",
+                    "df": downsample_min_max(df, n_points),
+                    "fdf": fdf,
+                    "title": f"Overview Fills {side.capitalize()}",
+                    "fpath": f"{result['plots_dirpath']}whole_backtest_{side}.png",
+                }
+            )
+        if "balance_and_equity" in plots:
+            jobs.append(
+                {
+                    "kind": "balance_and_equity",
+                    "sdf": sdf[[f"balance_{side}", f"equity_{side}"]],
+                    "side": side,
+                    "fpath": f"{result['plots_dirpath']}balance_and_equity_sampled_{side}.png",
+                }
+            )
+        if "backtest_parts" not in plots:
+            continue
+        dfp = df
+        if result["passivbot_mode"] == "clock":
+            dfp = join_clock_ema_bands(result, side, df)
+        for z in range(n_parts):
+            start_ = z / n_parts
+            end_ = (z + 1) / n_parts
+            fdfc = fdf.iloc[int(len(fdf) * start_) : int(len(fdf) * end_)]
+            if fdfc.empty:
+                print(f"no {side} fills...")
                 continue
-            fig.savefig(f"{result['plots_dirpath']}whole_backtest_{side}.png")
-            print(f"\nplotting balance and equity {side} {result['plots_dirpath']}...")
-            plt.clf()
-            sdf[f"balance_{side}"].plot()
-            sdf[f"equity_{side}"].plot(
-                title=f"Balance and equity {side.capitalize()}", xlabel="Time", ylabel="Balance"
+            dfc = dfp[(dfp.index >= fdfc.index[0]) & (dfp.index <= fdfc.index[-1])]
+            jobs.append(
+                {
+                    "kind": "fills",
+                    "df": downsample_min_max(dfc, n_points),
+                    "fdf": fdfc,
+                    "title": f"Fills {side} {z+1} of {n_parts}",
+                    "fpath": f"{result['plots_dirpath']}backtest_{side}{z + 1}of{n_parts}.png",
+                }
             )
-            plt.savefig(f"{result['plots_dirpath']}balance_and_equity_sampled_{side}.png")
-
-            if result["passivbot_mode"] == "clock":
-                spans = sorted(
-                    [
-                        result[side]["ema_span_0"],
-                        (result[side]["ema_span_0"] * result[side]["ema_span_1"]) ** 0.5,
-                        result[side]["ema_span_1"],
-                    ]
-                )
-                emas = pd.DataFrame(
-                    {f"ema_{span}": df.price.ewm(span=span, adjust=False).mean() for span in spans},
-                    index=df.index,
-                )
-                ema_dist_lower = result[side][
-                    "ema_dist_entry" if side == "long" else "ema_dist_close"
-                ]
-                ema_dist_upper = result[side][
-                    "ema_dist_entry" if side == "short" else "ema_dist_close"
-                ]
-                if abs(ema_dist_lower) < 0.1:
-                    df = df.join(
-                        pd.DataFrame(
-                            {"ema_band_lower": emas.min(axis=1) * (1 - ema_dist_lower)},
-                            index=df.index,
-                        )
-                    )
-                if abs(ema_dist_upper) < 0.1:
-                    df = df.join(
-                        pd.DataFrame(
-                            {"ema_band_upper": emas.max(axis=1) * (1 + ema_dist_upper)},
-                            index=df.index,
-                        )
-                    )
-            for z in range(n_parts):
-                start_ = z / n_parts
-                end_ = (z + 1) / n_parts
-                print(f"{side} {z} of {n_parts} {start_ * 100:.2f}% to {end_ * 100:.2f}%")
-                fig = plot_fills(
-                    df,
-                    fdf.iloc[int(len(fdf) * start_) : int(len(fdf) * end_)],
-                    title=f"Fills {side} {z+1} of {n_parts}",
-                )
-                if fig is not None:
-                    fig.savefig(f"{result['plots_dirpath']}backtest_{side}{z + 1}of{n_parts}.png")
-                else:
-                    print(f"no {side} fills...")
-            if result["passivbot_mode"] == "clock":
-                if "ema_band_lower" in df.columns:
-                    df = df.drop(["ema_band_lower"], axis=1)
-                if "ema_band_upper" in df.columns:
-                    df = df.drop(["ema_band_upper"], axis=1)
-
-    print("plotting wallet exposures...")
-    plt.clf()
-    sdf.wallet_exposure_short = sdf.wallet_exposure_short.abs() * -1
-    sdf[["wallet_exposure_long", "wallet_exposure_short"]].plot(
-        title="Wallet exposures: +long, -short",
-        xlabel="Time",
-        ylabel="Wallet Exposure",
+    if "wallet_exposures" in plots:
+        jobs.append(
+            {
+                "kind": "wallet_exposures",
+                "sdf": sdf[["wallet_exposure_long", "wallet_exposure_short"]],
+                "fpath": f"{result['plots_dirpath']}wallet_exposures_plot.png",
+            }
+        )
+    n_cpus = max(1, min(os.cpu_count() if n_cpus is None else n_cpus, len(jobs)))
+    print(f"rendering {len(jobs)} plots using {n_cpus} cpus to {result['plots_dirpath']}...")
+    if n_cpus == 1:
+        for job in jobs:
+            render_plot(job)
+    else:
+        join_cache_refreshes()  # no refresh thread running while forking
+        with Pool(processes=n_cpus, initializer=init_render_worker) as pool:
+            pool.map(render_plot, jobs)
+
+
+def join_clock_ema_bands(result: dict, side: str, df: pd.DataFrame) -> pd.DataFrame:
+    spans = sorted(
+        [
+            result[side]["ema_span_0"],
+            (result[side]["ema_span_0"] * result[side]["ema_span_1"]) ** 0.5,
+            result[side]["ema_span_1"],
+        ]
     )
-    plt.savefig(f"{result['plots_dirpath']}wallet_exposures_plot.png")
+    emas = pd.DataFrame(
+        {f"ema_{span}": df.price.ewm(span=span, adjust=False).mean() for span in spans},
+        index=df.index,
+    )
+    ema_dist_lower = result[side]["ema_dist_entry" if side == "long" else "ema_dist_close"]
+    ema_dist_upper = result[side]["ema_dist_entry" if side == "short" else "ema_dist_close"]
+    if abs(ema_dist_lower) < 0.1:
+        df = df.join(
+            pd.DataFrame(
+                {"ema_band_lower": emas.min(axis=1) * (1 - ema_dist_lower)},
+                index=df.index,
+            )
+        )
+    if abs(ema_dist_upper) < 0.1:
+        df = df.join(
+            pd.DataFrame(
+                {"ema_band_upper": emas.max(axis=1) * (1 + ema_dist_upper)},
+                index=df.index,
+            )
+        )
+    return df
+
+
+def downsample_min_max(df: pd.DataFrame, n_points: int, column: str = "price") -> pd.DataFrame:
+    """
+    keeps rows with min and max of column within each of n_points / 2 buckets,
+    so spikes remain visible at plot resolution
+    """
+    if len(df) <= n_points:
+        return df
+    xs = df[column].values
+    bucket_size = int(np.ceil(len(xs) / (n_points // 2)))
+    n_full = len(xs) // bucket_size * bucket_size
+    buckets = xs[:n_full].reshape(-1, bucket_size)
+    offsets = np.arange(0, n_full, bucket_size)
+    idxs = [offsets + buckets.argmin(axis=1), offsets + buckets.argmax(axis=1)]
+    if n_full < len(xs):
+        idxs.append(np.array([n_full + xs[n_full:].argmin(), n_full + xs[n_full:].argmax()]))
+    return df.iloc[np.unique(np.concatenate(idxs))]
+
+
+def init_render_worker():
+    # workers only write files; in-process rendering keeps the caller's backend
+    plt.switch_backend("Agg")
+
+
+def render_plot(job: dict):
+    # renders one plot to file, in worker process or in-process
+    plt.rcParams["figure.figsize"] = [29, 18]
+    plt.clf()
+    if job["kind"] == "fills":
+        fig = plot_fills(job["df"], job["fdf"], plot_whole_df=True, title=job["title"])
+        if fig is None:
+            return
+        fig.savefig(job["fpath"])
+    elif job["kind"] == "balance_and_equity":
+        side = job["side"]
+        job["sdf"][f"balance_{side}"].plot()
+        job["sdf"][f"equity_{side}"].plot(
+            title=f"Balance and equity {side.capitalize()}", xlabel="Time", ylabel="Balance"
+        )
+        plt.savefig(job["fpath"])
+    elif job["kind"] == "wallet_exposures":
+        sdf = job["sdf"].copy()
+        sdf.wallet_exposure_short = sdf.wallet_exposure_short.abs() * -1
+        sdf.plot(
+            title="Wallet exposures: +long, -short",
+            xlabel="Time",
+            ylabel="Wallet Exposure",
+        )
+        plt.savefig(job["fpath"])
+    plt.close("all")
 
 
 def plot_fills(df, fdf_, side: int = 0, plot_whole_df: bool = False, title=""):
@@ -1,8 +1,10 @@
+import atexit
 import glob
 import json
 import os
 import traceback
 import asyncio
+import threading
 from datetime import datetime
 from time import time
 import numpy as np
@@ -36,6 +38,15 @@ from pure_funcs import (
     date2ts_utc,
 )
 
+# market specific settings cached on disk are used without network calls until they are this old;
+# overridden with config key market_settings_cache_ttl_hours
+MARKET_SETTINGS_CACHE_TTL_HOURS = 24.0
+# stale caches are refreshed in the background, caches older than this are refreshed before use
+MARKET_SETTINGS_CACHE_MAX_AGE_HOURS = 24.0 * 7
+# seconds to wait for background cache refreshes at exit and before forking worker processes
+CACHE_REFRESH_JOIN_TIMEOUT = 30.0
+cache_refresh_threads = []
+
 
 def load_live_config(live_config_path: str) -> dict:
     try:
@@ -201,24 +212,114 @@ def prepare_optimize_config(args) -> dict:
 def add_market_specific_settings(config):
     mss = config["caches_dirpath"] + "market_specific_settings.json"
     symbol = config["symbol"]
+    cfg = {k: config[k] for k in ["exchange", "symbol", "market_type"]}
     try:
-        print(f"fetching market_specific_settings for {symbol}...")
-        market_specific_settings = fetch_market_specific_settings(config)
-        json.dump(market_specific_settings, open(mss, "w"), indent=4)
+        market_specific_settings = load_market_settings_cached(
+            mss,
+            lambda: fetch_market_specific_settings(cfg),
+            config.get("market_settings_cache_ttl_hours", MARKET_SETTINGS_CACHE_TTL_HOURS),
+        )
     except Exception as e:
         traceback.print_exc()
-        print(f"\nfailed to fetch market_specific_settings for symbol {symbol}", e, "\n")
-        try:
-            if os.path.exists(mss):
-                market_specific_settings = json.load(open(mss))
-                print("using cached market_specific_settings")
-            else:
-                raise Exception(f"no cached market_specific_settings for symbol {symbol}")
-        except:
-            raise Exception(f"failed to load cached market_specific_settings for symbol {symbol}")
+        raise Exception(f"failed to fetch market_specific_settings for symbol {symbol} {e}")
     config.update(market_specific_settings)
 
 
+def dump_json_atomic(fpath: str, data, indent=None):
+    # readers in other processes never see a partially written file
+    tmp_fpath = f"{fpath}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_fpath, "w") as f:
+        json.dump(data, f, indent=indent)
+    os.replace(tmp_fpath, fpath)
+
+
+def load_market_settings_cached(fpath: str, fetch_func, ttl_hours: float):
+    """
+    Market settings from json cache at fpath, shared by backtest, optimize, harmony_search and forager.
+    A cache younger than ttl_hours is returned as is.
+    A stale cache is returned as is and refreshed with fetch_func() in a background thread.
+    A cache older than MARKET_SETTINGS_CACHE_MAX_AGE_HOURS, or no cache, is replaced by fetch_func()
+    before returning; the old cache is only used if that fails.
+    """
+    cached = None
+    if os.path.exists(fpath):
+        try:
+            cached = json.load(open(fpath))
+            age_hours = (time() - os.path.getmtime(fpath)) / (60 * 60)
+            if age_hours <= ttl_hours:
+                return cached
+            print(f"market settings cache {fpath} is {age_hours:.1f}h old, refreshing")
+            if age_hours <= max(ttl_hours, MARKET_SETTINGS_CACHE_MAX_AGE_HOURS):
+                refresh_cache_in_background(fpath, fetch_func)
+                return cached
+        except Exception as e:
+            print(f"error loading market settings cache {fpath}", e)
+    print(f"fetching market settings, caching to {fpath}...")
+    try:
+        fetched = fetch_func()
+    except Exception as e:
+        if cached is None:
+            raise
+        print(f"failed to refresh cache {fpath}, using cached market settings", e)
+        return cached
+    dump_json_atomic(make_get_filepath(fpath), fetched, indent=4)
+    return fetched
+
+
+def refresh_cache_in_background(fpath: str, fetch_func):
+    def refresh():
+        try:
+            dump_json_atomic(fpath, fetch_func(), indent=4)
+        except Exception as e:
+            print(f"failed to refresh cache {fpath}", e)
+
+    thread = threading.Thread(target=refresh, daemon=True)
+    thread.start()
+    cache_refresh_threads.append(thread)
+
+
+@atexit.register
+def join_cache_refreshes(timeout: float = CACHE_REFRESH_JOIN_TIMEOUT):
+    """
+    Wait for background cache refreshes to finish, at most timeout seconds in total.
+    Called at exit, so short runs still update the cache, and before forking worker processes.
+    """
+    deadline = time() + timeout
+    while cache_refresh_threads:
+        thread = cache_refresh_threads.pop(0)
+        thread.join(max(0.0, deadline - time()))
+        if thread.is_alive():
+            print("cache refresh did not finish in time")
+
+
+async def load_markets_cached(cc, ttl_hours: float = MARKET_SETTINGS_CACHE_TTL_HOURS) -> dict:
+    """
+    ccxt async load_markets(), served from caches/markets/{cc.id}.json while fresh.
+    A stale cache is used if load_markets() fails, e.g. when offline.
+    """
+    fpath = make_get_filepath(f"caches/markets/{cc.id}.json")
+    cached = None
+    if os.path.exists(fpath):
+        try:
+            cached = json.load(open(fpath))
+            if (time() - os.path.getmtime(fpath)) / (60 * 60) < ttl_hours:
+                return cc.set_markets(cached)
+        except Exception as e:
+            print(f"error loading markets cache {fpath}", e)
+    try:
+        markets = await cc.load_markets()
+    except Exception as e:
+        if cached is None:
+            raise
+        print(f"failed to refresh markets cache {fpath}, using cached markets", e)
+        return cc.set_markets(cached)
+    try:
+        dump_json_atomic(fpath, markets)
+    except Exception as e:
+        print(f"error dumping markets cache {fpath}", e)
+    return markets
+
+
 def make_get_filepath(filepath: str) -> str:
     """
     if not is path, creates dir and subdirs for path, returns path
@@ -1,4 +1,5 @@
 import datetime
+import os
 import pprint
 from collections import OrderedDict
 from hashlib import sha256
@@ -6,7 +7,7 @@ from hashlib import sha256
 import json
 import numpy as np
 import dateutil.parser
-from njit_funcs import round_dynamic, qty_to_cost, calc_pnl_long, calc_pnl_short
+from njit_funcs import FILL_TYPES, round_dynamic, qty_to_cost, calc_pnl_long, calc_pnl_short
 
 try:
     import pandas as pd
@@ -683,59 +684,25 @@ def calc_sharpe_ratio(equity_series):
     return returns.mean() / std_dev if std_dev != 0.0 else 0.0
 
 
-def analyze_fills_slim(fills_long: list, fills_short: list, stats: list, config: dict) -> dict:
-    sdf = pd.DataFrame(
-        stats,
-        columns=[
-            "timestamp",
-            "bkr_price_long",
-            "bkr_price_short",
-            "psize_long",
-            "pprice_long",
-            "psize_short",
-            "pprice_short",
-            "price",
-            "closest_bkr_long",
-            "closest_bkr_short",
-            "balance_long",
-            "balance_short",
-            "equity_long",
-            "equity_short",
-        ],
-    )
-    longs = pd.DataFrame(
-        fills_long,
-        columns=[
-            "trade_id",
-            "timestamp",
-            "pnl",
-            "fee_paid",
-            "balance",
-            "equity",
-            "qty",
-            "price",
-            "psize",
-            "pprice",
-            "type",
-        ],
-    )
+def decode_fill_types(codes: np.ndarray) -> np.ndarray:
+    """Fill type codes of backtest fills to strings; unknown codes (-1) become "unknown"."""
+    return np.array(FILL_TYPES + ("unknown",), dtype=object)[codes]
+
+
+def fills_to_df(fills: np.ndarray) -> pd.DataFrame:
+    """Single symbol backtest fills, structured array of FILL_DTYPE, to DataFrame."""
+    fdf = pd.DataFrame(fills)
+    fdf["type"] = decode_fill_types(fdf["type"].values)
+    return fdf
+
+
+def analyze_fills_slim(
+    fills_long: np.ndarray, fills_short: np.ndarray, stats: np.ndarray, config: dict
+) -> dict:
+    sdf = pd.DataFrame(stats)
+    longs = fills_to_df(fills_long)
     longs.index = longs.timestamp
-    shorts = pd.DataFrame(
-        fills_short,
-        columns=[
-            "trade_id",
-            "timestamp",
-            "pnl",
-            "fee_paid",
-            "balance",
-            "equity",
-            "qty",
-            "price",
-            "psize",
-            "pprice",
-            "type",
-        ],
-    )
+    shorts = fills_to_df(fills_short)
     shorts.index = shorts.timestamp
     n_days = (sdf.timestamp.iloc[-1] - sdf.timestamp.iloc[0]) / 1000 / 60 / 60 / 24.0
     if config["inverse"]:
@@ -915,60 +882,12 @@ def analyze_fills_slim(fills_long: list, fills_short: list, stats: list, config:
 
 
 def analyze_fills(
-    fills_long: list, fills_short: list, stats: list, config: dict
+    fills_long: np.ndarray, fills_short: np.ndarray, stats: np.ndarray, config: dict
 ) -> (pd.DataFrame, pd.DataFrame, dict):
-    sdf = pd.DataFrame(
-        stats,
-        columns=[
-            "timestamp",
-            "bkr_price_long",
-            "bkr_price_short",
-            "psize_long",
-            "pprice_long",
-            "psize_short",
-            "pprice_short",
-            "price",
-            "closest_bkr_long",
-            "closest_bkr_short",
-            "balance_long",
-            "balance_short",
-            "equity_long",
-            "equity_short",
-        ],
-    )
-    longs = pd.DataFrame(
-        fills_long,
-        columns=[
-            "trade_id",
-            "timestamp",
-            "pnl",
-            "fee_paid",
-            "balance",
-            "equity",
-            "qty",
-            "price",
-            "psize",
-            "pprice",
-            "type",
-        ],
-    )
+    sdf = pd.DataFrame(stats)
+    longs = fills_to_df(fills_long)
     longs.index = longs.timestamp
-    shorts = pd.DataFrame(
-        fills_short,
-        columns=[
-            "trade_id",
-            "timestamp",
-            "pnl",
-            "fee_paid",
-            "balance",
-            "equity",
-            "qty",
-            "price",
-            "psize",
-            "pprice",
-            "type",
-        ],
-    )
+    shorts = fills_to_df(fills_short)
     shorts.index = shorts.timestamp
     n_days = (sdf.timestamp.iloc[-1] - sdf.timestamp.iloc[0]) / 1000 / 60 / 60 / 24.0
     if config["inverse"]:
@@ -1307,6 +1226,90 @@ def get_empty_analysis():
     }
 
 
+def encode_categorical(values: np.ndarray) -> (np.ndarray, np.ndarray):
+    # int codes into unique values as strings; missing values (None, NaN) get code -1
+    missing = pd.isna(values)
+    uniques, codes = np.unique(values[~missing].astype(str), return_inverse=True)
+    codes_ = np.full(len(values), -1, dtype=np.int32)
+    codes_[~missing] = codes
+    return codes_, uniques
+
+
+def decode_categorical(codes: np.ndarray, uniques: np.ndarray) -> np.ndarray:
+    # code -1 indexes the appended NaN
+    return np.append(uniques.astype(object), np.nan)[codes]
+
+
+def dump_df_npz(df, fpath: str):
+    """
+    writes dataframe as .npz, one array per column plus index, readable with load_df_npz.
+    string columns, e.g. fill types, are stored as int codes plus unique values, so no pickling.
+    missing values in string columns are loaded as NaN
+    """
+    arrays = {}
+    categorical = []
+    for col in df.columns:
+        values = np.asarray(df[col].values)
+        if values.dtype == object:
+            arrays[str(col)], arrays[f"__categories__{col}"] = encode_categorical(values)
+            categorical.append(str(col))
+        else:
+            arrays[str(col)] = values
+    index = np.asarray(df.index.values)
+    if index.dtype == object:
+        arrays["__index__"], arrays["__categories____index__"] = encode_categorical(index)
+    else:
+        arrays["__index__"] = index
+    arrays["__schema__"] = np.array(
+        json.dumps(
+            {
+                "columns": [str(c) for c in df.columns],
+                "categorical": categorical,
+                "index_name": df.index.name,
+                "index_categorical": index.dtype == object,
+            }
+        )
+    )
+    np.savez(fpath, **arrays)
+
+
+def load_df_npz(fpath: str):
+    with np.load(fpath, allow_pickle=False) as npz:
+        schema = json.loads(str(npz["__schema__"]))
+        index = npz["__index__"]
+        if schema.get("index_categorical"):
+            index = decode_categorical(index, npz["__categories____index__"])
+        df = pd.DataFrame(
+            {
+                col: (
+                    decode_categorical(npz[col], npz[f"__categories__{col}"])
+                    if col in schema["categorical"]
+                    else npz[col]
+                )
+                for col in schema["columns"]
+            },
+            index=pd.Index(index, name=schema["index_name"]),
+        )
+    return df
+
+
+def load_backtest_artifacts(dirpath: str) -> dict:
+    """
+    loads fills and stats dumped by plotting.dump_plots from backtest plots dir.
+    returns {"longs": df, "shorts": df, "sdf": df, "result": dict}, reading .npz files,
+    or .csv files from backtests dumped before binary artifacts
+    """
+    artifacts = {}
+    for key, name in [("longs", "fills_long"), ("shorts", "fills_short"), ("sdf", "stats")]:
+        if os.path.exists(os.path.join(dirpath, f"{name}.npz")):
+            artifacts[key] = load_df_npz(os.path.join(dirpath, f"{name}.npz"))
+        else:
+            artifacts[key] = pd.read_csv(os.path.join(dirpath, f"{name}.csv"), index_col=0)
+    with open(os.path.join(dirpath, "result.json")) as f:
+        artifacts["result"] = json.load(f)
+    return artifacts
+
+
 def calc_pprice_from_fills(coin_balance, fills, n_fills_limit=100):
     # assumes fills are sorted old to new
     if coin_balance == 0.0 or len(fills) == 0:
@@ -1597,74 +1600,98 @@ def strip_config(cfg: dict) -> dict:
     return template
 
 
+# keys are sorted by reverse importance
+# [(key_name, higher_is_better)]
+SCORE_KEYS = [
+    ("adg_weighted_per_exposure", True),
+    ("exposure_ratios_mean", False),
+    ("time_at_max_exposure", False),
+    ("pa_distance_mean", False),
+    ("pa_distance_std", False),
+    ("hrs_stuck_max", False),
+    ("pa_distance_1pct_worst_mean", False),
+    ("loss_profit_ratio", False),
+    ("drawdown_1pct_worst_mean", False),
+    ("drawdown_max", False),
+]
+
+
+def pack_score_metrics(results: dict, sides=("long", "short")) -> np.ndarray:
+    """Packs per symbol analyses into array of shape (n_sides, n_symbols, n_score_keys)."""
+    return np.array(
+        [
+            [[results[sym][f"{key}_{side}"] for key, _ in SCORE_KEYS] for sym in results]
+            for side in sides
+        ],
+        dtype=np.float64,
+    )
+
+
+def calc_scores_batch(config: dict, metrics: np.ndarray, sides=("long", "short")) -> dict:
+    """
+    Scores of many candidates at once.
+    metrics: array of shape (n_candidates, n_sides, n_symbols, n_score_keys), see pack_score_metrics.
+    Returns dict of arrays, scores of shape (n_candidates, n_sides).
+    """
+    n_candidates, n_sides, n_symbols, n_keys = metrics.shape
+    # maximum_ clips from below, minimum_ from above, negative threshold zeroes the key
+    vals = metrics.copy()
+    for j, side in enumerate(sides):
+        for i, (key, _) in enumerate(SCORE_KEYS):
+            raw = metrics[:, j, :, i]
+            if (max_key := f"maximum_{key}_{side}") in config:
+                thr = config[max_key]
+                vals[:, j, :, i] = np.where(raw > thr, raw, thr) if thr >= 0.0 else 0.0
+            elif (min_key := f"minimum_{key}_{side}") in config:
+                thr = config[min_key]
+                vals[:, j, :, i] = np.where(raw < thr, raw, thr) if thr >= 0.0 else 0.0
+    individual_scores = np.zeros((n_candidates, n_sides, n_symbols))
+    for i, (_, higher_is_better) in enumerate(SCORE_KEYS):
+        if higher_is_better:
+            individual_scores += vals[:, :, :, i] * (10**i)
+        else:
+            individual_scores -= vals[:, :, :, i] * (10**i)
+    individual_scores *= -1
+    n_symbols_to_include = (
+        max(1, int(n_symbols * (1 - config["clip_threshold"])))
+        if config["clip_threshold"] < 1.0
+        else int(round(config["clip_threshold"]))
+    )
+    symbols_to_include = np.argsort(individual_scores, axis=2, kind="stable")[
+        :, :, :n_symbols_to_include
+    ]
+    included = np.take_along_axis(vals, symbols_to_include[:, :, :, None], axis=2)
+    means = included.mean(axis=2)
+    scores = np.zeros((n_candidates, n_sides))
+    for i, (_, higher_is_better) in enumerate(SCORE_KEYS):
+        if higher_is_better:
+            scores += means[:, :, i] * (10**i)
+        else:
+            scores -= means[:, :, i] * (10**i)
+    scores *= -1
+    return {
+        "scores": scores,
+        "means": means,
+        "raws": metrics.mean(axis=2),
+        "individual_scores": individual_scores,
+        "symbols_to_include": symbols_to_include,
+    }
+
+
 def calc_scores(config: dict, results: dict):
     sides = ["long", "short"]
-    # keys are sorted by reverse importance
-    # [(key_name, higher_is_better)]
-    keys = [
-        ("adg_weighted_per_exposure", True),
-        ("exposure_ratios_mean", False),
-        ("time_at_max_exposure", False),
-        ("pa_distance_mean", False),
-        ("pa_distance_std", False),
-        ("hrs_stuck_max", False),
-        ("pa_distance_1pct_worst_mean", False),
-        ("loss_profit_ratio", False),
-        ("drawdown_1pct_worst_mean", False),
-        ("drawdown_max", False),
-    ]
-    means = {side: {} for side in sides}  # adjusted means
-    scores = {side: 0.0 for side in sides}
-    raws = {side: {} for side in sides}  # unadjusted means
-    individual_raws = {side: {sym: {} for sym in results} for side in sides}
-    individual_vals = {side: {sym: {} for sym in results} for side in sides}
-    individual_scores = {side: {sym: 0.0 for sym in results} for side in sides}
-    symbols_to_include = {side: [] for side in sides}
-    for side in sides:
-        for sym in results:
-            for i, (key, higher_is_better) in enumerate(keys):
-                key_side = f"{key}_{side}"
-                individual_raws[side][sym][key] = results[sym][key_side]
-                if (max_key := f"maximum_{key}_{side}") in config:
-                    if config[max_key] >= 0.0:
-                        val = max(config[max_key], results[sym][key_side])
-                    else:
-                        val = 0.0
-                elif (min_key := f"minimum_{key}_{side}") in config:
-                    if config[min_key] >= 0.0:
-                        val = min(config[min_key], results[sym][key_side])
-                    else:
-                        val = 0.0
-                else:
-                    val = results[sym][key_side]
-                individual_vals[side][sym][key] = val
-                if higher_is_better:
-                    individual_scores[side][sym] += val * (10**i)
-                else:
-                    individual_scores[side][sym] -= val * (10**i)
-            individual_scores[side][sym] *= -1
-        raws[side] = {
-            key: np.mean([individual_raws[side][sym][key] for sym in results]) for key, _ in keys
+    keys = list(SCORE_KEYS)
+    symbols = list(results)
+    res = calc_scores_batch(config, pack_score_metrics(results, sides)[None, ...], sides)
+    scores, means, raws, individual_scores, symbols_to_include = {}, {}, {}, {}, {}
+    for j, side in enumerate(sides):
+        scores[side] = float(res["scores"][0, j])
+        means[side] = {key: res["means"][0, j, i] for i, (key, _) in enumerate(keys)}  # adjusted
+        raws[side] = {key: res["raws"][0, j, i] for i, (key, _) in enumerate(keys)}  # unadjusted
+        individual_scores[side] = {
+            sym: float(res["individual_scores"][0, j, k]) for k, sym in enumerate(symbols)
         }
-        n_symbols_to_include = (
-            max(1, int(len(individual_scores[side]) * (1 - config["clip_threshold"])))
-            if config["clip_threshold"] < 1.0
-            else int(round(config["clip_threshold"]))
-        )
-        symbols_to_include[side] = sorted(
-            individual_scores[side], key=lambda x: individual_scores[side][x]
-        )[:n_symbols_to_include]
-        # print(symbols_to_include, individual_scores[side], config["clip_threshold"])
-        means[side] = {
-            key: np.mean([individual_vals[side][sym][key] for sym in symbols_to_include[side]])
-            for key, _ in keys
-        }
-        for i, (key, higher_is_better) in enumerate(keys):
-            if higher_is_better:
-                scores[side] += means[side][key] * (10**i)
-            else:
-                scores[side] -= means[side][key] * (10**i)
-        scores[side] *= -1
+        symbols_to_include[side] = [symbols[k] for k in res["symbols_to_include"][0, j]]
     return {
         "scores": scores,
         "means": means,
@@ -1765,45 +1792,38 @@ def calc_hash(data):
 
 
 def stats_multi_to_df(stats, symbols, c_mults):
-    dicts = []
-    for x in stats:
-        d = {"minute": x[0], "balance": x[4], "equity": x[5]}
-        for i in range(len(symbols)):
-            d[f"{symbols[i]}_psize_l"] = x[1][i][0]
-            d[f"{symbols[i]}_pprice_l"] = x[1][i][1]
-            d[f"{symbols[i]}_psize_s"] = x[2][i][0]
-            d[f"{symbols[i]}_pprice_s"] = x[2][i][1]
-            d[f"{symbols[i]}_price"] = x[3][i]
-
-            d[f"{symbols[i]}_upnl_pct_l"] = (
-                calc_pnl_long(
-                    d[f"{symbols[i]}_pprice_l"],
-                    d[f"{symbols[i]}_price"],
-                    d[f"{symbols[i]}_psize_l"],
-                    False,
-                    c_mults[i],
-                )
-                / d["balance"]
-            )
-            d[f"{symbols[i]}_upnl_pct_s"] = (
-                calc_pnl_short(
-                    d[f"{symbols[i]}_pprice_s"],
-                    d[f"{symbols[i]}_price"],
-                    d[f"{symbols[i]}_psize_s"],
-                    False,
-                    c_mults[i],
-                )
-                / d["balance"]
-            )
-
-        dicts.append(d)
-    sdf = pd.DataFrame(dicts).set_index("minute")
-    for s in symbols:
-        sdf_tmp = sdf[[c for c in sdf.columns if s in c or "bal" in c]]
-        sdf.loc[:, f"{s}_WE_l"] = sdf_tmp[f"{s}_psize_l"] * sdf_tmp[f"{s}_pprice_l"] / sdf.balance
-        sdf.loc[:, f"{s}_WE_s"] = (
-            sdf_tmp[f"{s}_psize_s"].abs() * sdf_tmp[f"{s}_pprice_s"] / sdf.balance
+    """
+    stats: array returned by backtest_multisymbol_recursive_grid, shape (n_rows, 3 + 5 * n_symbols)
+    columns minute, balance, equity, then per symbol psize_long, pprice_long, psize_short,
+    pprice_short and price blocks of n_symbols columns each
+    """
+    n_symbols = len(symbols)
+    columns = {
+        "minute": stats[:, 0].astype(np.int64),
+        "balance": stats[:, 1],
+        "equity": stats[:, 2],
+    }
+    for i in range(n_symbols):
+        psize_l, pprice_l, psize_s, pprice_s, price = [
+            stats[:, 3 + n_symbols * j + i] for j in range(5)
+        ]
+        columns[f"{symbols[i]}_psize_l"] = psize_l
+        columns[f"{symbols[i]}_pprice_l"] = pprice_l
+        columns[f"{symbols[i]}_psize_s"] = psize_s
+        columns[f"{symbols[i]}_pprice_s"] = pprice_s
+        columns[f"{symbols[i]}_price"] = price
+        # linear contracts; same as calc_pnl_long/short, vectorized
+        columns[f"{symbols[i]}_upnl_pct_l"] = (
+            np.abs(psize_l) * c_mults[i] * (price - pprice_l) / stats[:, 1]
+        )
+        columns[f"{symbols[i]}_upnl_pct_s"] = (
+            np.abs(psize_s) * c_mults[i] * (pprice_s - price) / stats[:, 1]
         )
+    for i in range(n_symbols):
+        psize_l, pprice_l, psize_s, pprice_s = [stats[:, 3 + n_symbols * j + i] for j in range(4)]
+        columns[f"{symbols[i]}_WE_l"] = psize_l * pprice_l / stats[:, 1]
+        columns[f"{symbols[i]}_WE_s"] = np.abs(psize_s) * pprice_s / stats[:, 1]
+    sdf = pd.DataFrame(columns).set_index("minute")
     return sdf.replace(0.0, np.nan)
 
 
@@ -1816,26 +1836,13 @@ def calc_upnl(row, c_mults_d):
 
 
 def fills_multi_to_df(fills, symbols, c_mults):
-    fdf = pd.DataFrame(
-        fills,
-        columns=[
-            "minute",
-            "symbol",
-            "pnl",
-            "fee_paid",
-            "balance",
-            "equity",
-            "qty",
-            "price",
-            "psize",
-            "pprice",
-            "type",
-            "stuckness",
-        ],
-    )
-    s2i = {symbol: i for i, symbol in enumerate(symbols)}
+    """fills: structured array of FILL_MULTI_DTYPE, with symbol as index into symbols"""
+    fdf = pd.DataFrame(fills)
+    symbol_idxs = fdf["symbol"].values
+    fdf["symbol"] = np.array(symbols, dtype=object)[symbol_idxs]
+    fdf["type"] = decode_fill_types(fdf["type"].values)
     c_mults_d = {s: c_mults[i] for i, s in enumerate(symbols)}
-    c_mults_array = fdf.symbol.apply(lambda s: c_mults[s2i[s]])
+    c_mults_array = np.array(c_mults, dtype=np.float64)[symbol_idxs]
     fdf.loc[:, "cost"] = (fdf.qty * fdf.price).abs() * c_mults_array
     fdf.loc[:, "WE"] = (fdf.psize * fdf.pprice).abs() * c_mults_array / fdf.balance
     fdf.loc[:, "upnl_pct"] = fdf.apply(lambda x: calc_upnl(x, c_mults_d), axis=1) / fdf.balance
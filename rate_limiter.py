@@ -0,0 +1,192 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+
+
+# lower value is served first
+PRIORITY_ORDERS = 0  # order creations and cancellations
+PRIORITY_DEFAULT = 1  # positions, open orders, tickers, etc.
+PRIORITY_BACKGROUND = 2  # pnls, ohlcvs and other bulk polling
+
+# priority of requests made in the current context; inherited by tasks created within it
+request_priority = contextvars.ContextVar("request_priority", default=PRIORITY_DEFAULT)
+
+# per account REST budgets for adapters not going through ccxt's cost tables.
+# refill_rate is requests per second, capacity is max burst
+EXCHANGE_RATE_LIMITS = {
+    "binance": {"refill_rate": 20.0, "capacity": 40.0},
+    "binance_spot": {"refill_rate": 10.0, "capacity": 20.0},
+    "bybit": {"refill_rate": 10.0, "capacity": 20.0},
+    "bitget": {"refill_rate": 10.0, "capacity": 20.0},
+    "okx": {"refill_rate": 10.0, "capacity": 20.0},
+    "kucoin": {"refill_rate": 10.0, "capacity": 30.0},
+    "bingx": {"refill_rate": 5.0, "capacity": 10.0},
+    "mexc": {"refill_rate": 5.0, "capacity": 10.0},
+    "default": {"refill_rate": 5.0, "capacity": 10.0},
+}
+
+# seconds to stop sending requests after exchange reports rate limit exceeded
+RATE_LIMIT_EXCEEDED_BACKOFF = 5.0
+
+
+@contextmanager
+def priority(value: int):
+    """Set the priority of all requests made within the block."""
+    token = request_priority.set(value)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+def is_rate_limit_error(e: Exception) -> bool:
+    """True if the exception is ccxt's rate limit violation (429/418) or a subclass thereof."""
+    return any(cls.__name__ in ["RateLimitExceeded", "DDoSProtection"] for cls in type(e).__mro__)
+
+
+class RateLimiter:
+    """
+    Token bucket shared by all REST requests of one account.
+    Requests wait in a priority queue instead of failing when the budget is exhausted;
+    order creations and cancellations are served before polling.
+    Like ccxt's throttler, a request is sent once tokens are non-negative and its full weight is
+    subtracted, so heavy requests put the bucket in debt instead of being capped at capacity.
+    """
+
+    def __init__(self, refill_rate: float, capacity: float, name: str = ""):
+        self.name = name
+        self.loop = None  # set by ccxt when used as its throttle
+        self.refill_rate = refill_rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self.waiters = []
+        self.wakeups = {}  # {entry: asyncio.Event}, set when entry gets to head of queue
+        self.counter = itertools.count()
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        self.window_start = time.monotonic()
+        self.n_requests = 0
+        self.n_delayed = 0
+        self.weight_spent = 0.0
+        self.wait_time_sum = 0.0
+        self.wait_time_max = 0.0
+        self.n_rate_limit_errors = 0
+
+    @classmethod
+    def for_exchange(cls, exchange: str) -> "RateLimiter":
+        limits = EXCHANGE_RATE_LIMITS.get(exchange, EXCHANGE_RATE_LIMITS["default"])
+        return cls(limits["refill_rate"], limits["capacity"], name=exchange)
+
+    @classmethod
+    def for_ccxt(cls, cc, burst: float = 5.0) -> "RateLimiter":
+        # ccxt expresses endpoint weights as costs relative to cc.rateLimit (ms per unit of cost)
+        return cls(1000.0 / cc.rateLimit, burst, name=cc.id)
+
+    def attach_to_ccxt(self, cc):
+        """Route all REST calls of a ccxt instance through this limiter, using ccxt's endpoint costs."""
+        fetch = cc.fetch
+
+        async def fetch_rate_limited(*args, **kwargs):
+            try:
+                return await fetch(*args, **kwargs)
+            except Exception as e:
+                if is_rate_limit_error(e):
+                    self.on_rate_limit_exceeded()
+                raise
+
+        cc.throttle = self
+        cc.fetch = fetch_rate_limited
+        return self
+
+    async def __call__(self, cost=None):
+        # ccxt throttle interface
+        await self.acquire(1.0 if cost is None else cost)
+
+    def check_status(self, status: int):
+        """To be called with the HTTP status of raw REST responses."""
+        if status in [418, 429]:
+            self.on_rate_limit_exceeded()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_rate)
+        self.last_refill = now
+
+    def wake_next(self):
+        # only the head of the queue waits on the bucket; the others sleep until woken here
+        if self.waiters:
+            self.wakeups[self.waiters[0]].set()
+
+    async def acquire(self, weight: float = 1.0, priority_: int = None):
+        """Wait until the request of given weight may be sent."""
+        entry = (request_priority.get() if priority_ is None else priority_, next(self.counter))
+        wakeup = asyncio.Event()
+        self.wakeups[entry] = wakeup
+        heapq.heappush(self.waiters, entry)
+        start = time.monotonic()
+        try:
+            while True:
+                if self.waiters[0] != entry:
+                    # let the requests ahead in queue go first
+                    wakeup.clear()
+                    await wakeup.wait()
+                    continue
+                self.refill()
+                now = time.monotonic()
+                if self.tokens >= 0.0 and now >= self.blocked_until:
+                    heapq.heappop(self.waiters)
+                    self.tokens -= weight
+                    break
+                await asyncio.sleep(
+                    max(-self.tokens / self.refill_rate, self.blocked_until - now, 0.001)
+                )
+        except BaseException:
+            if entry in self.waiters:
+                was_head = self.waiters[0] == entry
+                self.waiters.remove(entry)
+                heapq.heapify(self.waiters)
+                if was_head:
+                    self.wake_next()
+            raise
+        finally:
+            del self.wakeups[entry]
+        self.wake_next()
+        waited = time.monotonic() - start
+        self.n_requests += 1
+        self.weight_spent += weight
+        if waited > 0.001:
+            self.n_delayed += 1
+            self.wait_time_sum += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+
+    def on_rate_limit_exceeded(self, backoff: float = RATE_LIMIT_EXCEEDED_BACKOFF):
+        """Empty the bucket and hold all queued requests for backoff seconds."""
+        self.n_rate_limit_errors += 1
+        self.tokens = min(self.tokens, 0.0)
+        self.blocked_until = max(self.blocked_until, time.monotonic() + backoff)
+        logging.warning(f"{self.name} rate limit exceeded, pausing requests for {backoff}s")
+
+    def metrics(self, reset: bool = False) -> dict:
+        """Usage since the last reset. Utilization is weight spent / weight available."""
+        self.refill()
+        elapsed = max(time.monotonic() - self.window_start, 1e-9)
+        metrics = {
+            "utilization": self.weight_spent / (self.capacity + elapsed * self.refill_rate),
+            "tokens": self.tokens,
+            "queued": len(self.waiters),
+            "n_requests": self.n_requests,
+            "n_delayed": self.n_delayed,
+            "wait_time_mean": self.wait_time_sum / self.n_delayed if self.n_delayed else 0.0,
+            "wait_time_max": self.wait_time_max,
+            "n_rate_limit_errors": self.n_rate_limit_errors,
+        }
+        if reset:
+            self.reset_metrics()
+        return metrics
@@ -0,0 +1,198 @@
+import json
+import os
+
+import numpy as np
+
+from pure_funcs import SCORE_KEYS, calc_scores_batch
+
+
+INDEX_SUFFIX = ".index.npz"
+
+# per side metrics of all_results.txt lines kept in the index, besides the score keys
+EXTRA_KEYS = ["adg_per_exposure", "sharpe_ratio"]
+
+
+class ResultsStore:
+    """
+    Streaming reader of an optimizer results log, one json per line:
+    all_results.txt ({"config": ..., "results": {symbol: analysis, "config_no": n}})
+    or results_multi/*_all_results.txt (flat dicts with live_config and scalar metrics).
+    A sidecar index holds the byte offset, config_no and key metrics of each line, so ranking,
+    filtering and fetching single configs does not require loading the whole log.
+    The index is extended incrementally as the log grows.
+    """
+
+    def __init__(self, fpath: str, index_fpath: str = None):
+        if os.path.isdir(fpath):
+            fpath = os.path.join(fpath, "all_results.txt")
+        self.fpath = fpath
+        self.index_fpath = fpath + INDEX_SUFFIX if index_fpath is None else index_fpath
+        self.symbols = []
+        self.keys = []
+        self.n_bytes_indexed = 0
+        self.offsets = np.zeros(0, dtype=np.int64)
+        self.config_nos = np.zeros(0, dtype=np.int64)
+        self.metrics = np.zeros((0, 0, 0))  # (n_lines, n_symbols, n_keys)
+        self.load_index()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def is_multi(self) -> bool:
+        return self.symbols == [""]
+
+    def load_index(self):
+        if not os.path.exists(self.index_fpath):
+            return
+        try:
+            index = np.load(self.index_fpath, allow_pickle=False)
+            n_bytes_indexed = int(index["n_bytes_indexed"])
+            if n_bytes_indexed > os.path.getsize(self.fpath):
+                # results log was truncated or replaced; index is stale
+                return
+            self.symbols = index["symbols"].tolist()
+            self.keys = index["keys"].tolist()
+            self.offsets = index["offsets"]
+            self.config_nos = index["config_nos"]
+            self.metrics = index["metrics"]
+            self.n_bytes_indexed = n_bytes_indexed
+        except Exception as e:
+            print(f"error loading results index {self.index_fpath}, rebuilding", e)
+
+    def dump_index(self):
+        np.savez(
+            self.index_fpath,
+            n_bytes_indexed=np.int64(self.n_bytes_indexed),
+            symbols=np.array(self.symbols, dtype=str),
+            keys=np.array(self.keys, dtype=str),
+            offsets=self.offsets,
+            config_nos=self.config_nos,
+            metrics=self.metrics,
+        )
+
+    def init_columns(self, line: dict):
+        if "results" in line:
+            self.symbols = [s for s in line["results"] if s != "config_no"]
+            self.keys = [
+                f"{key}_{side}"
+                for side in ["long", "short"]
+                for key in [k for k, _ in SCORE_KEYS] + EXTRA_KEYS
+            ] + ["n_days"]
+        else:
+            self.symbols = [""]
+            self.keys = sorted(
+                k
+                for k, v in line.items()
+                if isinstance(v, (int, float)) and not isinstance(v, bool)
+            )
+
+    def parse_metrics(self, line: dict) -> np.ndarray:
+        if self.is_multi:
+            rows = [line]
+        else:
+            rows = [line["results"].get(sym, {}) for sym in self.symbols]
+        return np.array(
+            [[row.get(key, np.nan) for key in self.keys] for row in rows], dtype=np.float64
+        )
+
+    def update_index(self) -> int:
+        """Index lines appended to the log since last update. Returns number of new lines."""
+        if not os.path.exists(self.fpath):
+            return 0
+        if self.n_bytes_indexed == 0:
+            self.offsets = np.zeros(0, dtype=np.int64)
+            self.config_nos = np.zeros(0, dtype=np.int64)
+        offsets, config_nos, metrics = [], [], []
+        offset = self.n_bytes_indexed
+        with open(self.fpath, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    # line still being written
+                    break
+                if raw.strip():
+                    line = json.loads(raw)
+                    if not self.keys:
+                        self.init_columns(line)
+                    offsets.append(offset)
+                    config_no = line["results"].get("config_no", -1) if "results" in line else -1
+                    config_nos.append(config_no)
+                    metrics.append(self.parse_metrics(line))
+                offset += len(raw)
+        if offset == self.n_bytes_indexed:
+            return 0
+        if self.n_bytes_indexed == 0:
+            self.metrics = np.zeros((0, len(self.symbols), len(self.keys)))
+        self.n_bytes_indexed = offset
+        if offsets:
+            self.offsets = np.concatenate([self.offsets, np.array(offsets, dtype=np.int64)])
+            self.config_nos = np.concatenate(
+                [self.config_nos, np.array(config_nos, dtype=np.int64)]
+            )
+            self.metrics = np.concatenate([self.metrics, np.array(metrics)])
+        self.dump_index()
+        return len(offsets)
+
+    def fetch(self, i: int) -> dict:
+        """Load i-th line of results log."""
+        with open(self.fpath, "rb") as f:
+            f.seek(int(self.offsets[i]))
+            return json.loads(f.readline())
+
+    def fetch_config_no(self, config_no: int) -> dict:
+        idxs = np.where(self.config_nos == config_no)[0]
+        if len(idxs) == 0:
+            raise KeyError(f"config_no {config_no} not found in {self.fpath}")
+        return self.fetch(idxs[0])
+
+    def iter_results(self, start: int = 0):
+        """Yield parsed lines one at a time, from start line onwards."""
+        if len(self) <= start:
+            return
+        with open(self.fpath, "rb") as f:
+            f.seek(int(self.offsets[start]))
+            for raw in f:
+                if raw.strip():
+                    yield json.loads(raw)
+
+    def column(self, key: str, symbol: str = "") -> np.ndarray:
+        return self.metrics[:, self.symbols.index(symbol), self.keys.index(key)]
+
+    def column_all_symbols(self, key: str) -> np.ndarray:
+        return self.metrics[:, :, self.keys.index(key)]
+
+    def side_metrics(self, side: str, keys: [str] = None) -> np.ndarray:
+        """Returns (n_lines, n_symbols, n_keys) array of given per side keys, default score keys."""
+        keys = [k for k, _ in SCORE_KEYS] if keys is None else keys
+        return self.metrics[:, :, [self.keys.index(f"{key}_{side}") for key in keys]]
+
+    def calc_scores(self, opt_config: dict) -> dict:
+        """Scores per side of all indexed lines, same as pure_funcs.calc_scores."""
+        if self.is_multi:
+            raise Exception("scores of multi symbol results are stored in the log itself")
+        sides = ["long", "short"]
+        metrics = np.stack([self.side_metrics(side) for side in sides], axis=1)
+        scores = calc_scores_batch(opt_config, metrics, sides)["scores"]
+        return {side: scores[:, j] for j, side in enumerate(sides)}
+
+    def passes_thresholds(self, opt_config: dict, side: str) -> np.ndarray:
+        """Mask of lines where all symbols satisfy the maximum_*/minimum_* thresholds of side."""
+        mask = np.ones(len(self), dtype=bool)
+        for key, _ in SCORE_KEYS:
+            vals = self.column_all_symbols(f"{key}_{side}")
+            if (max_key := f"maximum_{key}_{side}") in opt_config:
+                if opt_config[max_key] >= 0.0:
+                    mask &= (vals <= opt_config[max_key]).all(axis=1)
+            elif (min_key := f"minimum_{key}_{side}") in opt_config:
+                if opt_config[min_key] >= 0.0:
+                    mask &= (vals >= opt_config[min_key]).all(axis=1)
+        return mask
+
+    def top_n(self, opt_config: dict, side: str, n: int = 10, passing_only: bool = False):
+        """Line indices of n best scores of given side, best first."""
+        scores = self.calc_scores(opt_config)[side]
+        idxs = np.argsort(scores, kind="stable")
+        if passing_only:
+            idxs = idxs[self.passes_thresholds(opt_config, side)[idxs]]
+        return idxs[:n]
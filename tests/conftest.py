@@ -0,0 +1,5 @@
+import os
+
+# tests run kernels on small synthetic data, where compiling with numba takes longer than running
+# them as plain python. NOJIT=false tests the compiled versions
+os.environ.setdefault("NOJIT", "true")
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pure_funcs import dump_df_npz, load_df_npz
+
+
+def test_round_trip_with_missing_values(tmp_path):
+    df = pd.DataFrame(
+        {
+            "type": ["long_ientry", None, "long_nclose", np.nan, "long_ientry"],
+            "price": [100.0, np.nan, 101.5, 99.0, 100.5],
+            "qty": np.arange(5, dtype=np.int64),
+            "empty": [None] * 5,
+        },
+        index=pd.Index(["a", None, "c", "d", "e"], name="key"),
+    )
+    fpath = str(tmp_path / "df.npz")
+    dump_df_npz(df, fpath)
+    loaded = load_df_npz(fpath)
+
+    assert list(loaded.columns) == list(df.columns)
+    assert loaded.index.name == "key"
+    assert list(loaded.index[[0, 2, 3, 4]]) == ["a", "c", "d", "e"]
+    assert pd.isna(loaded.index[1])
+    assert list(loaded["type"].iloc[[0, 2, 4]]) == ["long_ientry", "long_nclose", "long_ientry"]
+    assert loaded["type"].isna().tolist() == [False, True, False, True, False]
+    assert loaded["empty"].isna().all()
+    np.testing.assert_array_equal(loaded["price"].values, df["price"].values)
+    np.testing.assert_array_equal(loaded["qty"].values, df["qty"].values)
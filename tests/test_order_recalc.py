@@ -0,0 +1,20 @@
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "tools"))
+
+from compare_order_recalc import run_comparison
+
+
+def test_lazy_order_recalc_within_tolerance_of_eager():
+    deviations = run_comparison(
+        n_symbols=4,
+        n_days=2.0,
+        order_proximity=0.002,
+        live_config_path=os.path.join(ROOT, "configs/live/recursive_grid_mode.example.json"),
+    )
+    assert deviations["n_fills_eager"] > 0
+    assert deviations["max_equity_deviation"] <= 0.001
+    assert deviations["fills_deviation"] <= 0.05
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from passivbot_multi import Passivbot
+from procedures import utc_ms
+
+
+class PnlsBot(Passivbot):
+    # only the state used by update_pnls
+    def __init__(self, pnls_cache_filepath: str, fetched: list):
+        self.config = {"pnls_max_lookback_days": 30}
+        self.pnls = []
+        self.init_pnls_cumsum()
+        self.pnls_cache_filepath = pnls_cache_filepath
+        self.pnls_covered_since = None
+        self.state_snapshot = {}
+        self.upd_timestamps = {"pnls": 0.0}
+        self.quote = "USDT"
+        self.fetched = fetched  # results of successive fetch_pnls calls
+
+    async def fetch_pnls(self, start_time=None, end_time=None):
+        return self.fetched.pop(0)
+
+
+def make_pnls(n: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    now = utc_ms()
+    return [
+        {"id": str(i), "timestamp": now - (n - i) * 60000.0, "pnl": float(x)}
+        for i, x in enumerate(rng.normal(0.0, 1.0, n))
+    ]
+
+
+def drop_since_peak(pnls: list) -> float:
+    cumsum = np.cumsum([x["pnl"] for x in pnls])
+    return float(cumsum.max() - cumsum[-1]) if len(cumsum) else 0.0
+
+
+def test_cached_pnls_enter_window_when_fetch_fails(tmp_path):
+    cache = make_pnls(200)
+    fpath = str(tmp_path / "pnls.json")
+    json.dump(cache, open(fpath, "w"))
+    new_pnl = {"id": "new", "timestamp": utc_ms(), "pnl": -3.0}
+    # backfill before first cached pnl finds nothing, then fetch of latest pnls fails
+    bot = PnlsBot(fpath, fetched=[[], None, [new_pnl]])
+
+    assert asyncio.run(bot.update_pnls()) is False
+    assert bot.calc_pnls_drop_since_peak() == drop_since_peak(bot.pnls)
+
+    assert asyncio.run(bot.update_pnls()) is True
+    assert len(bot.pnls) == len(cache) + 1
+    assert np.isclose(bot.calc_pnls_drop_since_peak(), drop_since_peak(bot.pnls))
+
+
+def test_resync_after_pnls_replaced_without_sync(tmp_path):
+    bot = PnlsBot(str(tmp_path / "pnls.json"), fetched=[])
+    bot.pnls = make_pnls(100, seed=1)  # window still empty
+    bot.sync_pnls_cumsum(bot.pnls, 0.0)
+    assert np.isclose(bot.calc_pnls_drop_since_peak(), drop_since_peak(bot.pnls))
@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+import json
+import argparse
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pure_funcs import live_config_dict_to_list_recursive_grid, numpyize, tuplify
+from backtest_multi import backtest_multi
+
+
+def make_hlcs(n_symbols: int, n_minutes: int, seed: int = 0) -> np.ndarray:
+    """Synthetic random walk hlcs, minute-major (n_minutes, n_symbols, 3)."""
+    rng = np.random.default_rng(seed)
+    closes = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.001, (n_minutes, n_symbols)), axis=0))
+    spread = np.abs(rng.normal(0.0, 0.0005, (n_minutes, n_symbols))) * closes
+    return np.ascontiguousarray(np.stack([closes + spread, closes - spread, closes], axis=2))
+
+
+def make_config(n_symbols: int, live_config_path: str) -> dict:
+    live_config = json.load(open(live_config_path))
+    for pside in ["long", "short"]:
+        live_config[pside]["wallet_exposure_limit"] = 1.5 / n_symbols
+    symbols = tuple(f"SYM{i:03}USDT" for i in range(n_symbols))
+    return {
+        "starting_balance": 10000.0,
+        "maker_fee": 0.0002,
+        "do_longs": tuplify([True] * n_symbols),
+        "do_shorts": tuplify([False] * n_symbols),
+        "c_mults": tuplify([1.0] * n_symbols),
+        "symbols": symbols,
+        "qty_steps": tuplify([0.001] * n_symbols),
+        "price_steps": tuplify([0.0001] * n_symbols),
+        "min_costs": tuplify([5.0] * n_symbols),
+        "min_qtys": tuplify([0.001] * n_symbols),
+        "live_configs": numpyize(
+            [live_config_dict_to_list_recursive_grid(live_config) for _ in symbols]
+        ),
+        "loss_allowance_pct": 0.01,
+        "stuck_threshold": 0.95,
+        "unstuck_close_pct": 0.01,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="benchmark_multisymbol",
+        description="compare hlcs memory layouts and dtypes in the multisymbol backtest",
+    )
+    parser.add_argument("-n", "--n_symbols", type=int, default=50, dest="n_symbols")
+    parser.add_argument("-d", "--n_days", type=float, default=30.0, dest="n_days")
+    parser.add_argument("-r", "--repeats", type=int, default=3, dest="repeats")
+    parser.add_argument(
+        "-lc",
+        "--live_config",
+        type=str,
+        default="configs/live/recursive_grid_mode.example.json",
+        dest="live_config_path",
+    )
+    args = parser.parse_args()
+
+    hlcs = make_hlcs(args.n_symbols, int(args.n_days * 60 * 24))
+    config = make_config(args.n_symbols, args.live_config_path)
+    # symbol-major array viewed as minute-major: same indexing, memory strided as before
+    symbol_major = np.ascontiguousarray(hlcs.transpose(1, 0, 2)).transpose(1, 0, 2)
+    cases = [
+        ("symbol-major float64", symbol_major),
+        ("minute-major float64", hlcs),
+        ("minute-major float32", hlcs.astype(np.float32)),
+    ]
+    print(f"n_symbols {args.n_symbols}, n_minutes {len(hlcs)}")
+    n_fills_ref = None
+    for name, data in cases:
+        backtest_multi(data[:1000], config)  # compile
+        elapsed = []
+        for _ in range(args.repeats):
+            sts = time.time()
+            fills, stats = backtest_multi(data, config)
+            elapsed.append(time.time() - sts)
+        n_fills_ref = len(fills) if n_fills_ref is None else n_fills_ref
+        print(
+            f"{name: <22} best {min(elapsed):.3f}s mean {np.mean(elapsed):.3f}s "
+            + f"n_fills {len(fills)} (ref {n_fills_ref}) final equity {stats[-1, 2]:.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
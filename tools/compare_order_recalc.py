@@ -0,0 +1,118 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pure_funcs import tuplify
+from backtest_multi import backtest_multi
+from benchmark_multisymbol import make_hlcs, make_config
+
+
+def compare(eager: tuple, lazy: tuple) -> dict:
+    """Deviation of lazy order recalculation from eager. Each arg is (fills, stats) of backtest_multi."""
+    (fills_eager, stats_eager), (fills_lazy, stats_lazy) = eager, lazy
+    minutes, idx_eager, idx_lazy = np.intersect1d(
+        stats_eager[:, 0], stats_lazy[:, 0], return_indices=True
+    )
+    equity_eager, equity_lazy = stats_eager[idx_eager, 2], stats_lazy[idx_lazy, 2]
+    return {
+        "n_fills_eager": len(fills_eager),
+        "n_fills_lazy": len(fills_lazy),
+        "fills_deviation": abs(len(fills_lazy) / max(len(fills_eager), 1) - 1.0),
+        "max_equity_deviation": np.abs(equity_lazy / equity_eager - 1.0).max(),
+        "final_equity_deviation": abs(equity_lazy[-1] / equity_eager[-1] - 1.0),
+    }
+
+
+def run_comparison(
+    n_symbols: int,
+    n_days: float,
+    order_proximity: float,
+    max_order_age_minutes: int = 60,
+    max_balance_drift: float = 0.002,
+    live_config_path: str = "configs/live/recursive_grid_mode.example.json",
+    verbose: bool = False,
+) -> dict:
+    """Backtests synthetic data eagerly and lazily, long and short; returns deviations of lazy."""
+    hlcs = make_hlcs(n_symbols, int(n_days * 60 * 24))
+    config = make_config(n_symbols, live_config_path)
+    config["do_shorts"] = tuplify([True] * n_symbols)
+    results = {}
+    for name, order_proximity_ in [("eager", 0.0), ("lazy", order_proximity)]:
+        config_ = {
+            **config,
+            "order_proximity": order_proximity_,
+            "max_order_age_minutes": max_order_age_minutes,
+            "max_balance_drift": max_balance_drift,
+        }
+        backtest_multi(hlcs[:1000], config_)  # compile
+        sts = time.time()
+        results[name] = backtest_multi(hlcs, config_)
+        if verbose:
+            print(f"{name: <6} order_proximity {order_proximity_} elapsed {time.time() - sts:.3f}s")
+    return compare(results["eager"], results["lazy"])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="compare_order_recalc",
+        description="compare lazy (order_proximity > 0.0) and eager order recalculation "
+        + "in the multisymbol backtest on synthetic data; exits with error if beyond tolerance",
+    )
+    parser.add_argument("-n", "--n_symbols", type=int, default=40, dest="n_symbols")
+    parser.add_argument("-d", "--n_days", type=float, default=20.0, dest="n_days")
+    parser.add_argument("-op", "--order_proximity", type=float, default=0.002, dest="order_proximity")
+    parser.add_argument("-ma", "--max_order_age_minutes", type=int, default=60, dest="max_age")
+    parser.add_argument(
+        "-bd", "--max_balance_drift", type=float, default=0.002, dest="max_balance_drift"
+    )
+    parser.add_argument(
+        "-et",
+        "--equity_tolerance",
+        type=float,
+        default=0.001,
+        dest="equity_tolerance",
+        help="max relative equity deviation from eager at any stats row",
+    )
+    parser.add_argument(
+        "-ft",
+        "--fills_tolerance",
+        type=float,
+        default=0.05,
+        dest="fills_tolerance",
+        help="max relative difference in number of fills",
+    )
+    parser.add_argument(
+        "-lc",
+        "--live_config",
+        type=str,
+        default="configs/live/recursive_grid_mode.example.json",
+        dest="live_config_path",
+    )
+    args = parser.parse_args()
+
+    deviations = run_comparison(
+        args.n_symbols,
+        args.n_days,
+        args.order_proximity,
+        args.max_age,
+        args.max_balance_drift,
+        args.live_config_path,
+        verbose=True,
+    )
+    for key, val in deviations.items():
+        print(f"{key: <24} {val}")
+    assert (
+        deviations["max_equity_deviation"] <= args.equity_tolerance
+    ), f"max equity deviation {deviations['max_equity_deviation']} > {args.equity_tolerance}"
+    assert (
+        deviations["fills_deviation"] <= args.fills_tolerance
+    ), f"fills deviation {deviations['fills_deviation']} > {args.fills_tolerance}"
+    print("lazy order recalculation within tolerance")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import logging
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from passivbot_multi import Passivbot
+from exchanges_multi.bybit import BybitBot
+from procedures import utc_ms
+from njit_funcs import round_
+from benchmark_multisymbol import make_hlcs
+
+
+class InvalidOrder(Exception):
+    pass
+
+
+class SimulatedExchange:
+    """
+    Local stand-in for the ccxt async (REST) and ccxt.pro (websocket) clients of a hedge mode
+    linear perpetuals exchange, modelled on the bybit adapter in exchanges_multi/bybit.py.
+    Replays minute-major hlcs (n_minutes, n_symbols, 3), one bar per step_seconds.
+    Limit orders fill at order price if the bar trades through it, as in the backtester.
+    Records fill to replacement order latency and REST calls per endpoint.
+    """
+
+    id = "simulator"
+    rateLimit = 20  # ms per unit of cost, used by RateLimiter.for_ccxt
+
+    def __init__(
+        self,
+        hlcs: np.ndarray,
+        symbols: [str],
+        n_warmup_minutes: int = 1000,
+        step_seconds: float = 1.0,
+        starting_balance: float = 10000.0,
+        maker_fee: float = 0.0002,
+        qty_step: float = 0.001,
+        price_step: float = 0.0001,
+        min_cost: float = 5.0,
+        rest_latency_ms: float = 50.0,
+    ):
+        self.hlcs = hlcs
+        self.symbols = symbols
+        self.step = n_warmup_minutes  # index of next bar to replay
+        self.step_seconds = step_seconds
+        self.balance = starting_balance
+        self.maker_fee = maker_fee
+        self.qty_step = qty_step
+        self.price_step = price_step
+        self.rest_latency_ms = rest_latency_ms
+        self.markets = {
+            sym: {
+                "id": sym.replace("/USDT:USDT", "USDT"),
+                "symbol": sym,
+                "type": "swap",
+                "swap": True,
+                "active": True,
+                "linear": True,
+                "contractSize": 1.0,
+                "precision": {"amount": qty_step, "price": price_step},
+                "limits": {"cost": {"min": min_cost}, "amount": {"min": qty_step}},
+            }
+            for sym in symbols
+        }
+        self.positions = {sym: {"long": [0.0, 0.0], "short": [0.0, 0.0]} for sym in symbols}
+        self.open_orders = {sym: {} for sym in symbols}
+        self.tickers = {}
+        self.closed_pnls = []
+        self.order_counter = 0
+        self.ws_tickers = asyncio.Queue()
+        self.ws_orders = asyncio.Queue()
+        self.ws_balance = asyncio.Queue()
+        self.throttle = None  # set by RateLimiter.attach_to_ccxt
+        self.set_tickers(self.hlcs[self.step - 1])
+
+        # metrics
+        self.start_time = time.monotonic()
+        self.rest_calls = {}
+        self.pending_fills = {}  # {symbol: monotonic time of earliest unanswered fill}
+        self.replacement_latencies = []
+        self.loop_lags = []
+        self.n_fills = 0
+
+    # replay and matching
+
+    def set_tickers(self, bars: np.ndarray):
+        for sym, (_, _, close) in zip(self.symbols, bars):
+            close = round_(close, self.price_step)
+            self.tickers[sym] = {
+                "symbol": sym,
+                "bid": close - self.price_step,
+                "ask": close + self.price_step,
+                "last": close,
+                "timestamp": utc_ms(),
+            }
+
+    async def run(self):
+        """Replay bars until data is exhausted."""
+        while self.step < len(self.hlcs):
+            await asyncio.sleep(self.step_seconds)
+            bars = self.hlcs[self.step]
+            for i, sym in enumerate(self.symbols):
+                self.match_orders(sym, bars[i, 0], bars[i, 1])
+            self.set_tickers(bars)
+            for sym in self.symbols:
+                self.ws_tickers.put_nowait(dict(self.tickers[sym]))
+            self.step += 1
+        logging.info("simulator: replay data exhausted")
+
+    async def monitor_loop_lag(self, interval: float = 0.1):
+        while True:
+            sts = time.monotonic()
+            await asyncio.sleep(interval)
+            self.loop_lags.append(time.monotonic() - sts - interval)
+
+    def match_orders(self, symbol: str, high: float, low: float):
+        for order in list(self.open_orders[symbol].values()):
+            if (order["side"] == "buy" and low < order["price"]) or (
+                order["side"] == "sell" and high > order["price"]
+            ):
+                self.fill_order(order)
+
+    def fill_order(self, order: dict):
+        symbol, price = order["symbol"], order["price"]
+        pside = "long" if order["info"]["positionIdx"] == 1 else "short"
+        pos = self.positions[symbol][pside]
+        del self.open_orders[symbol][order["id"]]
+        qty = order["amount"]
+        if order["reduceOnly"]:
+            qty = min(qty, abs(pos[0]))
+            if qty <= 0.0:
+                self.ws_orders.put_nowait([{**order, "status": "canceled"}])
+                return
+            pnl = qty * (price - pos[1]) * (1.0 if pside == "long" else -1.0)
+            pos[0] = round_(pos[0] - qty * (1.0 if pside == "long" else -1.0), self.qty_step)
+            if pos[0] == 0.0:
+                pos[1] = 0.0
+            self.closed_pnls.append(
+                {
+                    "symbol": self.markets[symbol]["id"],
+                    "orderId": order["id"],
+                    "qty": qty,
+                    "closedPnl": pnl,
+                    "updatedTime": utc_ms(),
+                }
+            )
+        else:
+            pnl = 0.0
+            size_new = abs(pos[0]) + qty
+            pos[1] = (abs(pos[0]) * pos[1] + qty * price) / size_new
+            pos[0] = round_(size_new * (1.0 if pside == "long" else -1.0), self.qty_step)
+        self.balance += pnl - qty * price * self.maker_fee
+        self.n_fills += 1
+        self.pending_fills.setdefault(symbol, time.monotonic())
+        filled = {**order, "status": "closed", "filled": qty, "remaining": 0.0}
+        self.ws_orders.put_nowait([filled])
+        self.ws_balance.put_nowait(self.balance_dict())
+
+    # REST
+
+    async def fetch(self, endpoint: str):
+        self.rest_calls[endpoint] = self.rest_calls.get(endpoint, 0) + 1
+        await asyncio.sleep(self.rest_latency_ms / 1000)
+
+    async def rest(self, endpoint: str, cost: float = 1.0):
+        if self.throttle is not None:
+            await self.throttle(cost)
+        await self.fetch(endpoint)
+
+    async def load_markets(self):
+        await self.rest("load_markets")
+        return self.markets
+
+    def balance_dict(self) -> dict:
+        return {"USDT": {"total": self.balance, "free": self.balance, "used": 0.0}, "info": {}}
+
+    async def fetch_balance(self):
+        await self.rest("fetch_balance")
+        return self.balance_dict()
+
+    async def fetch_positions(self, params={}):
+        await self.rest("fetch_positions")
+        positions = [
+            {
+                "symbol": sym,
+                "side": pside,
+                "contracts": abs(pos[0]),
+                "entryPrice": pos[1],
+                "timestamp": utc_ms(),
+                "info": {"positionIdx": 1 if pside == "long" else 2},
+            }
+            for sym in self.positions
+            for pside, pos in self.positions[sym].items()
+            if pos[0] != 0.0
+        ]
+        return self.paginate(positions, params.get("limit", 200), params.get("cursor"))
+
+    def paginate(self, elms: [dict], limit: int, cursor: str = None) -> [dict]:
+        # bybit style cursor pagination; elements of non-final pages carry the next cursor
+        start = int(cursor) if cursor else 0
+        page = elms[start : start + limit]
+        if start + limit < len(elms):
+            for elm in page:
+                elm["info"]["nextPageCursor"] = str(start + limit)
+        return page
+
+    async def fetch_open_orders(self, symbol: str = None, limit: int = 50, params={}):
+        await self.rest("fetch_open_orders")
+        orders = [
+            {**order, "info": dict(order["info"])}
+            for sym in ([symbol] if symbol else self.symbols)
+            for order in self.open_orders[sym].values()
+        ]
+        return self.paginate(orders, limit, params.get("cursor"))
+
+    async def fetch_tickers(self, symbols=None):
+        await self.rest("fetch_tickers")
+        return {sym: dict(ticker) for sym, ticker in self.tickers.items()}
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = "1m", limit: int = 1000):
+        await self.rest("fetch_ohlcv")
+        # bars replayed so far, stamped as if the latest one were the current minute
+        tf = {"1m": 1, "5m": 5, "15m": 15, "1h": 60}[timeframe]
+        bars = self.hlcs[max(0, self.step - limit * tf) : self.step, self.symbols.index(symbol)]
+        bars = bars[len(bars) % tf :].reshape(-1, tf, 3)
+        now_minute = utc_ms() // 60000 * 60000
+        return [
+            [
+                now_minute - (len(bars) - i) * tf * 60000,
+                bar[0, 2],
+                bar[:, 0].max(),
+                bar[:, 1].min(),
+                bar[-1, 2],
+                1.0,
+            ]
+            for i, bar in enumerate(bars)
+        ]
+
+    async def private_get_v5_position_closed_pnl(self, params={}):
+        await self.rest("fetch_closed_pnl")
+        pnls = [
+            dict(x)
+            for x in self.closed_pnls
+            if params.get("startTime", 0) <= x["updatedTime"] <= params.get("endTime", np.inf)
+        ]
+        return {"result": {"list": pnls, "nextPageCursor": ""}}
+
+    def new_order(self, symbol, side, amount, price, params) -> dict:
+        self.order_counter += 1
+        position_idx = params.get("positionIdx", 1)
+        order = {
+            "id": str(self.order_counter),
+            "clientOrderId": params.get("orderLinkId"),
+            "symbol": symbol,
+            "type": "limit",
+            "side": side,
+            "amount": round_(amount, self.qty_step),
+            "price": round_(price, self.price_step),
+            "filled": 0.0,
+            "remaining": amount,
+            "status": "open",
+            "timestamp": utc_ms(),
+            "reduceOnly": (position_idx == 1) == (side == "sell"),
+            "info": {"positionIdx": position_idx, "orderLinkId": params.get("orderLinkId")},
+        }
+        if symbol in self.pending_fills:
+            self.replacement_latencies.append(time.monotonic() - self.pending_fills.pop(symbol))
+        ticker = self.tickers[symbol]
+        if (side == "buy" and order["price"] >= ticker["ask"]) or (
+            side == "sell" and order["price"] <= ticker["bid"]
+        ):
+            # post only order which would take liquidity is cancelled by exchange
+            self.ws_orders.put_nowait([{**order, "status": "canceled"}])
+        else:
+            self.open_orders[symbol][order["id"]] = order
+            self.ws_orders.put_nowait([{**order, "info": dict(order["info"])}])
+        return {**order, "info": dict(order["info"])}
+
+    async def create_limit_order(self, symbol, side, amount, price, params={}):
+        await self.rest("create_order")
+        return self.new_order(symbol, side, amount, price, params)
+
+    async def create_orders(self, orders: [dict]):
+        await self.rest("create_orders")
+        return [
+            self.new_order(x["symbol"], x["side"], x["amount"], x["price"], x["params"])
+            for x in orders
+        ]
+
+    def remove_order(self, id_: str, symbol: str) -> dict:
+        if id_ not in self.open_orders[symbol]:
+            raise InvalidOrder(f"order {id_} {symbol} does not exist")
+        order = {**self.open_orders[symbol].pop(id_), "status": "canceled"}
+        self.ws_orders.put_nowait([order])
+        return order
+
+    async def cancel_order(self, id_: str, symbol: str = None):
+        await self.rest("cancel_order")
+        return self.remove_order(id_, symbol)
+
+    async def private_post_v5_order_cancel_batch(self, params):
+        await self.rest("cancel_orders")
+        ids_symbols = {x["id"]: x["symbol"] for x in self.markets.values()}
+        results, codes = [], []
+        for elm in params["request"]:
+            try:
+                self.remove_order(elm["orderId"], ids_symbols[elm["symbol"]])
+                codes.append({"code": 0, "msg": "OK"})
+            except InvalidOrder as e:
+                codes.append({"code": 110001, "msg": str(e)})
+            results.append({"orderId": elm["orderId"]})
+        return {"result": {"list": results}, "retExtInfo": {"list": codes}}
+
+    async def set_position_mode(self, hedged: bool, symbol: str = None):
+        await self.rest("set_position_mode")
+        return {"hedged": hedged}
+
+    async def set_margin_mode(self, margin_mode: str, symbol: str = None, params={}):
+        await self.rest("set_margin_mode")
+        return {"marginMode": margin_mode}
+
+    async def set_leverage(self, leverage: int, symbol: str = None):
+        await self.rest("set_leverage")
+        return {"leverage": leverage}
+
+    # websocket
+
+    async def watch_tickers(self, symbols=None):
+        return await self.ws_tickers.get()
+
+    async def watch_orders(self):
+        return [{**x, "info": dict(x["info"])} for x in await self.ws_orders.get()]
+
+    async def watch_balance(self):
+        return await self.ws_balance.get()
+
+    async def close(self):
+        pass
+
+    def report(self) -> dict:
+        elapsed_minutes = (time.monotonic() - self.start_time) / 60
+        latencies = np.array(self.replacement_latencies or [np.nan])
+        lags = np.array(self.loop_lags or [np.nan])
+        return {
+            "elapsed_minutes": elapsed_minutes,
+            "n_bars_replayed": self.step,
+            "n_fills": self.n_fills,
+            "n_replacements": len(self.replacement_latencies),
+            "fill_to_replacement_mean_s": np.mean(latencies),
+            "fill_to_replacement_p50_s": np.percentile(latencies, 50),
+            "fill_to_replacement_p95_s": np.percentile(latencies, 95),
+            "fill_to_replacement_max_s": np.max(latencies),
+            "rest_calls_per_minute": sum(self.rest_calls.values()) / elapsed_minutes,
+            "rest_calls_per_minute_by_endpoint": {
+                k: v / elapsed_minutes for k, v in sorted(self.rest_calls.items())
+            },
+            "loop_lag_mean_s": np.mean(lags),
+            "loop_lag_p99_s": np.percentile(lags, 99),
+            "loop_lag_max_s": np.max(lags),
+            "balance": self.balance,
+        }
+
+
+class SimulatedBot(BybitBot):
+    def __init__(self, config: dict, exchange: SimulatedExchange):
+        Passivbot.__init__(self, config)
+        self.ccp = self.cca = exchange
+        self.max_n_cancellations_per_batch = 20
+        self.max_n_creations_per_batch = 12
+        self.batch_size_cancellations = 10
+        self.batch_size_creations = 10
+
+
+def make_bot_config(symbols: [str], args) -> dict:
+    return {
+        "user": "simulator",
+        "user_info": {"exchange": "simulator", "key": "", "secret": "", "passphrase": ""},
+        "symbols": symbols,
+        "live_configs_dir": "",
+        "default_config_path": args.live_config_path,
+        "loss_allowance_pct": 0.01,
+        "stuck_threshold": 0.95,
+        "unstuck_close_pct": 0.01,
+        "pnls_max_lookback_days": 1,
+        "warm_start_max_age_minutes": 0,
+        "execution_delay_seconds": args.execution_delay_seconds,
+        "auto_gs": True,
+        "TWE_long": 1.5,
+        "TWE_short": 0.0,
+        "long_enabled": True,
+        "short_enabled": False,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        prog="exchange_simulator",
+        description="run passivbot_multi against a local simulated exchange and report latencies",
+    )
+    parser.add_argument("-n", "--n_symbols", type=int, default=20, dest="n_symbols")
+    parser.add_argument(
+        "-hl",
+        "--hlcs",
+        type=str,
+        default=None,
+        dest="hlcs_path",
+        help="recorded minute-major hlcs .npy (n_minutes, n_symbols, 3); default synthetic",
+    )
+    parser.add_argument("-d", "--duration", type=float, default=300.0, dest="duration_seconds")
+    parser.add_argument("-s", "--step_seconds", type=float, default=1.0, dest="step_seconds")
+    parser.add_argument("-l", "--rest_latency_ms", type=float, default=50.0, dest="rest_latency_ms")
+    parser.add_argument(
+        "-e", "--execution_delay", type=float, default=2.0, dest="execution_delay_seconds"
+    )
+    parser.add_argument(
+        "-lc",
+        "--live_config",
+        type=str,
+        default="configs/live/recursive_grid_mode.example.json",
+        dest="live_config_path",
+    )
+    args = parser.parse_args()
+
+    n_warmup_minutes = 1000
+    n_replay_minutes = int(args.duration_seconds / args.step_seconds) + 1
+    if args.hlcs_path is None:
+        hlcs = make_hlcs(args.n_symbols, n_warmup_minutes + n_replay_minutes)
+    else:
+        hlcs = np.load(args.hlcs_path)[:, : args.n_symbols]
+        n_warmup_minutes = min(n_warmup_minutes, len(hlcs) // 2)
+    symbols = [f"SYM{i:03}/USDT:USDT" for i in range(hlcs.shape[1])]
+    exchange = SimulatedExchange(
+        hlcs,
+        symbols,
+        n_warmup_minutes=n_warmup_minutes,
+        step_seconds=args.step_seconds,
+        rest_latency_ms=args.rest_latency_ms,
+    )
+    bot = SimulatedBot(make_bot_config(symbols, args), exchange)
+    tasks = [
+        asyncio.create_task(bot.start_bot()),
+        asyncio.create_task(exchange.run()),
+        asyncio.create_task(exchange.monitor_loop_lag()),
+    ]
+    await asyncio.sleep(args.duration_seconds)
+    bot.stop_websocket = True
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    for key, value in exchange.report().items():
+        if isinstance(value, dict):
+            print(key)
+            for k, v in value.items():
+                print(f"    {k: <22} {v:.2f}")
+        else:
+            print(f"{key: <32} {value:.4f}" if isinstance(value, float) else f"{key: <32} {value}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -7,7 +7,35 @@ from prettytable import PrettyTable
 import time
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from pure_funcs import ts_to_date_utc
+from pure_funcs import ts_to_date_utc, load_backtest_artifacts
+
+
+def load_backtest_dir_result(dirpath: str) -> dict:
+    artifacts = load_backtest_artifacts(dirpath)
+    result = artifacts["result"]["result"]
+    sdf = artifacts["sdf"]
+    formatted = {}
+    for side, fdf in [("long", artifacts["longs"]), ("short", artifacts["shorts"])]:
+        formatted[side] = {"dir": os.path.basename(os.path.normpath(dirpath))}
+        formatted[side]["symbol"] = result.get("symbol", "unknown")
+        for abbr, key in [
+            ("adg_w_per_exp", "adg_weighted_per_exposure"),
+            ("adg_per_exp", "adg_per_exposure"),
+            ("exp_rts_mean", "exposure_ratios_mean"),
+            ("hrs_stuck_max", "hrs_stuck_max"),
+            ("pa_dist_mean", "pa_distance_mean"),
+            ("loss_profit_rt", "loss_profit_ratio"),
+            ("drawdown_max", "drawdown_max"),
+            ("sharpe_ratio", "sharpe_ratio"),
+        ]:
+            formatted[side][abbr] = round(result.get(f"{key}_{side}", float("nan")), 6)
+        formatted[side]["n_fills"] = len(fdf)
+        formatted[side]["eqbal_rt_min"] = round(
+            (sdf[f"equity_{side}"] / sdf[f"balance_{side}"]).min(), 6
+        )
+        formatted[side]["n_days"] = round(result.get("n_days", 0.0), 2)
+        formatted[side]["score"] = -formatted[side]["adg_w_per_exp"]
+    return formatted
 
 
 def main():
@@ -28,7 +56,11 @@ def main():
         "score": "used internally by optimizer",
     }
     parser = argparse.ArgumentParser(prog="sort backtest results", description="pretty view")
-    parser.add_argument("results_fpath", type=str, help="path to results file")
+    parser.add_argument(
+        "results_fpath",
+        type=str,
+        help="path to results dir, with result .txt files or backtest plots dirs",
+    )
     args = parser.parse_args()
     filenames = os.listdir(args.results_fpath)
     sides = ["long", "short"]
@@ -38,7 +70,10 @@ def main():
         f.write("")
     for fname in filenames:
         try:
-            if fname.endswith(".txt"):
+            if os.path.exists(os.path.join(args.results_fpath, fname, "result.json")):
+                # backtest plots dir, e.g. backtests/{exchange}/{symbol}/plots/
+                results.append(load_backtest_dir_result(os.path.join(args.results_fpath, fname)))
+            elif fname.endswith(".txt"):
                 symbol = fname[: fname.find("_")]
                 with open(os.path.join(args.results_fpath, fname)) as f:
                     content = f.read()